@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Benchmark: semantic answer cache lookups with the cache filled to its byte
+budget, original per-entry Python scan vs. the embedding matrix.
+Reports milliseconds per lookup that misses (every entry is scored).
+
+Usage: python benchmarks/bench_answer_cache.py
+"""
+
+import operator
+import os
+import sys
+import time
+from array import array
+
+import numpy as np
+
+# Add src directory to path to import bsc_agents modules
+src_dir = os.path.join(os.path.dirname(__file__), "..", "src")
+sys.path.insert(0, src_dir)
+
+from bsc_agents.answer_cache import AnswerCache
+
+DIMENSIONS = int(os.getenv("ANSWER_CACHE_DIMENSIONS", "256"))
+MAX_BYTES = int(os.getenv("ANSWER_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
+ANSWER = [{"type": "chunk", "content": "x" * 200}]  # Short answers: the most entries
+LOOKUPS = 50
+
+
+def fill(cache: AnswerCache, rng: np.random.Generator) -> None:
+    """Store answers until the next one would evict"""
+    while True:
+        before = len(cache.entries)
+        cache.put(f"question {before}", rng.standard_normal(DIMENSIONS), ANSWER, 1.0)
+        if len(cache.entries) <= before:
+            return
+
+
+def legacy_scan(cache: AnswerCache, embeddings: dict, vector: array) -> float:
+    """The AnswerCache.get similarity loop before the embedding matrix"""
+    best_score = cache.similarity_threshold
+    for candidate_key, candidate in cache.entries.items():
+        if cache._expired(candidate):
+            continue
+        score = sum(map(operator.mul, vector, embeddings[candidate_key]))
+        if score >= best_score:
+            best_score = score
+    return best_score
+
+
+def per_lookup_ms(lookup, queries) -> float:
+    started = time.perf_counter()
+    for query in queries:
+        lookup(query)
+    return (time.perf_counter() - started) / len(queries) * 1e3
+
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(7)
+    cache = AnswerCache(enabled=True, max_bytes=MAX_BYTES)
+    fill(cache, rng)
+    queries = [rng.standard_normal(DIMENSIONS) for _ in range(LOOKUPS)]
+    # The legacy cache kept embeddings and queries as array("f")
+    embeddings = {key: array("f", entry.embedding) for key, entry in cache.entries.items()}
+    unit_queries = [array("f", query / np.linalg.norm(query)) for query in queries]
+    for entry in list(cache.entries.values())[:5]:
+        hit, _ = cache.get("rephrased", entry.embedding)
+        assert hit is entry
+
+    legacy = per_lookup_ms(lambda query: legacy_scan(cache, embeddings, query), unit_queries[:5])
+    matrix = per_lookup_ms(lambda query: cache.get("unseen question", query), queries)
+    print(f"{len(cache.entries)} entries x {DIMENSIONS} dimensions ({MAX_BYTES / 2**20:.0f} MiB budget)")
+    print(f"legacy (Python scan)  {legacy:10.2f} ms/lookup")
+    print(f"embedding matrix      {matrix:10.2f} ms/lookup  ({legacy / matrix:.0f}x faster)")
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Benchmark: cold-start import cost of the API and the agent module.
+Imports each in a fresh interpreter with -X importtime and reports the
+median total plus the slowest top-level packages, to catch regressions
+(e.g. a heavy SDK creeping back into the API's own imports).
+
+Usage: python benchmarks/bench_cold_start.py [runs]
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+src_dir = os.path.join(os.path.dirname(__file__), "..", "src")
+
+# Placeholder credentials: importing must not need real ones
+ENV = {
+    **os.environ,
+    "AZURE_OPENAI_API_KEY": os.getenv("AZURE_OPENAI_API_KEY", "benchmark"),
+    "AZURE_OPENAI_ENDPOINT": os.getenv("AZURE_OPENAI_ENDPOINT", "https://example.openai.azure.com"),
+}
+
+
+def import_profile(module: str) -> Tuple[float, Dict[str, float]]:
+    """Seconds to import module, and cumulative seconds per top-level package"""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=src_dir,
+        env=ENV,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    total = 0.0
+    packages: Dict[str, float] = defaultdict(float)
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        nested = name.startswith("   ")  # Imported by another module
+        name = name.strip()
+        if name == module:
+            total = int(cumulative) / 1e6
+        elif nested and "." not in name:
+            packages[name] += int(cumulative) / 1e6  # Each module appears once
+    return total, packages
+
+
+def report(module: str, runs: int) -> None:
+    totals: List[float] = []
+    packages: Dict[str, float] = {}
+    for _ in range(runs):
+        total, packages = import_profile(module)
+        totals.append(total)
+    print(f"import {module}: median {statistics.median(totals) * 1000:.0f} ms over {runs} runs")
+    for name, seconds in sorted(packages.items(), key=lambda item: -item[1])[:8]:
+        print(f"    {name:<30}{seconds * 1000:>8.0f} ms")
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    report("api", runs)  # What runs before the server listens
+    report("bsc_agents.agent", runs)  # Imported by the warm-up
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Benchmark: portal lookups, original read-copy-scan vs. the compiled PortalIndex.
+Reports microseconds per lookup over a mix of typical tool queries.
+
+Usage: python benchmarks/bench_portal_lookup.py
+"""
+
+import json
+import os
+import sys
+import time
+
+# Add src directory to path to import bsc_agents modules
+src_dir = os.path.join(os.path.dirname(__file__), "..", "src")
+sys.path.insert(0, src_dir)
+
+from bsc_agents.portals import PortalIndex, get_portal_index
+
+QUERIES = [("", ""), ("canvas", ""), ("email", ""), ("grades", ""), ("", "academic"), ("transcript", "student_services")]
+LOOKUPS = 20_000
+
+
+def legacy_lookup(path: str, query: str, category: str) -> list:
+    """The lookup_portals_and_resources body before PortalIndex"""
+    with open(path, "r", encoding="utf-8") as f:
+        portals_data = json.load(f)
+    all_portals = []
+    for cat_name, cat_data in portals_data.get("portals", {}).get("categories", {}).items():
+        if category and cat_name != category:
+            continue
+        for portal in cat_data.get("portals", []):
+            portal_with_category = portal.copy()
+            portal_with_category["category_name"] = cat_name
+            portal_with_category["category_description"] = cat_data.get("description", "")
+            all_portals.append(portal_with_category)
+    if query:
+        query_lower = query.lower()
+        all_portals = [
+            portal for portal in all_portals
+            if query_lower in portal.get("name", "").lower()
+            or query_lower in portal.get("purpose", "").lower()
+            or any(query_lower in k.lower() for k in portal.get("keywords", []))
+            or any(query_lower in a.lower() for a in portal.get("aliases", []))
+        ]
+    return [
+        {
+            "name": portal.get("name", ""),
+            "url": portal.get("url", ""),
+            "purpose": portal.get("purpose", ""),
+            "category": portal.get("category_name", ""),
+            "users": portal.get("users", []),
+            "keywords": portal.get("keywords", []),
+            "aliases": portal.get("aliases", []),
+            "key_features": portal.get("key_features", []),
+        }
+        for portal in all_portals
+    ]
+
+
+def per_lookup_us(lookup, count: int) -> float:
+    started = time.perf_counter()
+    for i in range(count):
+        query, category = QUERIES[i % len(QUERIES)]
+        lookup(query, category)
+    return (time.perf_counter() - started) / count * 1e6
+
+
+if __name__ == "__main__":
+    path = get_portal_index().path
+    index = PortalIndex(path)
+    for query, category in QUERIES:
+        assert legacy_lookup(path, query, category) == index.lookup(query, category)
+
+    legacy = per_lookup_us(lambda q, c: legacy_lookup(path, q, c), LOOKUPS // 10)
+    compiled = per_lookup_us(index.lookup, LOOKUPS)
+    print(f"legacy (read, copy, scan) {legacy:10.1f} µs/lookup")
+    print(f"PortalIndex               {compiled:10.1f} µs/lookup  ({legacy / compiled:.0f}x faster)")
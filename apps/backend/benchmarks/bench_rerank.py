@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Benchmark: knowledge base results with and without reranking.
+Runs each labeled query through the configured retrieval (Pinecone or the
+local index, plus BM25 when set) and compares a fixed top_k with the
+over-fetched, reranked and cut list: recall of the relevant documents, how
+many results the model reads, and the tool output tokens that saves.
+
+Needs the same environment as the API (Azure OpenAI for query embeddings
+and a configured knowledge base). Relevance is judged by document_id, which
+build_local_index.py sets to the page URL.
+
+Usage: python benchmarks/bench_rerank.py [queries.jsonl] [top_k]
+"""
+
+import asyncio
+import json
+import os
+import statistics
+import sys
+from typing import Any, Dict, List, Sequence, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from bsc_agents import agent
+from bsc_agents.packing import ContextPacker, estimate_tokens
+from bsc_agents.rerank import get_reranker
+
+QUERIES = os.path.join(os.path.dirname(__file__), "retrieval_queries.jsonl")
+
+
+def recall(results: Sequence[Tuple[Any, float]], relevant: Sequence[str]) -> float:
+    found = {str(match.metadata.get("document_id")) for match, _ in results}
+    return sum(document in found for document in relevant) / len(relevant)
+
+
+async def main(path: str, top_k: int) -> None:
+    with open(path, "r", encoding="utf-8") as f:
+        queries = [json.loads(line) for line in f if line.strip()]
+
+    reranker = get_reranker()
+    # Unlimited budget: measure what reranking alone saves
+    packer = ContextPacker(token_budget=10**9)
+    rows: Dict[str, Dict[str, List[float]]] = {
+        name: {"recall": [], "results": [], "tokens": []} for name in ("fixed", "reranked")
+    }
+    for item in queries:
+        fixed = (await agent.retrieve_candidates(item["query"], top_k))[:top_k]
+        candidates = await agent.retrieve_candidates(item["query"], reranker.fetch_count(top_k))
+        reranked = reranker.rerank(item["query"], candidates, top_k)
+        for name, results in (("fixed", fixed), ("reranked", reranked)):
+            rows[name]["recall"].append(recall(results, item["relevant"]))
+            rows[name]["results"].append(len(results))
+            rows[name]["tokens"].append(estimate_tokens(str(packer.pack(results))))
+
+    print(f"{len(queries)} queries, top_k={top_k}, {reranker.candidates} candidates\n")
+    print(f"{'':<10}{'recall':>8}{'results':>9}{'tokens':>9}")
+    for name, row in rows.items():
+        print(
+            f"{name:<10}{statistics.mean(row['recall']):>8.2f}"
+            f"{statistics.mean(row['results']):>9.1f}{statistics.mean(row['tokens']):>9.0f}"
+        )
+    saved = statistics.mean(rows["fixed"]["tokens"]) - statistics.mean(rows["reranked"]["tokens"])
+    print(f"\nTokens saved per search: {saved:.0f}")
+
+
+if __name__ == "__main__":
+    path = sys.argv[1] if len(sys.argv) > 1 else QUERIES
+    top_k = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    asyncio.run(main(path, top_k))
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Benchmark: SSE frame encoding, original per-event json.dumps vs. SSEEncoder.
+Reports single-core frames per second for typical chunk payloads.
+
+Usage: python benchmarks/bench_sse_encoder.py
+"""
+
+import asyncio
+import json
+import os
+import sys
+import time
+
+# Add src directory to path to import the API modules
+src_dir = os.path.join(os.path.dirname(__file__), "..", "src")
+sys.path.insert(0, src_dir)
+
+from sse import SSEEncoder, orjson
+
+
+CONTENTS = [
+    "Hello there, ",
+    "The FAFSA priority deadline is March 1. ",
+    "You can find it in the Financial Aid Portal — https://byui.edu/financial-aid. ",
+    "🔍 Searching BYU-Idaho knowledge base...\n\n",
+]
+FRAMES = 200_000
+
+
+def legacy_frames(count: int) -> None:
+    """The per-event encoding the stream endpoints used before SSEEncoder"""
+    event_counter = 0
+    for i in range(count):
+        event_counter += 1
+        event_data = json.dumps(
+            {
+                "type": "chunk",
+                "content": CONTENTS[i & 3],
+                "timestamp": int(asyncio.get_event_loop().time() * 1000),
+            }
+        )
+        frame = f"id: {event_counter}\ndata: {event_data}\n\n"
+        frame.encode("utf-8")  # What the ASGI server ends up sending
+
+
+def encoder_frames(count: int) -> None:
+    encoder = SSEEncoder()
+    for i in range(count):
+        encoder.event("chunk", CONTENTS[i & 3])
+
+
+async def measure(fn) -> float:
+    best = float("inf")
+    for _ in range(5):
+        started = time.perf_counter()
+        fn(FRAMES)
+        best = min(best, time.perf_counter() - started)
+    return FRAMES / best
+
+
+async def main():
+    legacy = await measure(legacy_frames)
+    encoder = await measure(encoder_frames)
+    print(f"JSON backend: {'orjson' if orjson is not None else 'json (fallback)'}")
+    print(f"{'legacy json.dumps + f-string':<32}{legacy:>14,.0f} frames/s")
+    print(f"{'SSEEncoder':<32}{encoder:>14,.0f} frames/s")
+    print(f"{'speedup':<32}{encoder / legacy:>13.2f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
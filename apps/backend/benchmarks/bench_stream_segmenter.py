@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark: StreamSegmenter vs. the original get_flush_content_and_remainder.
+Streams long synthetic responses through both and reports time per character.
+
+Usage: python benchmarks/bench_stream_segmenter.py
+"""
+
+import os
+import random
+import sys
+import time
+
+# Add src directory to path to import the API modules
+src_dir = os.path.join(os.path.dirname(__file__), "..", "src")
+sys.path.insert(0, src_dir)
+
+from streaming import StreamSegmenter, get_flush_content_and_remainder
+
+
+WORDS = (
+    "the student financial aid office BYU-Idaho Idaho's FAFSA deadline 2025 "
+    "registration opens Kimball Building transcript I-Learn Canvas portal"
+).split()
+
+
+def synthetic_response(rng: random.Random, chars: int, punctuation: bool) -> str:
+    """Prose-like text; without punctuation only word boundaries remain"""
+    parts = []
+    total = 0
+    while total < chars:
+        word = rng.choice(WORDS)
+        if punctuation and rng.random() < 0.08:
+            word += rng.choice([".", ",", "!", "?", ":"])
+        parts.append(word)
+        total += len(word) + 1
+    return " ".join(parts)
+
+
+def synthetic_table(rng: random.Random, chars: int) -> str:
+    """Numbers and hyphenated codes, where few spaces are safe to split on"""
+    parts = []
+    total = 0
+    while total < chars:
+        cell = rng.choice(["1 000", "3.14 159", "208-496-1411", "-x", "'s", "2025 2026"])
+        parts.append(cell)
+        total += len(cell) + 1
+    return " ".join(parts)
+
+
+def tokenize(text: str, rng: random.Random, burst: int = 0) -> list:
+    """Split into model-sized deltas (1-6 characters), optionally with bursts"""
+    deltas = []
+    i = 0
+    while i < len(text):
+        size = rng.randint(1, 6)
+        if burst and rng.random() < 0.01:
+            size = burst
+        deltas.append(text[i:i + size])
+        i += size
+    return deltas
+
+
+def run_legacy(deltas: list) -> None:
+    buffer = ""
+    for delta in deltas:
+        _, buffer = get_flush_content_and_remainder(buffer, delta)
+
+
+def run_segmenter(deltas: list) -> None:
+    segmenter = StreamSegmenter()
+    for delta in deltas:
+        segmenter.feed(delta)
+
+
+def bench(fn, deltas: list, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(deltas)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    rng = random.Random(42)
+    print(f"{'scenario':<28}{'chars':>9}{'legacy ns/char':>17}{'segmenter ns/char':>20}{'speedup':>10}")
+    scenarios = [
+        ("prose", lambda n: synthetic_response(rng, n, True), 0),
+        ("no punctuation", lambda n: synthetic_response(rng, n, False), 0),
+        ("numbers/hyphens", lambda n: synthetic_table(rng, n), 0),
+        ("prose, 4k-char bursts", lambda n: synthetic_response(rng, n, True), 4000),
+        ("numbers, 4k-char bursts", lambda n: synthetic_table(rng, n), 4000),
+    ]
+    for label, make_text, burst in scenarios:
+        for chars in (2_000, 20_000, 200_000):
+            text = make_text(chars)
+            deltas = tokenize(text, rng, burst)
+            legacy = bench(run_legacy, deltas)
+            segmenter = bench(run_segmenter, deltas)
+            print(
+                f"{label:<28}{len(text):>9}"
+                f"{legacy / len(text) * 1e9:>17.1f}"
+                f"{segmenter / len(text) * 1e9:>20.1f}"
+                f"{legacy / segmenter:>9.2f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
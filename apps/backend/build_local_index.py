@@ -0,0 +1,175 @@
+"""
+Build the local knowledge base index (KB_BACKEND=local) and the BM25 keyword
+index (KB_BM25_INDEX_PATH) from the enriched articles spreadsheet, using the
+same embedding deployment as the agent. With --from-pinecone, build only the
+keyword index, from the records already in the Pinecone index.
+"""
+
+import argparse
+import math
+import os
+import sys
+
+import pandas as pd
+from dotenv import load_dotenv
+from openai import AzureOpenAI
+import logging
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "src"))
+
+from bsc_agents.bm25 import build_bm25_index
+from bsc_agents.local_index import build_index
+from bsc_agents.retrieval import IndexVersion
+
+load_dotenv()
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Above this many chunks the index gets IVF lists instead of exact search
+EXACT_SEARCH_MAX_CHUNKS = 20000
+
+client = AzureOpenAI(
+    api_key=os.getenv("AZURE_OPENAI_API_KEY"),
+    api_version=os.getenv("AZURE_OPENAI_API_VERSION", "2024-02-01"),
+    azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT")
+)
+
+
+def chunk_text(text, chunk_chars):
+    """
+    Split text into chunks of about chunk_chars, on paragraph boundaries where possible.
+    """
+    chunks = []
+    current = ""
+    for paragraph in text.split("\n\n"):
+        if current and len(current) + len(paragraph) + 2 > chunk_chars:
+            chunks.append(current)
+            current = ""
+        while len(paragraph) > chunk_chars:
+            chunks.append(paragraph[:chunk_chars])
+            paragraph = paragraph[chunk_chars:]
+        current = f"{current}\n\n{paragraph}" if current else paragraph
+    if current.strip():
+        chunks.append(current)
+    return chunks
+
+
+def load_records(input_file, chunk_chars):
+    """
+    Read the spreadsheet and return one {"id", "metadata"} record per chunk.
+    """
+    logger.info(f"Reading Excel file: {input_file}")
+    df = pd.read_excel(input_file)
+
+    records = []
+    for _, row in df.iterrows():
+        content = row.get("enriched_content")
+        if pd.isna(content) or not str(content).strip():
+            content = row.get("content")
+        if pd.isna(content) or not str(content).strip():
+            continue
+
+        urls = row.get("extracted_urls")
+        urls = "" if pd.isna(urls) else str(urls)
+        chunks = chunk_text(str(content), chunk_chars)
+        for number, chunk in enumerate(chunks):
+            records.append({
+                "id": f"{row['url']}#{number}",
+                "metadata": {
+                    "chunk_text": chunk,
+                    "document_title": str(row["title"]),
+                    "document_id": str(row["url"]),
+                    "document_type": "knowledge_article",
+                    "category": "" if pd.isna(row.get("category")) else str(row["category"]),
+                    "chunk_id": number,
+                    "total_chunks": len(chunks),
+                    "extracted_urls": urls,
+                    "has_urls": bool(urls),
+                    "content_length": len(chunk),
+                },
+            })
+
+    logger.info(f"Split {len(df)} articles into {len(records)} chunks")
+    return records
+
+
+def export_pinecone_records(index_name, batch_size):
+    """
+    Read back every record in the Pinecone index's default namespace: one
+    {"id", "metadata"} record per vector, under its Pinecone id.
+    """
+    from pinecone import Pinecone
+
+    index = Pinecone(api_key=os.getenv("PINECONE_API_KEY")).Index(index_name)
+    records = []
+    for ids in index.list(limit=batch_size):
+        vectors = index.fetch(ids=list(ids)).vectors
+        for vector_id in ids:
+            if vector_id not in vectors:
+                continue  # Deleted since it was listed
+            metadata = dict(vectors[vector_id].metadata or {})
+            if not metadata.get("chunk_text"):
+                sys.exit(f"Pinecone vector {vector_id} has no chunk_text metadata to index")
+            records.append({"id": vector_id, "metadata": metadata})
+        logger.info(f"Exported {len(records)} records from {index_name}")
+    return records
+
+
+def embed(texts, deployment, batch_size):
+    """
+    Embed texts in batches with the agent's embedding deployment.
+    """
+    vectors = []
+    for start in range(0, len(texts), batch_size):
+        logger.info(f"Embedding chunks {start + 1}-{min(start + batch_size, len(texts))}/{len(texts)}")
+        response = client.embeddings.create(model=deployment, input=texts[start:start + batch_size])
+        vectors.extend(item.embedding for item in response.data)
+    return vectors
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--input", default="../../documents/enriched_output.xlsx")
+    parser.add_argument("--output", default=os.getenv("KB_LOCAL_INDEX_PATH") or "local_index")
+    parser.add_argument("--bm25-output", default=os.getenv("KB_BM25_INDEX_PATH"),
+                        help="Keyword index directory (default: <output>/bm25)")
+    parser.add_argument("--bm25-only", action="store_true",
+                        help="Only rebuild the local index's keyword index (same --input and --chunk-chars)")
+    parser.add_argument("--from-pinecone", action="store_true",
+                        help="Only build the keyword index, from the records in PINECONE_INDEX_NAME")
+    parser.add_argument("--dtype", choices=["float32", "float16"], default="float32")
+    parser.add_argument("--chunk-chars", type=int, default=1500)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--ivf-lists", type=int, default=None,
+                        help="IVF clusters (default: exact search up to %d chunks)" % EXACT_SEARCH_MAX_CHUNKS)
+    args = parser.parse_args()
+
+    deployment = os.getenv("AZURE_OPENAI_EMBEDDINGS_DEPLOYMENT", "text-embedding-3-large")
+    bm25_output = args.bm25_output or os.path.join(args.output, "bm25")
+    if args.from_pinecone:
+        # Hybrid search fuses by record id, so index Pinecone's own chunks
+        index_name = os.getenv("PINECONE_INDEX_NAME", "bsc-supportagent-v1")
+        records = export_pinecone_records(index_name, args.batch_size)
+        source = f"pinecone:{index_name}"
+    else:
+        records = load_records(args.input, args.chunk_chars)
+        source = "local"
+
+    manifest = build_bm25_index(bm25_output, records, source=source)
+    logger.info(f"Wrote keyword index ({manifest['terms']} terms, {source}) to {bm25_output}")
+
+    if not (args.bm25_only or args.from_pinecone):
+        vectors = embed([record["metadata"]["chunk_text"] for record in records], deployment, args.batch_size)
+
+        ivf_lists = args.ivf_lists
+        if ivf_lists is None:
+            ivf_lists = int(math.sqrt(len(records))) if len(records) > EXACT_SEARCH_MAX_CHUNKS else 0
+
+        manifest = build_index(args.output, vectors, records, model=deployment, dtype=args.dtype, ivf_lists=ivf_lists)
+        logger.info(f"Wrote {manifest['count']} vectors ({manifest['dtype']}, {ivf_lists or 'no'} IVF lists) to {args.output}")
+
+    # Running workers pick the new index up on restart; drop their cached results now
+    if os.getenv("KB_INDEX_VERSION_FILE"):
+        token = IndexVersion(os.getenv("KB_INDEX_VERSION_FILE")).bump()
+        logger.info(f"Bumped knowledge base index version to {token}")
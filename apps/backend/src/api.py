@@ -5,128 +5,41 @@ Connects React frontend to Python AI agent with real-time streaming responses.
 """
 
 import asyncio
+import json
 import os
 import sys
-from typing import AsyncGenerator, Optional
-from fastapi import FastAPI, HTTPException, Query
-from fastapi.responses import StreamingResponse
+import time
+
+_imports_started = time.perf_counter()
+
+from contextlib import aclosing, asynccontextmanager
+from typing import Any, AsyncGenerator, Awaitable, List, Optional
+from fastapi import FastAPI, Header, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
-import json
 
 # Add current directory to Python path to import our local agents module
 current_dir = os.path.dirname(__file__)
 sys.path.insert(0, current_dir)
 
 # Import our local BSC agent and memory manager
-from bsc_agents.agent import stream_message_for_api
-from bsc_agents.memory import get_memory_manager
-
-
-def get_flush_content_and_remainder(buffer: str, new_content: str) -> tuple[str, str]:
-    """
-    Intelligent buffering that returns what to flush and what to keep.
-    Prevents word splitting while ensuring smooth streaming.
-    
-    Returns:
-        tuple: (content_to_flush, content_to_keep_in_buffer)
-    """
-    combined = buffer + new_content
-    
-    # If content is very short, keep buffering
-    if len(combined) < 10:
-        return "", combined
-    
-    # Priority 1: Always flush on sentence endings
-    sentence_endings = ['. ', '! ', '? ', '.\n', '!\n', '?\n', '.\"', '!\"', '?\"']
-    for ending in sentence_endings:
-        if ending in combined:
-            idx = combined.rfind(ending)
-            if idx > 0:
-                return combined[:idx + len(ending)], combined[idx + len(ending):]
-    
-    # Priority 2: Flush at paragraph breaks
-    if '\n\n' in combined:
-        idx = combined.rfind('\n\n')
-        return combined[:idx + 2], combined[idx + 2:]
-    
-    # Priority 3: Flush at punctuation that typically ends phrases
-    phrase_endings = [', ', ': ', '; ', ' - ', ' — ']
-    if len(combined) >= 30:
-        for ending in phrase_endings:
-            if ending in combined:
-                idx = combined.rfind(ending)
-                if idx > 15:  # Ensure we have substantial content before
-                    return combined[:idx + len(ending)], combined[idx + len(ending):]
-    
-    # Priority 4: Flush at line breaks with substantial content
-    if '\n' in combined and len(combined) > 25:
-        idx = combined.rfind('\n')
-        if idx > 15:
-            return combined[:idx + 1], combined[idx + 1:]
-    
-    # Priority 5: Smart word boundary detection when buffer gets long
-    if len(combined) >= 50:
-        # Look for the last complete word boundary
-        # A word boundary is a space that's not inside a hyphenated word or number
-        for i in range(len(combined) - 1, 20, -1):
-            if combined[i] == ' ':
-                # Check if this is a good place to break
-                # Don't break if we're in the middle of:
-                # - A number (e.g., "1 000" or "3.14 159")
-                # - A hyphenated word (e.g., "BYU-Idaho")
-                # - An apostrophe word (e.g., "Idaho's")
-                
-                # Look ahead and behind to ensure we're at a real word boundary
-                before_space = combined[:i]
-                after_space = combined[i+1:] if i+1 < len(combined) else ""
-                
-                # Don't split if the character before space is a digit and after is a digit
-                if (before_space and before_space[-1].isdigit() and 
-                    after_space and after_space[0].isdigit()):
-                    continue
-                
-                # Don't split if we're right after a hyphen or apostrophe
-                if before_space and before_space[-1] in "-'":
-                    continue
-                
-                # Don't split if we're right before a hyphen or apostrophe
-                if after_space and len(after_space) > 1 and after_space[0] in "-'":
-                    continue
-                
-                # This looks like a good word boundary
-                return combined[:i + 1], combined[i + 1:]
-    
-    # Priority 6: For very long content, find any reasonable break point
-    if len(combined) >= 100:
-        # Try to find any space that's not breaking a word
-        last_good_space = -1
-        for i in range(len(combined) - 1, 30, -1):
-            if combined[i] == ' ':
-                # Basic check: not breaking a number or hyphenated word
-                if i > 0 and combined[i-1] not in "-'0123456789":
-                    last_good_space = i
-                    break
-        
-        if last_good_space > 0:
-            return combined[:last_good_space + 1], combined[last_good_space + 1:]
-    
-    # Priority 7: Emergency flush - buffer is too large
-    if len(combined) >= 150:
-        # As a last resort, find ANY space
-        last_space = combined.rfind(' ')
-        if last_space > 50:
-            return combined[:last_space + 1], combined[last_space + 1:]
-        else:
-            # No good break point found, flush most of it but keep some context
-            # Try to at least not break in the middle of a word
-            flush_point = 140
-            while flush_point < len(combined) and combined[flush_point].isalnum():
-                flush_point += 1
-            return combined[:flush_point], combined[flush_point:]
-    
-    # Default: keep buffering
-    return "", combined
+from bsc_agents.admission import AdmissionRejected, Priority
+from bsc_agents.answer_cache import get_answer_cache
+from bsc_agents.embedding_cache import get_embedding_cache
+from bsc_agents.memory import SessionBusy, get_memory_manager
+from bsc_agents.metrics import get_metrics
+from bsc_agents.retrieval import get_index_version, get_result_cache
+from bsc_agents.timing import current_timing, start_request_timing
+from sse import ReplayRegistry, SSEEncoder, sse_response
+from startup import WarmUp
+from streaming import (
+    TICK,
+    ChunkCoalescer,
+    StreamSegmenter,
+    get_flush_content_and_remainder,
+    iterate_with_timeouts,
+)
 
 
 def should_flush_buffer(buffer: str, new_content: str) -> bool:
@@ -137,7 +50,19 @@ def should_flush_buffer(buffer: str, new_content: str) -> bool:
     return len(flush_content) > 0
 
 
-app = FastAPI(title="BSC Support Agent API", version="1.0.0")
+# The agent module (agents SDK, OpenAI client) is imported by the warm-up
+# rather than here, so the server starts listening without waiting for it
+warm_up = WarmUp(imports_seconds=time.perf_counter() - _imports_started)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    warm_up.start()
+    yield
+    warm_up.stop()
+
+
+app = FastAPI(title="BSC Support Agent API", version="1.0.0", lifespan=lifespan)
 
 # CORS configuration for frontend integration
 cors_origins = os.getenv(
@@ -153,12 +78,37 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# SSE stream tuning: coalesce segments into frames of at most SSE_COALESCE_MS
+# latency or SSE_COALESCE_BYTES size, and send a heartbeat comment after
+# SSE_HEARTBEAT_SECONDS of silence (e.g. during tool calls) so proxies keep
+# the connection open
+SSE_COALESCE_MS = float(os.getenv("SSE_COALESCE_MS", "40"))
+SSE_COALESCE_BYTES = int(os.getenv("SSE_COALESCE_BYTES", "512"))
+SSE_HEARTBEAT_SECONDS = float(os.getenv("SSE_HEARTBEAT_SECONDS", "15"))
+
+# Replay buffers let a reconnecting client resume an answer via Last-Event-ID;
+# finished streams are kept for SSE_REPLAY_TTL_SECONDS
+replay_registry = ReplayRegistry(
+    ttl_seconds=float(os.getenv("SSE_REPLAY_TTL_SECONDS", "120")),
+    max_events=int(os.getenv("SSE_REPLAY_MAX_EVENTS", "1000")),
+    # How long a run survives with no connected client before it is cancelled
+    reconnect_grace_seconds=float(os.getenv("SSE_RECONNECT_GRACE_SECONDS", "10")),
+)
+
+# Largest number of questions accepted by /api/chat/batch in one request
+BATCH_MAX_MESSAGES = int(os.getenv("BATCH_MAX_MESSAGES", "500"))
+
 
 class ChatMessage(BaseModel):
     message: str
     sessionId: Optional[str] = None
 
 
+class BatchChatRequest(BaseModel):
+    messages: List[str]
+    concurrency: Optional[int] = None
+
+
 class ChatResponse(BaseModel):
     success: bool = True
     response: str
@@ -174,12 +124,14 @@ class ChatResponse(BaseModel):
 
 @app.get("/api/health")
 async def health_check():
-    """Health check endpoint"""
+    """Health check endpoint (liveness: 200 even while the agent can't be imported)"""
     memory_manager = get_memory_manager()
     memory_stats = memory_manager.get_session_stats()
 
     return {
-        "status": "ok",
+        "status": "degraded" if warm_up.error else "ok",
+        "ready": warm_up.ready,
+        "error": warm_up.error,
         "service": "BSC Support Agent API",
         "agent": "BSC Support Agent",
         "features": [
@@ -193,6 +145,32 @@ async def health_check():
     }
 
 
+@app.get("/api/ready")
+async def readiness_check(response: Response):
+    """
+    Readiness probe: 200 once the agent is imported and its connections are
+    warm, 503 before. The body is the startup report (import and warm-up
+    phase durations, and the import error if the agent failed to import).
+    A probe after a failed warm-up starts it over.
+    """
+    if not warm_up.ready:
+        warm_up.retry()
+        response.status_code = 503
+    return warm_up.to_dict()
+
+
+@app.get("/api/metrics")
+async def get_runtime_metrics():
+    """
+    Runtime metrics in the Prometheus text format: latency histograms for
+    each pipeline stage, tool calls, SSE traffic, admission and cancellations.
+    """
+    return PlainTextResponse(
+        get_metrics().render_prometheus(),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
+
+
 @app.get("/api/memory/stats")
 async def get_memory_stats():
     """Get memory system statistics"""
@@ -240,12 +218,86 @@ async def cleanup_expired_sessions():
     }
 
 
+@app.get("/api/cache/stats")
+async def get_answer_cache_stats():
+    """
+    Get answer cache statistics (hit rate, latency saved, size), with the
+    query embedding and search result caches under "embeddings" and "results"
+    """
+    return get_answer_cache().get_stats() | {
+        "embeddings": get_embedding_cache().get_stats(),
+        "results": get_result_cache().get_stats(),
+    }
+
+
+@app.post("/api/cache/invalidate")
+async def invalidate_answer_cache(index_version: Optional[str] = Query(None)):
+    """
+    Move to a new knowledge base version, dropping cached answers and search
+    results; call after re-ingesting the knowledge base. index_version names
+    the new version (default: a fresh token). With KB_INDEX_VERSION_FILE set,
+    the other workers and replicas sharing the file follow within a second.
+    """
+    version = get_index_version()
+    previous = version.token
+    answers = len(get_answer_cache().entries)
+    results = len(get_result_cache().entries)
+    if version.bump(index_version) == previous:
+        answers = results = 0  # Already at that version: nothing dropped
+
+    return {
+        "removed_answers": answers,
+        "removed_results": results,
+        "index_version": version.token,
+        "message": f"Invalidated {answers} cached answers and {results} search results",
+    }
+
+
+def at_capacity(rejection: AdmissionRejected) -> HTTPException:
+    """503 telling the client when to retry, for requests that weren't admitted"""
+    return HTTPException(
+        status_code=503,
+        detail={"success": False, "error": str(rejection)},
+        headers={"Retry-After": str(rejection.retry_after)},
+    )
+
+
+class ClientDisconnected(Exception):
+    """Raised when the client of a non-streaming request goes away"""
+
+
+async def run_until_disconnected(
+    request: Request, work: Awaitable[Any], poll_interval: float = 0.5
+) -> Any:
+    """
+    Await work, cancelling it if the client disconnects first.
+    Cancellation reaches the agent run, which stops the model and tool calls.
+    """
+    task = asyncio.ensure_future(work)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=poll_interval)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                raise ClientDisconnected()
+    finally:
+        if not task.done():
+            task.cancel()
+
+
 @app.post("/api/chat")
-async def chat(chat_message: ChatMessage) -> ChatResponse:
+async def chat(
+    chat_message: ChatMessage,
+    request: Request,
+    response: Response,
+    timing: bool = Query(False, description="Return a Server-Timing stage breakdown"),
+) -> ChatResponse:
     """
     Non-streaming chat endpoint with conversation memory support.
     Returns complete response with sources.
     """
+    request_timing = start_request_timing(timing)
     try:
         response_chunks = []
         sources = []
@@ -257,17 +309,38 @@ async def chat(chat_message: ChatMessage) -> ChatResponse:
 
             session_id = f"temp_{uuid.uuid4().hex[:8]}"
 
-        async for chunk in stream_message_for_api(chat_message.message, session_id):
-            if chunk["type"] == "chunk":
-                response_chunks.append(chunk["content"])
-            elif chunk["type"] == "tool_start":
-                # Could collect source information here
-                sources.append(chunk.get("tool", "knowledge_base"))
+        async def collect_response():
+            agent = await warm_up.agent()
+            async for chunk in agent.stream_message_for_api(
+                chat_message.message, session_id, Priority.NON_STREAMING
+            ):
+                if chunk["type"] == "chunk":
+                    response_chunks.append(chunk["content"])
+                elif chunk["type"] == "tool_start":
+                    # Could collect source information here
+                    sources.append(chunk.get("tool", "knowledge_base"))
+
+        await run_until_disconnected(request, collect_response())
 
         response_text = "".join(response_chunks)
 
+        if request_timing is not None:
+            response.headers["Server-Timing"] = request_timing.server_timing()
         return ChatResponse(success=True, response=response_text, sources=sources)
 
+    except ClientDisconnected:
+        # Nobody is listening; 499 is the conventional "client closed request"
+        raise HTTPException(
+            status_code=499,
+            detail={"success": False, "error": "Client disconnected"},
+        )
+    except AdmissionRejected as e:
+        raise at_capacity(e)
+    except SessionBusy as e:
+        raise HTTPException(
+            status_code=409,
+            detail={"success": False, "error": str(e)},
+        )
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -275,125 +348,182 @@ async def chat(chat_message: ChatMessage) -> ChatResponse:
         )
 
 
-@app.post("/api/chat/stream")
-async def chat_stream_post(chat_message: ChatMessage):
+@app.post("/api/chat/batch")
+async def chat_batch(batch: BatchChatRequest):
     """
-    POST version of streaming chat endpoint using Server-Sent Events with conversation memory.
-    Returns real-time streaming response.
+    Answer many questions (QA / regression runs) with bounded concurrency.
+    Streams one NDJSON line per question as it completes, with latency and token usage.
     """
+    if not batch.messages or len(batch.messages) > BATCH_MAX_MESSAGES:
+        raise HTTPException(
+            status_code=400,
+            detail={
+                "success": False,
+                "error": f"Send between 1 and {BATCH_MAX_MESSAGES} messages",
+            },
+        )
+
+    agent = await warm_up.agent()
+
+    async def lines() -> AsyncGenerator[bytes, None]:
+        async with aclosing(
+            agent.stream_batch_for_api(batch.messages, batch.concurrency)
+        ) as results:
+            async for result in results:
+                yield json.dumps(result, ensure_ascii=False).encode("utf-8") + b"\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+async def chat_event_stream(
+    message: str, session_id: Optional[str], encoder: SSEEncoder
+) -> AsyncGenerator[bytes, None]:
+    """
+    Shared SSE event stream for the streaming chat endpoints.
+    Segments model output into word-safe chunks, coalesces them into fewer
+    frames and sends heartbeat comments while the stream is otherwise idle.
+    """
+
+    try:
+        # Use session ID if provided, otherwise create a temporary one
+        if not session_id:
+            import uuid
+
+            session_id = f"temp_{uuid.uuid4().hex[:8]}"
+
+        segmenter = StreamSegmenter()
+        coalescer = ChunkCoalescer(SSE_COALESCE_MS / 1000, SSE_COALESCE_BYTES)
+        last_sent = time.monotonic()
+        completed = False
+        # Stage breakdown, when the request asked for it (?timing=true)
+        timing = current_timing()
+
+        def next_timeout() -> float:
+            # Wake up for whichever comes first: held text or a heartbeat
+            wake_at = last_sent + SSE_HEARTBEAT_SECONDS
+            if coalescer.deadline is not None:
+                wake_at = min(wake_at, coalescer.deadline)
+            return max(wake_at - time.monotonic(), 0)
+
+        agent = await warm_up.agent()
+        events = iterate_with_timeouts(
+            agent.stream_message_for_api(message, session_id), next_timeout
+        )
+        async with aclosing(events):
+            async for chunk in events:
+                now = time.monotonic()
+
+                if completed:
+                    # Keep draining so the run finishes and saves its memory,
+                    # but the client already has the whole answer
+                    continue
+
+                if chunk is TICK:
+                    # Timer fired: send held text, or keep the connection alive
+                    held = coalescer.due(now)
+                    if held:
+                        yield encoder.event("chunk", held)
+                    elif now - last_sent >= SSE_HEARTBEAT_SECONDS:
+                        yield encoder.comment()
+                    else:
+                        continue
+                    last_sent = now
 
-    async def event_stream() -> AsyncGenerator[str, None]:
-        try:
-            # Use session ID if provided, otherwise create a temporary one
-            session_id = chat_message.sessionId
-            if not session_id:
-                import uuid
-
-                session_id = f"temp_{uuid.uuid4().hex[:8]}"
-
-            event_counter = 0
-            text_buffer = ""
-            
-            async for chunk in stream_message_for_api(chat_message.message, session_id):
-                event_counter += 1
-                
                 # Convert to frontend-expected format
-                if chunk["type"] == "chunk":
+                elif chunk["type"] == "chunk":
                     # Smart buffering to prevent word splitting
-                    content = chunk["content"]
-                    
-                    # Get what to flush and what to keep in buffer
-                    flush_content, text_buffer = get_flush_content_and_remainder(text_buffer, content)
-                    
-                    # Send the content that's ready to be flushed
+                    flush_content = segmenter.feed(chunk["content"])
                     if flush_content:
-                        event_data = json.dumps(
-                            {
-                                "type": "chunk",
-                                "content": flush_content,
-                                "timestamp": int(asyncio.get_event_loop().time() * 1000),
-                            }
-                        )
-                        # Proper SSE format with event ID and type
-                        yield f"id: {event_counter}\ndata: {event_data}\n\n"
-                        
+                        coalesced = coalescer.add(flush_content, now)
+                        if coalesced:
+                            yield encoder.event("chunk", coalesced)
+                            last_sent = now
+
                 elif chunk["type"] == "tool_start":
                     # Flush any remaining buffer before tool message
-                    if text_buffer.strip():
-                        event_counter += 1
-                        event_data = json.dumps(
-                            {
-                                "type": "chunk", 
-                                "content": text_buffer,
-                                "timestamp": int(asyncio.get_event_loop().time() * 1000),
-                            }
-                        )
-                        yield f"id: {event_counter}\ndata: {event_data}\n\n"
-                        text_buffer = ""
-                    
-                    event_counter += 1
-                    event_data = json.dumps(
-                        {
-                            "type": "tool",
-                            "content": f"🔍 {chunk.get('message', 'Searching knowledge base...')}",
-                            "timestamp": int(asyncio.get_event_loop().time() * 1000),
-                        }
+                    held = coalescer.drain()
+                    if segmenter.pending.strip():
+                        held += segmenter.drain()
+                    if held:
+                        yield encoder.event("chunk", held)
+
+                    yield encoder.event(
+                        "tool", f"🔍 {chunk.get('message', 'Searching knowledge base...')}"
                     )
-                    yield f"id: {event_counter}\ndata: {event_data}\n\n"
-                    
+                    last_sent = now
+
                 elif chunk["type"] == "complete":
                     # Flush any remaining buffer
-                    if text_buffer.strip():
-                        event_counter += 1
-                        event_data = json.dumps(
-                            {
-                                "type": "chunk",
-                                "content": text_buffer,
-                                "timestamp": int(asyncio.get_event_loop().time() * 1000),
-                            }
-                        )
-                        yield f"id: {event_counter}\ndata: {event_data}\n\n"
-                    
-                    event_counter += 1
-                    event_data = json.dumps(
-                        {
-                            "type": "done",
-                            "content": "Response complete",
-                            "timestamp": int(asyncio.get_event_loop().time() * 1000),
-                        }
-                    )
-                    yield f"id: {event_counter}\ndata: {event_data}\n\n"
-                    break
-
-            # Send final completion event if not already sent
-            completion_event = json.dumps(
-                {
-                    "type": "done",
-                    "content": "Stream completed",
-                    "timestamp": int(asyncio.get_event_loop().time() * 1000),
-                }
-            )
-            yield f"data: {completion_event}\n\n"
-
-        except Exception as e:
-            error_event = json.dumps(
-                {
-                    "type": "error",
-                    "content": str(e),
-                    "timestamp": int(asyncio.get_event_loop().time() * 1000),
-                }
-            )
-            yield f"data: {error_event}\n\n"
-
-    return StreamingResponse(
-        event_stream(),
-        media_type="text/event-stream",
-        headers={
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-            "Access-Control-Allow-Origin": "*",
-            "Access-Control-Allow-Headers": "*",
-        },
+                    held = coalescer.drain()
+                    if segmenter.pending.strip():
+                        held += segmenter.drain()
+                    if held:
+                        yield encoder.event("chunk", held)
+
+                    # Clients stop reading at the first done event
+                    if timing is not None:
+                        yield encoder.event("timing", timing.to_dict())
+                    yield encoder.event("done", "Response complete")
+                    completed = True
+
+        if not completed and timing is not None:
+            yield encoder.event("timing", timing.to_dict())
+
+        # Send final completion event if not already sent
+        yield encoder.event("done", "Stream completed", with_id=False)
+
+    except Exception as e:
+        yield encoder.event("error", str(e), with_id=False)
+
+
+async def open_chat_stream(
+    message: str,
+    session_id: Optional[str],
+    last_event_id: Optional[str],
+    timing: bool = False,
+) -> StreamingResponse:
+    """
+    Start (or resume) a chat stream and return the SSE response for it.
+
+    The agent run writes its frames into a replay buffer from a background
+    task. A reconnect carrying Last-Event-ID for a buffered stream reads the
+    remaining frames from that buffer instead of starting a new run.
+    Agent runs wait for an admission slot inside the stream (portal,
+    answer-cache and shared-run answers don't need one); when the agent is
+    at capacity the stream ends with an error event. With timing, a
+    "timing" event with the stage breakdown is sent just before the first
+    done event.
+    """
+    replay_key = session_id or ""
+
+    resumed = replay_registry.resume(replay_key, last_event_id)
+    if resumed:
+        stream, after_event_id = resumed
+        return sse_response(stream.subscribe(after_event_id))
+
+    # The producer task below inherits the timing context
+    start_request_timing(timing)
+
+    stream = replay_registry.create(replay_key)
+    encoder = SSEEncoder(id_prefix=stream.request_id)
+    stream.producer = asyncio.create_task(
+        stream.record(chat_event_stream(message, session_id, encoder))
+    )
+    return sse_response(stream.subscribe())
+
+
+@app.post("/api/chat/stream")
+async def chat_stream_post(
+    chat_message: ChatMessage,
+    last_event_id: Optional[str] = Header(None, alias="Last-Event-ID"),
+    timing: bool = Query(False, description="Send a timing event before done"),
+):
+    """
+    POST version of streaming chat endpoint using Server-Sent Events with conversation memory.
+    Returns real-time streaming response. Send Last-Event-ID to resume a dropped stream.
+    """
+    return await open_chat_stream(
+        chat_message.message, chat_message.sessionId, last_event_id, timing
     )
 
 
@@ -403,125 +533,15 @@ async def chat_stream_get(
     sessionId: Optional[str] = Query(
         None, description="Optional session ID for conversation memory"
     ),
+    last_event_id: Optional[str] = Header(None, alias="Last-Event-ID"),
+    timing: bool = Query(False, description="Send a timing event before done"),
 ):
     """
     GET version of streaming endpoint for simple frontend integration with conversation memory.
-    Usage: /api/chat/stream?message=Hello&sessionId=123
+    Usage: /api/chat/stream?message=Hello&sessionId=123 (add &timing=true for a stage breakdown)
+    EventSource reconnects send Last-Event-ID automatically and resume the same answer.
     """
-
-    async def event_stream() -> AsyncGenerator[str, None]:
-        try:
-            # Use session ID if provided, otherwise create a temporary one
-            session_id = sessionId
-            if not session_id:
-                import uuid
-
-                session_id = f"temp_{uuid.uuid4().hex[:8]}"
-
-            event_counter = 0
-            text_buffer = ""
-            
-            async for chunk in stream_message_for_api(message, session_id):
-                event_counter += 1
-                
-                # Convert to frontend-expected format
-                if chunk["type"] == "chunk":
-                    # Smart buffering to prevent word splitting
-                    content = chunk["content"]
-                    
-                    # Get what to flush and what to keep in buffer
-                    flush_content, text_buffer = get_flush_content_and_remainder(text_buffer, content)
-                    
-                    # Send the content that's ready to be flushed
-                    if flush_content:
-                        event_data = json.dumps(
-                            {
-                                "type": "chunk",
-                                "content": flush_content,
-                                "timestamp": int(asyncio.get_event_loop().time() * 1000),
-                            }
-                        )
-                        # Proper SSE format with event ID and type
-                        yield f"id: {event_counter}\ndata: {event_data}\n\n"
-                        
-                elif chunk["type"] == "tool_start":
-                    # Flush any remaining buffer before tool message
-                    if text_buffer.strip():
-                        event_counter += 1
-                        event_data = json.dumps(
-                            {
-                                "type": "chunk", 
-                                "content": text_buffer,
-                                "timestamp": int(asyncio.get_event_loop().time() * 1000),
-                            }
-                        )
-                        yield f"id: {event_counter}\ndata: {event_data}\n\n"
-                        text_buffer = ""
-                    
-                    event_counter += 1
-                    event_data = json.dumps(
-                        {
-                            "type": "tool",
-                            "content": f"🔍 {chunk.get('message', 'Searching knowledge base...')}",
-                            "timestamp": int(asyncio.get_event_loop().time() * 1000),
-                        }
-                    )
-                    yield f"id: {event_counter}\ndata: {event_data}\n\n"
-                    
-                elif chunk["type"] == "complete":
-                    # Flush any remaining buffer
-                    if text_buffer.strip():
-                        event_counter += 1
-                        event_data = json.dumps(
-                            {
-                                "type": "chunk",
-                                "content": text_buffer,
-                                "timestamp": int(asyncio.get_event_loop().time() * 1000),
-                            }
-                        )
-                        yield f"id: {event_counter}\ndata: {event_data}\n\n"
-                    
-                    event_counter += 1
-                    event_data = json.dumps(
-                        {
-                            "type": "done",
-                            "content": "Response complete",
-                            "timestamp": int(asyncio.get_event_loop().time() * 1000),
-                        }
-                    )
-                    yield f"id: {event_counter}\ndata: {event_data}\n\n"
-                    break
-
-            # Send final completion event if not already sent
-            completion_event = json.dumps(
-                {
-                    "type": "done",
-                    "content": "Stream completed",
-                    "timestamp": int(asyncio.get_event_loop().time() * 1000),
-                }
-            )
-            yield f"data: {completion_event}\n\n"
-
-        except Exception as e:
-            error_event = json.dumps(
-                {
-                    "type": "error",
-                    "content": str(e),
-                    "timestamp": int(asyncio.get_event_loop().time() * 1000),
-                }
-            )
-            yield f"data: {error_event}\n\n"
-
-    return StreamingResponse(
-        event_stream(),
-        media_type="text/event-stream",
-        headers={
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-            "Access-Control-Allow-Origin": "*",
-            "Access-Control-Allow-Headers": "*",
-        },
-    )
+    return await open_chat_stream(message, sessionId, last_event_id, timing)
 
 
 if __name__ == "__main__":
@@ -542,12 +562,21 @@ if __name__ == "__main__":
     print(f"  - CORS Origins: {cors_origins}")
     print(f"\nAPI Endpoints:")
     print(f"  - GET  /api/health              - Health check")
+    print(f"  - GET  /api/ready               - Readiness (warm-up finished)")
     print(f"  - POST /api/chat                - Non-streaming chat")
     print(f"  - POST /api/chat/stream         - POST streaming chat")
     print(f"  - GET  /api/chat/stream         - GET streaming chat")
     print(f"\nFrontend Integration:")
     print(f"  - Set VITE_API_URL=http://localhost:{port}")
     print(f"  - Frontend should be running on {cors_origins[0]}")
+    from run_python_api import describe_mode, production_mode, server_options
+
+    try:
+        options = server_options(production_mode())
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    print(f"\n{describe_mode(options)}")
     print("\nStarting server...")
 
-    uvicorn.run("api:app", host=host, port=port, reload=True, log_level="info")
+    uvicorn.run("api:app", host=host, port=port, **options)
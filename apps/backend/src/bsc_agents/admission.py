@@ -0,0 +1,224 @@
+"""
+Admission control for agent runs
+Caps concurrent runs per replica and queues the rest by priority, rejecting
+quickly (with a Retry-After hint) when the queue is full.
+"""
+
+import asyncio
+import heapq
+import itertools
+import math
+import os
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import AsyncIterator, List, Optional
+
+try:
+    from .metrics import get_metrics
+except ImportError:
+    from metrics import get_metrics
+
+
+class Priority(IntEnum):
+    """Lower values are admitted first"""
+
+    INTERACTIVE = 0  # Streaming chats with a user watching
+    NON_STREAMING = 1  # /api/chat
+    BATCH = 2  # /api/chat/batch
+
+
+class AdmissionRejected(Exception):
+    """Raised when a run can't be admitted; retry_after is in seconds"""
+
+    def __init__(self, retry_after: int, reason: str = "queue_full"):
+        super().__init__(f"Agent is at capacity ({reason}), retry in {retry_after}s")
+        self.retry_after = retry_after
+        self.reason = reason
+
+
+@dataclass(order=True)
+class _Waiter:
+    priority: int
+    seq: int
+    future: asyncio.Future = field(compare=False)
+    settled: bool = field(default=False, compare=False)
+
+
+class AdmissionController:
+    """
+    Global gate in front of agent runs.
+
+    At most max_concurrent runs hold a slot; up to max_queue more wait for
+    one, highest priority first. When the queue is full, a new request
+    displaces the lowest-priority waiter if it outranks it, otherwise it is
+    rejected.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int = 8,
+        max_queue: int = 32,
+        queue_timeout_seconds: float = 30.0,
+    ):
+        """
+        Initialize the admission controller
+
+        Args:
+            max_concurrent: Agent runs allowed at once on this replica
+            max_queue: Requests allowed to wait for a slot
+            queue_timeout_seconds: Longest a request waits before it is rejected
+        """
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout_seconds = queue_timeout_seconds
+        self.active = 0
+        self.queued = 0
+        self._waiters: List[_Waiter] = []
+        self._seq = itertools.count()
+        self._average_run_seconds = 10.0  # Refined as runs finish
+
+        metrics = get_metrics()
+        self._active_gauge = metrics.gauge("admission_active_runs", "Agent runs holding a slot")
+        self._queue_gauge = metrics.gauge("admission_queue_depth", "Requests waiting for a slot")
+        self._admitted = metrics.counter("admission_admitted_total", "Requests given a slot")
+        self._wait_seconds = metrics.histogram(
+            "admission_wait_seconds", "Time admitted requests spent queued"
+        )
+        self._rejected = metrics.counter(
+            "admission_rejected_total", "Requests turned away because the queue was full"
+        )
+        self._timed_out = metrics.counter(
+            "admission_timed_out_total", "Requests that waited longer than the queue timeout"
+        )
+
+    def retry_after(self) -> int:
+        """Seconds until a slot is likely to be free for a new request"""
+        estimate = self._average_run_seconds * (self.queued + 1) / self.max_concurrent
+        return min(max(math.ceil(estimate), 1), 60)
+
+    async def acquire(
+        self, priority: Priority, timeout: Optional[float] = -1.0
+    ) -> float:
+        """
+        Wait for a run slot.
+
+        Args:
+            priority: Request class, see Priority
+            timeout: Seconds to wait; -1 uses queue_timeout_seconds, None waits forever
+
+        Returns:
+            The admission time, to pass to release()
+
+        Raises:
+            AdmissionRejected: The queue is full, the request was displaced by
+                a higher-priority one, or it waited too long
+        """
+        if self.active < self.max_concurrent and not self.queued:
+            return self._admit(0.0)
+
+        if self.queued >= self.max_queue:
+            victim = max((w for w in self._waiters if not w.settled), default=None)
+            if victim is None or victim.priority <= priority:
+                self._rejected.inc()
+                raise AdmissionRejected(self.retry_after())
+            self._settle(victim)
+            self._rejected.inc()
+            victim.future.set_exception(AdmissionRejected(self.retry_after()))
+
+        waiter = _Waiter(priority, next(self._seq), asyncio.get_running_loop().create_future())
+        heapq.heappush(self._waiters, waiter)
+        self.queued += 1
+        self._queue_gauge.set(self.queued)
+
+        if timeout is not None and timeout < 0:
+            timeout = self.queue_timeout_seconds
+        queued_at = time.monotonic()
+        try:
+            await asyncio.wait_for(waiter.future, timeout)
+        except asyncio.TimeoutError:
+            if self._settle(waiter):
+                self._timed_out.inc()
+                raise AdmissionRejected(self.retry_after(), "timeout")
+            # Handed a slot just as the timeout fired: keep it
+        except asyncio.CancelledError:
+            if not self._settle(waiter) and self._holds_slot(waiter):
+                self.release(time.monotonic())  # Pass the slot on
+            raise
+        return self._admit(time.monotonic() - queued_at, counted=False)
+
+    def release(self, admitted_at: float) -> None:
+        """Give a slot back, handing it to the highest-priority waiter if any"""
+        run_seconds = time.monotonic() - admitted_at
+        self._average_run_seconds = 0.8 * self._average_run_seconds + 0.2 * run_seconds
+
+        while self._waiters:
+            waiter = heapq.heappop(self._waiters)
+            if waiter.future.done():
+                # Timed out or cancelled; its acquire() settles it and raises
+                continue
+            if self._settle(waiter):
+                waiter.future.set_result(None)  # The slot moves to the waiter
+                return
+        self.active -= 1
+        self._active_gauge.set(self.active)
+
+    @asynccontextmanager
+    async def slot(
+        self, priority: Priority, timeout: Optional[float] = -1.0
+    ) -> AsyncIterator[None]:
+        """Hold a run slot for the duration of the block"""
+        admitted_at = await self.acquire(priority, timeout)
+        try:
+            yield
+        finally:
+            self.release(admitted_at)
+
+    def get_stats(self) -> dict:
+        return {
+            "active_runs": self.active,
+            "max_concurrent": self.max_concurrent,
+            "queue_depth": self.queued,
+            "max_queue": self.max_queue,
+            "average_run_seconds": round(self._average_run_seconds, 2),
+        }
+
+    def _admit(self, waited_seconds: float, counted: bool = True) -> float:
+        if counted:
+            # Handed-over slots were already counted by the releasing run
+            self.active += 1
+            self._active_gauge.set(self.active)
+        self._admitted.inc()
+        self._wait_seconds.observe(waited_seconds)
+        return time.monotonic()
+
+    def _settle(self, waiter: _Waiter) -> bool:
+        """Take a waiter out of the queue; False if someone else already did"""
+        if waiter.settled:
+            return False
+        waiter.settled = True
+        if waiter in self._waiters:  # Still in the heap unless release() popped it
+            self._waiters.remove(waiter)
+            heapq.heapify(self._waiters)
+        self.queued -= 1
+        self._queue_gauge.set(self.queued)
+        return True
+
+    @staticmethod
+    def _holds_slot(waiter: _Waiter) -> bool:
+        future = waiter.future
+        return future.done() and not future.cancelled() and future.exception() is None
+
+
+# Global admission controller instance
+admission_controller = AdmissionController(
+    max_concurrent=int(os.getenv("ADMISSION_MAX_CONCURRENT", "8")),
+    max_queue=int(os.getenv("ADMISSION_MAX_QUEUE", "32")),
+    queue_timeout_seconds=float(os.getenv("ADMISSION_QUEUE_TIMEOUT_SECONDS", "30")),
+)
+
+
+def get_admission_controller() -> AdmissionController:
+    """Get the global admission controller"""
+    return admission_controller
@@ -1,12 +1,15 @@
+import asyncio
 import os
 import sys
-import json
-from typing import Dict, List, Any, Optional
+import time
+from contextlib import aclosing, nullcontext
+from typing import AsyncGenerator, Dict, List, Any, Optional, Sequence, Tuple
 from dotenv import load_dotenv
 from openai import AsyncAzureOpenAI
 from agents import (
     set_default_openai_client,
     Agent,
+    ModelSettings,
     OpenAIChatCompletionsModel,
     set_tracing_disabled,
     function_tool,
@@ -15,8 +18,48 @@ from agents import (
 
 # Add current directory to path to import prompt.py and memory
 sys.path.append(os.path.dirname(__file__))
-from prompt import system_message
-from memory import get_memory_manager
+try:
+    # Imported as bsc_agents.agent: share module state (memory, metrics) with the API
+    from .prompt import system_message
+    from .memory import SessionBusy, get_memory_manager
+    from .metrics import get_metrics
+    from .answer_cache import get_answer_cache, normalize_query
+    from .single_flight import get_single_flight
+    from .admission import AdmissionRejected, Priority, get_admission_controller
+    from .timing import mark, record, record_call, timed, timed_call
+    from .retrieval import (
+        get_index_version,
+        get_keyword_client,
+        get_result_cache,
+        get_retrieval_client,
+        reciprocal_rank_fusion,
+    )
+    from .embedding_cache import get_embedding_cache
+    from .packing import get_context_packer
+    from .portals import get_portal_index
+    from .portal_router import get_portal_router
+    from .rerank import get_reranker
+except ImportError:
+    # Run directly as a script (python agent.py)
+    from prompt import system_message
+    from memory import SessionBusy, get_memory_manager
+    from metrics import get_metrics
+    from answer_cache import get_answer_cache, normalize_query
+    from single_flight import get_single_flight
+    from admission import AdmissionRejected, Priority, get_admission_controller
+    from timing import mark, record, record_call, timed, timed_call
+    from retrieval import (
+        get_index_version,
+        get_keyword_client,
+        get_result_cache,
+        get_retrieval_client,
+        reciprocal_rank_fusion,
+    )
+    from embedding_cache import get_embedding_cache
+    from packing import get_context_packer
+    from portals import get_portal_index
+    from portal_router import get_portal_router
+    from rerank import get_reranker
 
 # Disable tracing for Azure OpenAI (avoids API key conflicts)
 set_tracing_disabled(True)
@@ -36,6 +79,51 @@ azure_client = AsyncAzureOpenAI(
 # Set as default client for the Agents SDK
 set_default_openai_client(azure_client)
 
+# Answers are derived from the knowledge base: a new index version makes them stale
+get_index_version().on_change(get_answer_cache().invalidate)
+
+# Pipeline metrics (exposed by the API at /api/metrics)
+metrics = get_metrics()
+time_to_first_token = metrics.histogram(
+    "agent_time_to_first_token_seconds", "Time from run start to the first streamed token"
+)
+stream_duration = metrics.histogram(
+    "agent_stream_duration_seconds", "Time from run start to the end of the stream"
+)
+tokens_per_second = metrics.histogram(
+    "agent_tokens_per_second",
+    "Output tokens per second after the first token",
+    buckets=(5, 10, 20, 40, 60, 80, 100, 150, 200, 300),
+)
+embedding_latency = metrics.histogram(
+    "knowledge_base_embedding_seconds", "Query embedding latency in search_knowledge_base"
+)
+pinecone_query_latency = metrics.histogram(
+    "knowledge_base_query_seconds", "Pinecone query latency in search_knowledge_base"
+)
+keyword_query_latency = metrics.histogram(
+    "knowledge_base_keyword_query_seconds", "BM25 keyword search latency in search_knowledge_base"
+)
+tool_calls_per_run = metrics.histogram(
+    "agent_tool_calls_per_run",
+    "Tool calls made by each completed agent run",
+    buckets=(0, 1, 2, 3, 4, 5, 6, 8, 10),
+)
+portal_lookup_latency = metrics.histogram(
+    "portal_lookup_seconds", "Latency of lookup_portals_and_resources"
+)
+
+
+async def warm_up_embeddings() -> None:
+    """Open the Azure OpenAI connection and load the embedding deployment"""
+    embeddings_deployment = os.getenv(
+        "AZURE_OPENAI_EMBEDDINGS_DEPLOYMENT", "text-embedding-3-large"
+    )
+    # No retries: a failed warm-up is reported, the first real call retries
+    await azure_client.with_options(max_retries=0, timeout=15).embeddings.create(
+        model=embeddings_deployment, input="warm-up"
+    )
+
 
 # Initialize portals and resources lookup function
 @function_tool
@@ -55,91 +143,107 @@ async def lookup_portals_and_resources(
     Returns:
         List of relevant portals with their URLs, descriptions, and key features
     """
-    try:
-        # Load portals data from JSON file
-        portals_file_path = os.path.join(
-            os.path.dirname(__file__), "tools", "portals.json"
-        )
-        
-        with open(portals_file_path, "r", encoding="utf-8") as f:
-            portals_data = json.load(f)
-        
-        # Extract all portals from all categories
-        all_portals = []
-        categories = portals_data.get("portals", {}).get("categories", {})
-        
-        for cat_name, cat_data in categories.items():
-            if category and cat_name != category:
-                continue  # Skip if specific category is requested and this isn't it
-                
-            portals_list = cat_data.get("portals", [])
-            for portal in portals_list:
-                # Add category info to each portal
-                portal_with_category = portal.copy()
-                portal_with_category["category_name"] = cat_name
-                portal_with_category["category_description"] = cat_data.get("description", "")
-                all_portals.append(portal_with_category)
-        
-        # Filter portals based on query if provided
-        if query:
-            query_lower = query.lower()
-            filtered_portals = []
-            
-            for portal in all_portals:
-                # Check if query matches in various fields
-                matches = (
-                    query_lower in portal.get("name", "").lower() or
-                    query_lower in portal.get("purpose", "").lower() or
-                    any(query_lower in keyword.lower() for keyword in portal.get("keywords", [])) or
-                    any(query_lower in alias.lower() for alias in portal.get("aliases", []))
-                )
-                if matches:
-                    filtered_portals.append(portal)
-            
-            all_portals = filtered_portals
+    with timed_call("tool-lookup_portals_and_resources"):
+        started = time.perf_counter()
+        try:
+            # Compiled catalogue: prebuilt results, no file reads or copies per call
+            formatted_results = get_portal_index().lookup(query, category)
         
-        # Format results for the agent
-        formatted_results = []
-        for portal in all_portals:
-            result = {
-                "name": portal.get("name", ""),
-                "url": portal.get("url", ""),
-                "purpose": portal.get("purpose", ""),
-                "category": portal.get("category_name", ""),
-                "users": portal.get("users", []),
-                "keywords": portal.get("keywords", []),
-                "aliases": portal.get("aliases", []),
-                "key_features": portal.get("key_features", [])
-            }
-            formatted_results.append(result)
+            # If no portals found, return helpful message
+            if not formatted_results:
+                return [{
+                    "name": "No portals found",
+                    "url": "https://www.byui.edu",
+                    "purpose": f"No portals match your search criteria. Visit the main BYU-Idaho website for general information.",
+                    "category": "general",
+                    "users": ["anyone"],
+                    "keywords": [],
+                    "aliases": [],
+                    "key_features": ["Access general university information", "Find department contacts"]
+                }]
         
-        # If no portals found, return helpful message
-        if not formatted_results:
+            return formatted_results
+
+        except Exception as e:
+            print(f"❌ Error loading portals data: {e}")
             return [{
-                "name": "No portals found",
-                "url": "https://www.byui.edu",
-                "purpose": f"No portals match your search criteria. Visit the main BYU-Idaho website for general information.",
+                "name": "Error accessing portals",
+                "url": "https://www.byui.edu/contact-us",
+                "purpose": "Error loading portal information. Please contact BYU-Idaho Support Center for assistance.",
                 "category": "general",
                 "users": ["anyone"],
                 "keywords": [],
                 "aliases": [],
-                "key_features": ["Access general university information", "Find department contacts"]
+                "key_features": ["Contact support for assistance"]
             }]
-        
-        return formatted_results
+        finally:
+            portal_lookup_latency.observe(time.perf_counter() - started)
 
-    except Exception as e:
-        print(f"❌ Error loading portals data: {e}")
-        return [{
-            "name": "Error accessing portals",
-            "url": "https://www.byui.edu/contact-us",
-            "purpose": "Error loading portal information. Please contact BYU-Idaho Support Center for assistance.",
-            "category": "general",
-            "users": ["anyone"],
-            "keywords": [],
-            "aliases": [],
-            "key_features": ["Contact support for assistance"]
-        }]
+
+async def retrieve_candidates(
+    query: str, count: int, namespace: str = ""
+) -> List[Tuple[Any, float]]:
+    """
+    Knowledge base matches for query as (match, score) pairs, best first:
+    vector search, fused with keyword search when KB_BM25_INDEX_PATH is set
+
+    Args:
+        query: The search query
+        count: Matches to fetch from each search
+        namespace: Pinecone namespace to search
+    """
+    retrieval = get_retrieval_client()
+    keyword = get_keyword_client()
+    embeddings_deployment = os.getenv(
+        "AZURE_OPENAI_EMBEDDINGS_DEPLOYMENT", "text-embedding-3-large"
+    )
+
+    async def dense_search() -> List[Any]:
+        started = time.perf_counter()
+        embedding_cache = get_embedding_cache()
+        query_embedding = embedding_cache.get(embeddings_deployment, query)
+        if query_embedding is None:
+            embedding_response = await azure_client.embeddings.create(
+                model=embeddings_deployment,  # Your Azure embedding deployment name
+                input=query,
+            )
+            query_embedding = embedding_cache.put(
+                embeddings_deployment, query, embedding_response.data[0].embedding
+            )
+            embedding_latency.observe(time.perf_counter() - started)
+            record("kb-embed", time.perf_counter() - started)
+        else:
+            record("kb-embed", time.perf_counter() - started, "cached")
+
+        # Search Pinecone index
+        started = time.perf_counter()
+        search_results = await retrieval.query(
+            vector=query_embedding.tolist(), top_k=count, namespace=namespace
+        )
+        pinecone_query_latency.observe(time.perf_counter() - started)
+        record("kb-query", time.perf_counter() - started)
+        return search_results.matches  # type: ignore
+
+    async def keyword_search() -> List[Any]:
+        # Exact names and form numbers; a failure here only loses the boost
+        started = time.perf_counter()
+        try:
+            keyword_results = await keyword.query(query, count)
+        except Exception as e:
+            print(f"⚠️  Keyword search failed, using vector results only: {e}")
+            return []
+        keyword_query_latency.observe(time.perf_counter() - started)
+        record("kb-keyword", time.perf_counter() - started)
+        return keyword_results.matches
+
+    # Hybrid search: both run at once (the keyword side needs no embedding).
+    # An index exported from Pinecone holds the default namespace only.
+    if keyword.configured and (not namespace or keyword.source == "local"):
+        dense_matches, keyword_matches = await asyncio.gather(
+            dense_search(), keyword_search()
+        )
+        return reciprocal_rank_fusion([dense_matches, keyword_matches], count)
+    return [(match, float(match.score)) for match in await dense_search()]
 
 
 # Initialize Pinecone knowledge base search function
@@ -153,227 +257,557 @@ async def search_knowledge_base(
 
     Args:
         query: The search query for the knowledge base
-        top_k: Number of results to return (default: 10)
+        top_k: Maximum number of results (default: 10); fewer come back when
+            the rest aren't relevant
         namespace: Pinecone namespace to search (default: "")
 
     Returns:
-        List of relevant documents with their content and metadata
-        Schema: chunk_text, document_title, document_id, document_type, category, 
-                chunk_id, total_chunks, extracted_urls, has_urls, content_length
+        Relevant documents, best first: content (matching passages of the
+        document, in order), source (document title), score, and metadata
+        with document_type, category and extracted_urls
     """
-    try:
-        # Check if Pinecone environment variables are available
-        pinecone_api_key = os.getenv("PINECONE_API_KEY")
-        pinecone_index_name = os.getenv("PINECONE_INDEX_NAME", "bsc-supportagent-v1")
+    with timed_call("tool-search_knowledge_base"):
+        try:
+            retrieval = get_retrieval_client()
+
+            if not retrieval.configured:
+                return [
+                    {
+                        "content": "Knowledge base is not currently available (not configured).",
+                        "source": "system",
+                        "score": 0.0,
+                        "metadata": {
+                            "error": "Missing PINECONE_API_KEY (or KB_LOCAL_INDEX_PATH with KB_BACKEND=local)",
+                            "suggestion": "For information, visit: https://www.byui.edu or contact BYU-Idaho Support Center",
+                        },
+                    }
+                ]
+
+
+            # Create embedding for the query using Azure OpenAI
+            embeddings_deployment = os.getenv(
+                "AZURE_OPENAI_EMBEDDINGS_DEPLOYMENT", "text-embedding-3-large"
+            )
 
-        if not pinecone_api_key:
+            # Same search since the last knowledge base update: skip embedding and query
+            result_cache = get_result_cache()
+            cache_key = result_cache.key(embeddings_deployment, query, top_k, namespace)
+            cached_results = result_cache.get(cache_key)
+            if cached_results is not None:
+                record("kb-query", 0.0, "cached")
+                return cached_results
+
+            # Over-fetch, then keep the candidates that are actually relevant
+            reranker = get_reranker()
+            ranked = await retrieve_candidates(query, reranker.fetch_count(top_k), namespace)
+            with timed("rerank"):
+                ranked = reranker.rerank(query, ranked, top_k)
+
+            # Chunk text once, documents merged, duplicates dropped, within the token budget
+            with timed("pack"):
+                formatted_results = get_context_packer().pack(ranked)
+
+            if not formatted_results:
+                return [
+                    {
+                        "content": f"No relevant information found for '{query}'. Please try rephrasing your question or contact BYU-Idaho Support Center directly.",
+                        "source": "system",
+                        "score": 0.0,
+                        "metadata": {
+                            "suggestion": "Visit https://www.byui.edu for more information"
+                        },
+                    }
+                ]
+
+            result_cache.put(cache_key, formatted_results)
+            return formatted_results
+
+        except Exception as e:
+            print(f"❌ Error searching knowledge base: {e}")
             return [
                 {
-                    "content": "Knowledge base is not currently available (Pinecone not configured).",
+                    "content": f"Error accessing knowledge base. Please contact BYU-Idaho Support Center for assistance.",
                     "source": "system",
                     "score": 0.0,
-                    "metadata": {
-                        "error": "Missing PINECONE_API_KEY",
-                        "suggestion": "For information, visit: https://www.byui.edu or contact BYU-Idaho Support Center",
-                    },
+                    "metadata": {"error": str(e), "contact": "BYU-Idaho Support Center"},
                 }
             ]
 
-        # Import Pinecone client
-        from pinecone import Pinecone
 
-        # Initialize Pinecone
-        pc = Pinecone(api_key=pinecone_api_key)
-        index = pc.Index(pinecone_index_name)
+def build_input_items(
+    conversation_history: List[Dict[str, Any]], message: str
+) -> List[Dict[str, str]]:
+    """
+    The run's input: earlier turns as chat messages, then the new question.
 
-        # Create embedding for the query using Azure OpenAI
-        embeddings_deployment = os.getenv(
-            "AZURE_OPENAI_EMBEDDINGS_DEPLOYMENT", "text-embedding-3-large"
-        )
-        embedding_response = await azure_client.embeddings.create(
-            model=embeddings_deployment,  # Your Azure embedding deployment name
-            input=query,
+    History goes here rather than into the instructions so every request
+    starts with the same system prompt, which the provider can serve from
+    its prompt cache.
+    """
+    items = [
+        {"role": msg["role"], "content": msg.get("content", "")}
+        for msg in conversation_history
+        if msg.get("role") in ("user", "assistant") and msg.get("content")
+    ]
+    items.append({"role": "user", "content": message})
+    return items
+
+
+# One agent and model per deployment, reused by every run
+_agents: Dict[str, Agent] = {}
+
+
+def get_agent(deployment: Optional[str] = None) -> Agent:
+    """The long-lived agent for deployment (default: AZURE_OPENAI_DEPLOYMENT)"""
+    deployment = deployment or os.getenv("AZURE_OPENAI_DEPLOYMENT", "gpt-5")
+    cached_agent = _agents.get(deployment)
+    if cached_agent is None:
+        cached_agent = _agents[deployment] = Agent(
+            name="BSC Support Agent",
+            instructions=system_message,  # Never varies per request: a cacheable prefix
+            model=OpenAIChatCompletionsModel(model=deployment, openai_client=azure_client),
+            # Azure only reports streamed usage (and cached tokens) when asked
+            model_settings=ModelSettings(include_usage=True),
+            tools=[search_knowledge_base, lookup_portals_and_resources],  # Pass the decorated functions directly
         )
+    return cached_agent
 
-        query_embedding = embedding_response.data[0].embedding
 
-        # Search Pinecone index
-        search_results = index.query(
-            vector=query_embedding,
-            top_k=top_k,
-            namespace=namespace,
-            include_metadata=True,
-        )
+# Create default agent
+agent = get_agent()
 
-        # Format results
-        formatted_results = []
-        for match in search_results.matches:  # type: ignore
-            # Get chunk content for content_length calculation
-            chunk_content = match.metadata.get("chunk_text", "No content available")
-            
-            result = {
-                "content": chunk_content,
-                "source": match.metadata.get(
-                    "document_title", "BYU-Idaho Knowledge Base"
-                ),
-                "score": float(match.score),
-                "metadata": {
-                    "chunk_text": chunk_content,                                    # Main text content
-                    "document_title": match.metadata.get("document_title", ""),     # Document title
-                    "document_type": match.metadata.get("document_type", "knowledge_article"),  # Type of document
-                    "category": match.metadata.get("category", "Unknown Category"), # Document category
-                    "extracted_urls": match.metadata.get("extracted_urls", []),    # URLs to show to end-user
-                },
-            }
-            formatted_results.append(result)
-
-        if not formatted_results:
-            return [
-                {
-                    "content": f"No relevant information found for '{query}'. Please try rephrasing your question or contact BYU-Idaho Support Center directly.",
-                    "source": "system",
-                    "score": 0.0,
-                    "metadata": {
-                        "suggestion": "Visit https://www.byui.edu for more information"
-                    },
-                }
-            ]
-
-        return formatted_results
 
+async def embed_for_answer_cache(query: str) -> Optional[Sequence[float]]:
+    """Embed a question for the answer cache; None if the embedding call fails"""
+    embeddings_deployment = os.getenv(
+        "AZURE_OPENAI_EMBEDDINGS_DEPLOYMENT", "text-embedding-3-large"
+    )
+    # A reduced dimension keeps similarity scans cheap; cache keys don't
+    # need the full resolution the knowledge base search uses
+    dimensions = int(os.getenv("ANSWER_CACHE_DIMENSIONS", "256"))
+    model = f"{embeddings_deployment}@{dimensions}"
+    embedding_cache = get_embedding_cache()
+    try:
+        cached = embedding_cache.get(model, query)
+        if cached is not None:
+            return cached
+        embedding_response = await azure_client.embeddings.create(
+            model=embeddings_deployment, input=query, dimensions=dimensions
+        )
+        return embedding_cache.put(model, query, embedding_response.data[0].embedding)
     except Exception as e:
-        print(f"❌ Error searching knowledge base: {e}")
-        return [
-            {
-                "content": f"Error accessing knowledge base. Please contact BYU-Idaho Support Center for assistance.",
-                "source": "system",
-                "score": 0.0,
-                "metadata": {"error": str(e), "contact": "BYU-Idaho Support Center"},
-            }
-        ]
-
-
-def build_conversation_context(conversation_history: List[Dict[str, Any]]) -> str:
-    """Build conversation context string from history"""
-    if not conversation_history:
-        return ""
-
-    context_lines = ["## Previous Conversation Context\n"]
-
-    for msg in conversation_history:
-        role = msg.get("role", "unknown")
-        content = msg.get("content", "")
-        timestamp = msg.get("timestamp", 0)
+        print(f"❌ Error embedding question for answer cache: {e}")
+        return None
+
+
+def merge_chunk_events(events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Join consecutive chunk events so a cached answer is a handful of events"""
+    merged: List[Dict[str, Any]] = []
+    for event in events:
+        if event["type"] == "chunk" and merged and merged[-1]["type"] == "chunk":
+            merged[-1]["content"] += event["content"]
+        else:
+            merged.append(dict(event))
+    return merged
+
+
+async def run_agent_events(
+    message: str,
+    conversation_history: List[Dict[str, Any]],
+    usage: Optional[Dict[str, int]] = None,
+) -> AsyncGenerator[Dict[str, Any], None]:
+    """
+    Run the agent once and yield its API events (no memory bookkeeping)
 
-        if role == "user":
-            context_lines.append(f"**Student Question:** {content}")
-        elif role == "assistant":
-            context_lines.append(f"**Your Previous Response:** {content}")
+    Args:
+        message: The user's question
+        conversation_history: Earlier turns, sent as messages before the question
+        usage: Optional dict filled with the run's token usage when it completes
+    """
+    from openai.types.responses import ResponseTextDeltaEvent
 
-    context_lines.append("\n---\n")
-    context_lines.append(
-        "**Important:** Use this conversation history to provide contextual, personalized responses. Reference previous questions and maintain conversation continuity.\n"
-    )
+    with timed("agent-setup"):
+        result = Runner.run_streamed(
+            get_agent(), build_input_items(conversation_history, message)
+        )
 
-    return "\n".join(context_lines)
-
-
-def create_agent_with_context(
-    conversation_history: Optional[List[Dict[str, Any]]] = None,
-) -> Agent:
-    """Create agent with optional conversation context"""
-    instructions = system_message
-
-    if conversation_history:
-        context = build_conversation_context(conversation_history)
-        instructions = f"{system_message}\n\n{context}"
-
-    return Agent(
-        name="BSC Support Agent",
-        instructions=instructions,
-        model=OpenAIChatCompletionsModel(
-            model=os.getenv(
-                "AZURE_OPENAI_DEPLOYMENT", "gpt-5"
-            ),  # Your Azure deployment name
-            openai_client=azure_client,
-        ),
-        tools=[search_knowledge_base, lookup_portals_and_resources],  # Pass the decorated functions directly
-    )
+    streamed_tokens = 0
+    tool_calls = 0
+    completed = False
+    cancelled = False
+    started = time.perf_counter()
+    first_token_at = None
 
+    model_turn_started = None
 
-# Create default agent (without context)
-agent = create_agent_with_context()
+    try:
+        async for event in result.stream_events():
+            if event.type == "raw_response_event":
+                # One model round-trip per response; tool calls run between them
+                response_event = getattr(event.data, "type", "")
+                if response_event == "response.created":
+                    model_turn_started = time.perf_counter()
+                elif response_event == "response.completed" and model_turn_started is not None:
+                    record_call("model-turn", time.perf_counter() - model_turn_started)
+                    model_turn_started = None
+                # Real-time token streaming
+                if isinstance(event.data, ResponseTextDeltaEvent) and event.data.delta:
+                    if first_token_at is None:
+                        first_token_at = time.perf_counter()
+                        time_to_first_token.observe(first_token_at - started)
+                        mark("first-token")
+                    streamed_tokens += 1
+                    yield {"type": "chunk", "content": event.data.delta}
+            elif event.type == "run_item_stream_event":
+                # Higher-level events (tool calls, completions)
+                if event.item.type == "tool_call_item":
+                    tool_name = getattr(event.item, "name", "knowledge_base_search")
+                    tool_calls += 1
+                    metrics.counter(
+                        "agent_tool_calls_total", "Tool calls by tool", {"tool": tool_name}
+                    ).inc()
+                    if tool_name == "lookup_portals_and_resources":
+                        status_message = "Looking up BYU-Idaho portals and resources...\n\n"
+                    else:
+                        status_message = "Searching BYU-Idaho knowledge base...\n\n"
+                    yield {
+                        "type": "tool_start",
+                        "tool": tool_name,
+                        "message": status_message,
+                    }
+                elif event.item.type == "message_output_item":
+                    yield {"type": "complete", "final_output": "Response complete"}
+            elif event.type == "function_call_event":
+                # Function tool execution events
+                function_name = getattr(event, "function_name", "search_knowledge_base")
+                if function_name == "lookup_portals_and_resources":
+                    status_message = "Looking up portal information..."
+                else:
+                    status_message = "Retrieving information from knowledge base..."
+                yield {
+                    "type": "function_call",
+                    "function": function_name,
+                    "message": status_message,
+                }
+        completed = True
+    except (asyncio.CancelledError, GeneratorExit):
+        # The caller went away (client disconnect): stop the model and any
+        # in-flight tool calls instead of paying for the rest of the answer
+        cancelled = True
+        result.cancel()
+        raise
+    finally:
+        finished_at = time.perf_counter()
+        stream_duration.observe(finished_at - started)
+        if completed and first_token_at is not None and finished_at > first_token_at:
+            tokens_per_second.observe(streamed_tokens / (finished_at - first_token_at))
+        if completed:
+            tool_calls_per_run.observe(tool_calls)
+        if completed or cancelled:
+            record_run_outcome(result, streamed_tokens, cancelled)
+        if completed and usage is not None:
+            run_usage = getattr(getattr(result, "context_wrapper", None), "usage", None)
+            usage.update(
+                requests=getattr(run_usage, "requests", 0),
+                input_tokens=getattr(run_usage, "input_tokens", 0),
+                output_tokens=getattr(run_usage, "output_tokens", 0) or streamed_tokens,
+                total_tokens=getattr(run_usage, "total_tokens", 0),
+                cached_tokens=cached_input_tokens(run_usage),
+            )
 
 
 # Streaming function for API integration with session support
-async def stream_message_for_api(message: str, session_id: Optional[str] = None):
-    """Stream BSC Support Agent response for API integration with conversation memory support"""
-    from openai.types.responses import ResponseTextDeltaEvent
+async def stream_message_for_api(
+    message: str,
+    session_id: Optional[str] = None,
+    priority: Priority = Priority.INTERACTIVE,
+):
+    """
+    Stream BSC Support Agent response for API integration with conversation memory support
 
+    Messages of the same session are answered one at a time (see
+    ConversationMemoryManager.session_turn); SessionBusy is raised when the
+    session's concurrency policy rejects or supersedes this one. Only a new
+    agent run waits for an admission slot at priority; AdmissionRejected is
+    raised when it can't get one.
+    """
+    # "Link to Workday"-style questions: answered from the portal catalogue
+    # before any session wait, history load or admission
+    with timed("portal-route"):
+        route = get_portal_router().route(message)
+    if route.portal is not None:
+        answer = get_portal_router().answer(route.portal)
+        mark("first-token", "portal fast path")
+        yield {"type": "chunk", "content": answer}
+        yield {"type": "complete", "final_output": "Response complete"}
+        if session_id:
+            metadata = {"fast_path": "portal", "confidence": route.confidence}
+            await remember_answer(session_id, message, answer, metadata)
+        return
+
+    turn = get_memory_manager().session_turn(session_id) if session_id else nullcontext()
+    waiting_since = time.perf_counter()
+    async with turn:
+        record("session-wait", time.perf_counter() - waiting_since)
+        async with aclosing(stream_turn(message, session_id, priority)) as events:
+            async for event in events:
+                yield event
+
+
+async def remember_answer(
+    session_id: str, message: str, answer: str, metadata: Dict[str, Any]
+) -> None:
+    """
+    Add a question and its already-sent answer to the session's memory.
+    Only this write waits for the session turn, so it lands between turns.
+    """
+    memory_manager = get_memory_manager()
+    try:
+        async with memory_manager.session_turn(session_id):
+            memory_manager.add_user_message(session_id, message)
+            memory_manager.add_assistant_message(session_id, answer, metadata)
+    except SessionBusy:
+        # The answer is out; a busy or newer turn only costs it its history entry
+        pass
+
+
+async def admitted(
+    events: AsyncGenerator[Dict[str, Any], None], priority: Priority
+) -> AsyncGenerator[Dict[str, Any], None]:
+    """A new agent run's events; the run starts once it holds an admission slot"""
+    queued_at = time.perf_counter()
+    async with get_admission_controller().slot(priority):
+        record("queue", time.perf_counter() - queued_at)
+        async with aclosing(events):
+            async for event in events:
+                yield event
+
+
+async def stream_turn(
+    message: str,
+    session_id: Optional[str] = None,
+    priority: Priority = Priority.INTERACTIVE,
+):
+    """Answer one message, reading and updating the session's memory"""
     memory_manager = get_memory_manager()
     conversation_history = []
 
     # Get conversation context if session_id is provided
     if session_id:
-        # Add user message to memory
-        memory_manager.add_user_message(session_id, message)
+        with timed("history"):
+            # Add user message to memory
+            memory_manager.add_user_message(session_id, message)
 
-        # Get conversation history (excluding the current message)
-        conversation_history = memory_manager.get_conversation_context(
-            session_id, max_messages=8
+            # Get conversation history (excluding the current message)
+            conversation_history = memory_manager.get_conversation_context(
+                session_id, max_messages=8
+            )
+            # Remove the last message (current user message) from context to avoid duplication
+            if conversation_history and conversation_history[-1].get("content") == message:
+                conversation_history = conversation_history[:-1]
+
+    answer_cache = get_answer_cache()
+    single_flight = get_single_flight()
+    flight_key = normalize_query(message)
+    cache_embedding = None
+    started = time.perf_counter()
+
+    # First-turn questions don't depend on the session, so they can join an
+    # identical run already in progress or be answered from the answer cache
+    events = None
+    if not conversation_history:
+        events = single_flight.join(flight_key)
+        if events is not None:
+            metrics.counter(
+                "agent_runs_deduplicated_total",
+                "Requests that shared an identical run already in progress",
+            ).inc()
+
+    if events is None and not conversation_history and answer_cache.enabled:
+        with timed("answer-cache"):
+            get_index_version().current()  # Drops stale answers after a KB update
+            hit = answer_cache.get(message)
+            if hit is None:
+                cache_embedding = await embed_for_answer_cache(message)
+                if cache_embedding is not None:
+                    hit = answer_cache.get(message, cache_embedding)
+
+        if hit is not None:
+            entry, _ = hit
+            mark("first-token", "answer cache")
+            # Same events as a live run, so the SSE path treats it identically
+            for event in entry.events:
+                yield dict(event)
+            answer_cache.record_hit(entry, time.perf_counter() - started)
+            if session_id:
+                memory_manager.add_assistant_message(
+                    session_id, entry.answer, {"cached": True}
+                )
+            return
+        answer_cache.record_miss()
+        # Someone may have started the same run while we were embedding
+        events = single_flight.join(flight_key)
+
+    # Only a new run takes an admission slot: followers of a run in
+    # progress and cache or fast-path answers never wait behind model runs
+    leader = events is None
+    if leader and not conversation_history:
+        events = single_flight.lead(
+            flight_key, admitted(run_agent_events(message, []), priority)
         )
-        # Remove the last message (current user message) from context to avoid duplication
-        if conversation_history and conversation_history[-1].get("content") == message:
-            conversation_history = conversation_history[:-1]
+    elif leader:
+        events = admitted(run_agent_events(message, conversation_history), priority)
+
+    # Store the response for memory
+    response_chunks = []
+    recorded_events: List[Dict[str, Any]] = []
+    completed = False
+    cancelled = False
 
-    # Create agent with conversation context
-    contextual_agent = create_agent_with_context(conversation_history)
+    try:
+        async with aclosing(events):
+            async for event in events:
+                if event["type"] == "chunk":
+                    response_chunks.append(event["content"])
+                recorded_events.append(event)
+                yield event
+        completed = True
+    except (asyncio.CancelledError, GeneratorExit):
+        cancelled = True
+        raise
+    finally:
+        # Save assistant response (partial if cancelled) to memory
+        if session_id and response_chunks and (completed or cancelled):
+            full_response = "".join(response_chunks)
+            memory_manager.add_assistant_message(
+                session_id, full_response, {"cancelled": True} if cancelled else None
+            )
 
-    # Create a runner with the contextual agent
-    result = Runner.run_streamed(contextual_agent, message)
+        if leader and completed and response_chunks and cache_embedding is not None:
+            answer_cache.put(
+                message,
+                cache_embedding,
+                merge_chunk_events(recorded_events),
+                time.perf_counter() - started,
+            )
 
-    # Store the response for memory
+
+# Batch runs (QA and regression workloads) get their own concurrency budget,
+# shared by every batch, so they can't crowd out interactive chats
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "4"))
+batch_slots = asyncio.Semaphore(BATCH_MAX_CONCURRENCY)
+
+
+async def run_batch_item(index: int, message: str) -> Dict[str, Any]:
+    """Answer one batch question with a fresh agent run and no session memory"""
     response_chunks = []
+    sources = []
+    usage: Dict[str, int] = {}
+    started = time.perf_counter()
+    try:
+        async for event in run_agent_events(message, [], usage):
+            if event["type"] == "chunk":
+                response_chunks.append(event["content"])
+            elif event["type"] == "tool_start":
+                sources.append(event.get("tool", "knowledge_base"))
+        item = {
+            "success": True,
+            "response": "".join(response_chunks),
+            "sources": sources,
+        }
+    except Exception as e:
+        item = {"success": False, "error": f"Error processing message: {str(e)}"}
 
-    async for event in result.stream_events():
-        if event.type == "raw_response_event":
-            # Real-time token streaming
-            if isinstance(event.data, ResponseTextDeltaEvent) and event.data.delta:
-                content = event.data.delta
-                response_chunks.append(content)
-                yield {"type": "chunk", "content": content}
-        elif event.type == "run_item_stream_event":
-            # Higher-level events (tool calls, completions)
-            if event.item.type == "tool_call_item":
-                tool_name = getattr(event.item, "name", "knowledge_base_search")
-                if tool_name == "lookup_portals_and_resources":
-                    message = "Looking up BYU-Idaho portals and resources...\n\n"
-                else:
-                    message = "Searching BYU-Idaho knowledge base...\n\n"
-                yield {
-                    "type": "tool_start",
-                    "tool": tool_name,
-                    "message": message,
-                }
-            elif event.item.type == "message_output_item":
-                yield {"type": "complete", "final_output": "Response complete"}
-        elif event.type == "function_call_event":
-            # Function tool execution events
-            function_name = getattr(event, "function_name", "search_knowledge_base")
-            if function_name == "lookup_portals_and_resources":
-                message = "Looking up portal information..."
-            else:
-                message = "Retrieving information from knowledge base..."
-            yield {
-                "type": "function_call",
-                "function": function_name,
-                "message": message,
-            }
-
-    # Save assistant response to memory
-    if session_id and response_chunks:
-        full_response = "".join(response_chunks)
-        memory_manager.add_assistant_message(session_id, full_response)
+    return {
+        "index": index,
+        "message": message,
+        **item,
+        "latency_ms": round((time.perf_counter() - started) * 1000),
+        "usage": usage,
+    }
+
+
+async def stream_batch_for_api(
+    messages: List[str], concurrency: Optional[int] = None
+) -> AsyncGenerator[Dict[str, Any], None]:
+    """
+    Answer a list of questions concurrently, yielding each result as it completes
+
+    Results carry their index in messages since they arrive out of order.
+    At most `concurrency` questions of this batch (capped by
+    BATCH_MAX_CONCURRENCY across all batches) run at once.
+    """
+    concurrency = min(concurrency or BATCH_MAX_CONCURRENCY, BATCH_MAX_CONCURRENCY)
+    own_slots = asyncio.Semaphore(max(concurrency, 1))
+    results: asyncio.Queue = asyncio.Queue()
+
+    admission = get_admission_controller()
+
+    async def run(index: int, message: str) -> None:
+        async with own_slots, batch_slots:
+            # Batch runs also go through admission control at the lowest
+            # priority; when displaced by live traffic they back off and retry
+            while True:
+                try:
+                    admitted_at = await admission.acquire(Priority.BATCH, timeout=None)
+                    break
+                except AdmissionRejected as e:
+                    await asyncio.sleep(e.retry_after)
+            try:
+                results.put_nowait(await run_batch_item(index, message))
+            finally:
+                admission.release(admitted_at)
+
+    tasks = [asyncio.ensure_future(run(i, m)) for i, m in enumerate(messages)]
+    try:
+        for _ in range(len(messages)):
+            yield await results.get()
+    finally:
+        # Stop the remaining runs if the consumer goes away early
+        for task in tasks:
+            task.cancel()
+
+
+def cached_input_tokens(usage: Any) -> int:
+    """Prompt tokens the provider read from its prompt cache (0 if not reported)"""
+    details = getattr(usage, "input_tokens_details", None)
+    return getattr(details, "cached_tokens", 0) or 0
+
+
+def record_run_outcome(result: Any, streamed_tokens: int, cancelled: bool) -> None:
+    """Count completed and cancelled runs, estimating the tokens a cancel saved"""
+    completed_runs = metrics.counter(
+        "agent_runs_completed_total", "Agent runs that streamed to completion"
+    )
+    output_tokens = metrics.counter(
+        "agent_output_tokens_total", "Output tokens generated by completed runs"
+    )
+
+    if not cancelled:
+        usage = getattr(getattr(result, "context_wrapper", None), "usage", None)
+        completed_runs.inc()
+        # Fall back to the delta count when the provider doesn't report usage
+        output_tokens.inc((usage and usage.output_tokens) or streamed_tokens)
+        if usage:
+            metrics.counter(
+                "agent_input_tokens_total", "Prompt tokens sent by completed runs"
+            ).inc(usage.input_tokens)
+            metrics.counter(
+                "agent_cached_input_tokens_total",
+                "Prompt tokens of completed runs served from the provider's prompt cache",
+            ).inc(cached_input_tokens(usage))
+        return
+
+    metrics.counter(
+        "agent_runs_cancelled_total", "Agent runs cancelled because the client disconnected"
+    ).inc()
+    if completed_runs.value:
+        # The rest of an average-length answer was never generated
+        average_tokens = output_tokens.value / completed_runs.value
+        metrics.counter(
+            "agent_tokens_saved_total",
+            "Estimated output tokens not generated thanks to cancellation",
+        ).inc(max(average_tokens - streamed_tokens, 0))
 
 
 # Legacy function for backward compatibility
@@ -0,0 +1,250 @@
+"""
+Semantic answer cache for the BSC Support Agent
+Replays stored answers to first-turn questions that closely match earlier ones.
+"""
+
+import os
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Rough per-entry bookkeeping cost (dataclass, dict slots, event dicts)
+_ENTRY_OVERHEAD_BYTES = 512
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_query(query: str) -> str:
+    """Canonical form used for exact matches ("What is FAFSA?" == "what is fafsa ?")"""
+    return _WHITESPACE.sub(" ", query).strip().lower()
+
+
+def unit_vector(embedding: Sequence[float]) -> np.ndarray:
+    """Scale an embedding to length 1 so cosine similarity is a dot product"""
+    vector = np.asarray(embedding, dtype=np.float32)
+    return vector / (float(np.linalg.norm(vector)) or 1.0)
+
+
+@dataclass
+class CachedAnswer:
+    """A finished agent answer and the events it streamed"""
+
+    query: str
+    embedding: np.ndarray
+    events: List[Dict[str, Any]]
+    generation_seconds: float
+    size_bytes: int
+    created_at: float = field(default_factory=time.time)
+    hits: int = 0
+    row: int = -1  # Row of the owning cache's embedding matrix
+
+    @property
+    def answer(self) -> str:
+        return "".join(e["content"] for e in self.events if e["type"] == "chunk")
+
+
+class AnswerCache:
+    """
+    LRU answer cache with a TTL and a byte budget, looked up by exact query or
+    by cosine similarity of the query embedding.
+
+    Only first-turn questions should be stored or looked up: later turns
+    depend on the conversation, not just the question.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = False,
+        similarity_threshold: float = 0.95,
+        ttl_seconds: float = 86400.0,
+        max_bytes: int = 16 * 1024 * 1024,
+    ):
+        """
+        Initialize the answer cache
+
+        Args:
+            enabled: Whether the agent consults the cache at all
+            similarity_threshold: Minimum cosine similarity for a semantic hit
+            ttl_seconds: Seconds after which a cached answer is considered stale
+            max_bytes: Approximate memory budget; least recently used answers go first
+        """
+        self.enabled = enabled
+        self.similarity_threshold = similarity_threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.entries: "OrderedDict[str, CachedAnswer]" = OrderedDict()
+        # Every entry's unit embedding is a row of _matrix (the first
+        # len(_keys) rows are in use), so a semantic lookup is a single
+        # matrix-vector product; _keys[row] is the entry stored in a row
+        self._matrix = np.empty((0, 0), dtype=np.float32)
+        self._keys: List[str] = []
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.seconds_saved = 0.0
+        self.invalidations = 0
+
+    def get(
+        self, query: str, embedding: Optional[Sequence[float]] = None
+    ) -> Optional[Tuple[CachedAnswer, float]]:
+        """
+        Find a cached answer for a query.
+
+        Without an embedding only an exact (normalized) match is tried, which
+        avoids an embedding request for repeated questions.
+
+        Returns:
+            (entry, similarity) or None
+        """
+        key = normalize_query(query)
+        entry = self.entries.get(key)
+        if entry is not None and not self._expired(entry):
+            self.entries.move_to_end(key)
+            return entry, 1.0
+        if entry is not None:
+            self._remove(key)
+
+        if embedding is None:
+            return None
+
+        vector = unit_vector(embedding)
+        if not self._keys or len(vector) != self._matrix.shape[1]:
+            return None
+        scores = self._matrix[: len(self._keys)] @ vector
+
+        # Best match first; expired answers on the way are dropped (the
+        # others age out of the LRU order)
+        candidates = np.flatnonzero(scores >= self.similarity_threshold)
+        best_key, best_score = None, 0.0
+        expired = []
+        for row in candidates[np.argsort(-scores[candidates], kind="stable")]:
+            candidate_key = self._keys[row]
+            if self._expired(self.entries[candidate_key]):
+                expired.append(candidate_key)
+                continue
+            best_key, best_score = candidate_key, float(scores[row])
+            break
+        for expired_key in expired:
+            self._remove(expired_key)
+
+        if best_key is None:
+            return None
+        self.entries.move_to_end(best_key)
+        return self.entries[best_key], best_score
+
+    def put(
+        self,
+        query: str,
+        embedding: Sequence[float],
+        events: List[Dict[str, Any]],
+        generation_seconds: float,
+    ) -> Optional[CachedAnswer]:
+        """Store a finished answer; returns None if it doesn't fit the budget"""
+        vector = unit_vector(embedding)
+        size = _ENTRY_OVERHEAD_BYTES + vector.nbytes
+        size += sum(len(str(value).encode("utf-8")) for e in events for value in e.values())
+        if size > self.max_bytes:
+            return None
+
+        key = normalize_query(query)
+        if key in self.entries:
+            self._remove(key)
+        entry = CachedAnswer(
+            query=query,
+            embedding=vector,
+            events=events,
+            generation_seconds=generation_seconds,
+            size_bytes=size,
+        )
+        self._add_row(key, entry)
+        self.entries[key] = entry
+        self.total_bytes += size
+
+        while self.total_bytes > self.max_bytes:
+            self._remove(next(iter(self.entries)))
+        return entry
+
+    def record_hit(self, entry: CachedAnswer, replay_seconds: float) -> None:
+        """Count a hit and the generation time it avoided"""
+        entry.hits += 1
+        self.hits += 1
+        self.seconds_saved += max(entry.generation_seconds - replay_seconds, 0.0)
+
+    def record_miss(self) -> None:
+        self.misses += 1
+
+    def invalidate(self) -> int:
+        """Drop every cached answer (e.g. after the knowledge base is re-ingested)"""
+        removed = len(self.entries)
+        self.entries.clear()
+        self._keys = []
+        self.total_bytes = 0
+        self.invalidations += 1
+        return removed
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get statistics about cache usage"""
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self.entries),
+            "total_bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "latency_saved_seconds": round(self.seconds_saved, 2),
+            "similarity_threshold": self.similarity_threshold,
+            "ttl_seconds": self.ttl_seconds,
+            "invalidations": self.invalidations,
+        }
+
+    def _expired(self, entry: CachedAnswer) -> bool:
+        return time.time() - entry.created_at > self.ttl_seconds
+
+    def _add_row(self, key: str, entry: CachedAnswer) -> None:
+        """Store entry's embedding in the next free row, growing the matrix as needed"""
+        rows, dimensions = self._matrix.shape
+        if len(entry.embedding) != dimensions:
+            # A different embedding size (new model or dimensions setting)
+            # can't be compared with what is stored; start over
+            for stale_key in list(self.entries):
+                self._remove(stale_key)
+            rows, dimensions = 0, len(entry.embedding)
+            self._matrix = np.empty((0, dimensions), dtype=np.float32)
+        if len(self._keys) == rows:
+            grown = np.empty((max(16, 2 * rows), dimensions), dtype=np.float32)
+            grown[:rows] = self._matrix
+            self._matrix = grown
+        entry.row = len(self._keys)
+        self._matrix[entry.row] = entry.embedding
+        self._keys.append(key)
+
+    def _remove(self, key: str) -> None:
+        entry = self.entries.pop(key)
+        self.total_bytes -= entry.size_bytes
+        # Move the last row into the freed one to keep the used rows contiguous
+        last_key = self._keys.pop()
+        if last_key != key:
+            moved = self.entries[last_key]
+            self._matrix[entry.row] = self._matrix[moved.row]
+            self._keys[entry.row] = last_key
+            moved.row = entry.row
+
+
+# Global answer cache instance (off unless ANSWER_CACHE_ENABLED=true)
+answer_cache = AnswerCache(
+    enabled=os.getenv("ANSWER_CACHE_ENABLED", "false").lower() == "true",
+    similarity_threshold=float(os.getenv("ANSWER_CACHE_SIMILARITY", "0.95")),
+    ttl_seconds=float(os.getenv("ANSWER_CACHE_TTL_SECONDS", "86400")),
+    max_bytes=int(os.getenv("ANSWER_CACHE_MAX_BYTES", str(16 * 1024 * 1024))),
+)
+
+
+def get_answer_cache() -> AnswerCache:
+    """Get the global answer cache instance"""
+    return answer_cache
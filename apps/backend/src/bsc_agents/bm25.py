@@ -0,0 +1,181 @@
+"""
+BM25 keyword index for the BSC Support Agent
+Finds chunks by exact terms that dense retrieval tends to miss: building and
+portal names, form numbers, course codes ("Kimball Building", "I-Learn",
+"W-4"). Built at ingestion time next to the vector index and searched
+alongside it; the two rankings are merged with reciprocal rank fusion.
+
+Index directory layout:
+    manifest.json    chunk count, vocabulary size, average chunk length, source
+    vocabulary.json  term -> term number
+    postings.npy     row numbers of each term's chunks, grouped by term
+    frequencies.npy  term frequency for each posting
+    term_offsets.npy first posting of each term (terms + 1 entries)
+    lengths.npy      tokens per chunk
+    metadata.jsonl   one {"id", "metadata"} object per row (with offsets.npy)
+"""
+
+import json
+import math
+import os
+import re
+import time
+from collections import Counter
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+
+try:
+    from .local_index import LocalQueryResult, RecordFile, write_records
+except ImportError:
+    from local_index import LocalQueryResult, RecordFile, write_records
+
+_WORD = re.compile(r"[a-z0-9]+(?:[-'./][a-z0-9]+)*")
+
+# Words too common to say anything about a chunk
+STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from how i in is it me my of on or "
+    "the to what when where which who why will with you your".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Lowercase terms of text. Compound words are indexed whole, joined and
+    split, so "I-Learn" matches "i-learn", "ilearn" and "learn".
+    """
+    terms = []
+    for word in _WORD.findall(text.lower()):
+        parts = re.split(r"[-'./]", word)
+        if len(parts) > 1:
+            terms.append(word)
+            terms.append("".join(parts))
+            terms.extend(part for part in parts if part not in STOPWORDS)
+        elif word not in STOPWORDS:
+            terms.append(word)
+    return terms
+
+
+class BM25Index:
+    """
+    Okapi BM25 search over an index directory written by build_bm25_index().
+
+    Postings are memory-mapped like the vector index, so workers share them.
+    A query touches only the postings of its own terms.
+    """
+
+    def __init__(self, path: str, k1: float = 1.2, b: float = 0.75):
+        """
+        Open a keyword index
+
+        Args:
+            path: Index directory
+            k1: Term frequency saturation
+            b: Length normalization (0 = none, 1 = full)
+        """
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        with open(os.path.join(path, "manifest.json"), "r", encoding="utf-8") as f:
+            self.manifest: Dict[str, Any] = json.load(f)
+        with open(os.path.join(path, "vocabulary.json"), "r", encoding="utf-8") as f:
+            self.vocabulary: Dict[str, int] = json.load(f)
+
+        self.postings = np.load(os.path.join(path, "postings.npy"), mmap_mode="r")
+        self.frequencies = np.load(os.path.join(path, "frequencies.npy"), mmap_mode="r")
+        self.term_offsets = np.load(os.path.join(path, "term_offsets.npy"), mmap_mode="r")
+        self.lengths = np.load(os.path.join(path, "lengths.npy"))
+        self.records = RecordFile(path)
+
+        # Per-chunk part of the BM25 denominator, computed once
+        average_length = self.manifest["average_length"] or 1.0
+        self._length_norm = (k1 * (1 - b + b * self.lengths / average_length)).astype(np.float32)
+
+    def __len__(self) -> int:
+        return len(self.lengths)
+
+    def query(self, text: str, top_k: int) -> LocalQueryResult:
+        """The top_k chunks by BM25 score for text (blocking; CPU-bound)"""
+        count = len(self.lengths)
+        scores = np.zeros(count, dtype=np.float32)
+        for term in set(tokenize(text)):
+            number = self.vocabulary.get(term)
+            if number is None:
+                continue
+            start, stop = int(self.term_offsets[number]), int(self.term_offsets[number + 1])
+            rows = self.postings[start:stop]
+            frequency = self.frequencies[start:stop].astype(np.float32)
+            idf = math.log(1 + (count - (stop - start) + 0.5) / (stop - start + 0.5))
+            scores[rows] += idf * frequency * (self.k1 + 1) / (frequency + self._length_norm[rows])
+
+        candidates = np.flatnonzero(scores)
+        top_k = min(top_k, len(candidates))
+        if top_k <= 0:
+            return LocalQueryResult([])
+        best = candidates[np.argpartition(-scores[candidates], top_k - 1)[:top_k]]
+        best = best[np.argsort(-scores[best])]
+        return LocalQueryResult([self.records.match(int(row), float(scores[row])) for row in best])
+
+    def close(self) -> None:
+        self.records.close()
+
+
+def build_bm25_index(
+    path: str, records: Sequence[Dict[str, Any]], source: str = "local"
+) -> Dict[str, Any]:
+    """
+    Write a keyword index directory for BM25Index
+
+    Args:
+        path: Output directory (created if missing)
+        records: {"id": ..., "metadata": {...}} per chunk; metadata["chunk_text"]
+            is indexed (with the document title)
+        source: The vector index holding the same records under the same ids:
+            "local" or "pinecone:<index name>" (checked by KeywordSearchClient)
+
+    Returns:
+        The manifest
+    """
+    os.makedirs(path, exist_ok=True)
+    vocabulary: Dict[str, int] = {}
+    postings: List[List[int]] = []
+    frequencies: List[List[int]] = []
+    lengths = []
+    for row, record in enumerate(records):
+        metadata = record["metadata"]
+        terms = tokenize(f"{metadata.get('document_title', '')}\n{metadata.get('chunk_text', '')}")
+        lengths.append(len(terms))
+        for term, frequency in Counter(terms).items():
+            number = vocabulary.setdefault(term, len(vocabulary))
+            if number == len(postings):
+                postings.append([])
+                frequencies.append([])
+            postings[number].append(row)
+            frequencies[number].append(frequency)
+
+    term_offsets = np.zeros(len(postings) + 1, dtype=np.int64)
+    term_offsets[1:] = np.cumsum([len(rows) for rows in postings])
+    np.save(os.path.join(path, "term_offsets.npy"), term_offsets)
+    np.save(
+        os.path.join(path, "postings.npy"),
+        np.asarray([row for rows in postings for row in rows], dtype=np.int32),
+    )
+    np.save(
+        os.path.join(path, "frequencies.npy"),
+        np.asarray([f for counts in frequencies for f in counts], dtype=np.uint16),
+    )
+    np.save(os.path.join(path, "lengths.npy"), np.asarray(lengths, dtype=np.uint32))
+    with open(os.path.join(path, "vocabulary.json"), "w", encoding="utf-8") as f:
+        json.dump(vocabulary, f, ensure_ascii=False, separators=(",", ":"))
+    write_records(path, records, range(len(records)))
+
+    manifest = {
+        "count": len(records),
+        "terms": len(vocabulary),
+        "average_length": float(np.mean(lengths)) if lengths else 0.0,
+        "built_at": time.time(),
+        "source": source,
+    }
+    with open(os.path.join(path, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
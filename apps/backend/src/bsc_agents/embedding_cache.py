@@ -0,0 +1,215 @@
+"""
+Query embedding cache for the BSC Support Agent
+Reuses embeddings of repeated searches instead of calling the embedding
+deployment again, in memory and optionally in a SQLite file that survives
+restarts and is shared by the workers of a replica.
+"""
+
+import os
+import sqlite3
+import time
+from array import array
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+try:
+    from .answer_cache import normalize_query
+    from .metrics import get_metrics
+except ImportError:
+    from answer_cache import normalize_query
+    from metrics import get_metrics
+
+# Rough per-entry bookkeeping cost (key strings, tuple, dict slot)
+_ENTRY_OVERHEAD_BYTES = 200
+
+CacheKey = Tuple[str, str]
+
+
+class EmbeddingCache:
+    """
+    LRU cache of query embeddings with a TTL and a byte budget.
+
+    Keys are (model, normalized text); model names the deployment plus any
+    option that changes the vector (e.g. reduced dimensions). Vectors are
+    kept as float32 arrays, a quarter of the size of a list of floats.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        ttl_seconds: float = 7 * 86400.0,
+        max_bytes: int = 32 * 1024 * 1024,
+        path: Optional[str] = None,
+    ):
+        """
+        Initialize the embedding cache
+
+        Args:
+            enabled: Whether lookups and stores do anything
+            ttl_seconds: Seconds after which a stored embedding is recomputed
+            max_bytes: Approximate memory budget; least recently used go first
+            path: Optional SQLite file for the persistent tier
+        """
+        self.enabled = enabled
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.path = path
+        self.entries: "OrderedDict[CacheKey, Tuple[array, float]]" = OrderedDict()
+        self.total_bytes = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        metrics = get_metrics()
+        self._memory_hit_counter = metrics.counter(
+            "embedding_cache_hits_total", "Query embeddings served from cache", {"tier": "memory"}
+        )
+        self._disk_hit_counter = metrics.counter(
+            "embedding_cache_hits_total", "Query embeddings served from cache", {"tier": "disk"}
+        )
+        self._miss_counter = metrics.counter(
+            "embedding_cache_misses_total", "Query embeddings computed by the deployment"
+        )
+
+        self._db: Optional[sqlite3.Connection] = None
+        if enabled and path:
+            try:
+                self._db = self._open(path)
+            except sqlite3.Error as e:
+                print(f"⚠️  Embedding cache file {path} unavailable, memory only: {e}")
+
+    def get(self, model: str, text: str) -> Optional[array]:
+        """The cached embedding of text under model, or None (counted as a miss)"""
+        if not self.enabled:
+            return None
+
+        key = (model, normalize_query(text))
+        cached = self.entries.get(key)
+        if cached is not None:
+            vector, stored_at = cached
+            if not self._expired(stored_at):
+                self.entries.move_to_end(key)
+                self.memory_hits += 1
+                self._memory_hit_counter.inc()
+                return vector
+            self._remove(key)
+
+        if self._db is not None:
+            # A primary key lookup in a local file: microseconds, fine inline
+            try:
+                row = self._db.execute(
+                    "SELECT vector, stored_at FROM embeddings WHERE model = ? AND text = ?",
+                    key,
+                ).fetchone()
+            except sqlite3.Error:
+                row = None  # Locked by another worker or unreadable: recompute
+            if row is not None and not self._expired(row[1]):
+                vector = array("f")
+                vector.frombytes(row[0])
+                self._store(key, vector, row[1])
+                self.disk_hits += 1
+                self._disk_hit_counter.inc()
+                return vector
+
+        self.misses += 1
+        self._miss_counter.inc()
+        return None
+
+    def put(self, model: str, text: str, embedding: Sequence[float]) -> array:
+        """Store an embedding and return it as a float32 array"""
+        vector = embedding if isinstance(embedding, array) else array("f", embedding)
+        if not self.enabled:
+            return vector
+
+        key = (model, normalize_query(text))
+        stored_at = time.time()
+        self._store(key, vector, stored_at)
+        if self._db is not None:
+            try:
+                with self._db:
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?, ?)",
+                        (*key, vector.tobytes(), stored_at),
+                    )
+            except sqlite3.Error:
+                pass  # The memory tier still has it
+        return vector
+
+    def clear(self) -> None:
+        """Drop every cached embedding, on disk too"""
+        self.entries.clear()
+        self.total_bytes = 0
+        if self._db is not None:
+            with self._db:
+                self._db.execute("DELETE FROM embeddings")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get statistics about cache usage"""
+        hits = self.memory_hits + self.disk_hits
+        lookups = hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self.entries),
+            "total_bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+            "persistent": self._db is not None,
+            "ttl_seconds": self.ttl_seconds,
+        }
+
+    def _open(self, path: str) -> sqlite3.Connection:
+        db = sqlite3.connect(path, timeout=5.0, check_same_thread=False)
+        # WAL lets several worker processes read while one writes; NORMAL
+        # sync skips an fsync per insert (a lost entry is just recomputed)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        with db:
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "model TEXT, text TEXT, vector BLOB, stored_at REAL, "
+                "PRIMARY KEY (model, text))"
+            )
+            db.execute(
+                "DELETE FROM embeddings WHERE stored_at < ?",
+                (time.time() - self.ttl_seconds,),
+            )
+        # From here on a short busy timeout: waiting on another worker's write
+        # would stall the event loop, skipping the disk tier only costs a recompute
+        db.execute("PRAGMA busy_timeout = 50")
+        return db
+
+    def _store(self, key: CacheKey, vector: array, stored_at: float) -> None:
+        if key in self.entries:
+            self._remove(key)
+        self.entries[key] = (vector, stored_at)
+        self.total_bytes += self._size(key, vector)
+        while self.total_bytes > self.max_bytes and self.entries:
+            self._remove(next(iter(self.entries)))
+
+    def _remove(self, key: CacheKey) -> None:
+        vector, _ = self.entries.pop(key)
+        self.total_bytes -= self._size(key, vector)
+
+    def _expired(self, stored_at: float) -> bool:
+        return time.time() - stored_at > self.ttl_seconds
+
+    @staticmethod
+    def _size(key: CacheKey, vector: array) -> int:
+        return _ENTRY_OVERHEAD_BYTES + len(key[1]) + len(vector) * vector.itemsize
+
+
+# Global embedding cache instance (persistent when EMBEDDING_CACHE_PATH is set)
+embedding_cache = EmbeddingCache(
+    enabled=os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() == "true",
+    ttl_seconds=float(os.getenv("EMBEDDING_CACHE_TTL_SECONDS", str(7 * 86400))),
+    max_bytes=int(os.getenv("EMBEDDING_CACHE_MAX_BYTES", str(32 * 1024 * 1024))),
+    path=os.getenv("EMBEDDING_CACHE_PATH") or None,
+)
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    """Get the global embedding cache instance"""
+    return embedding_cache
@@ -0,0 +1,223 @@
+"""
+Local vector index for the BSC Support Agent
+An in-process alternative to Pinecone (KB_BACKEND=local) for low latency,
+no per-query cost, and offline runs in CI. Vectors and metadata live in
+files that every worker memory-maps, so the workers of a replica share one
+copy through the page cache.
+
+Index directory layout:
+    manifest.json   count, dimension, dtype, embedding model, IVF settings
+    vectors.npy     (count, dimension) unit vectors, float32 or float16
+    metadata.jsonl  one {"id", "metadata"} object per row
+    offsets.npy     byte offset of each metadata row (count + 1 entries)
+    centroids.npy   IVF cluster centroids (only when built with lists)
+    lists.npy       first row of each cluster; rows are stored by cluster
+"""
+
+import json
+import mmap
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+# Rows scored per block; bounds the float32 copy made of float16 vectors
+_BLOCK_ROWS = 8192
+
+
+@dataclass
+class LocalMatch:
+    """One search hit, shaped like a Pinecone match (id, score, metadata)"""
+
+    id: str
+    score: float
+    metadata: Dict[str, Any]
+
+
+@dataclass
+class LocalQueryResult:
+    """Search hits, shaped like a Pinecone query response"""
+
+    matches: List[LocalMatch]
+
+
+class LocalVectorIndex:
+    """
+    Cosine-similarity search over a memory-mapped index directory.
+
+    Without IVF lists every row is scored (exact). With them, only the rows
+    of the nprobe clusters whose centroids are closest to the query are
+    scored, which is approximate but keeps large corpora fast.
+    """
+
+    def __init__(self, path: str, nprobe: int = 8):
+        """
+        Open an index built by build_index()
+
+        Args:
+            path: Index directory
+            nprobe: Clusters searched per query when the index has IVF lists
+        """
+        self.path = path
+        self.nprobe = nprobe
+        with open(os.path.join(path, "manifest.json"), "r", encoding="utf-8") as f:
+            self.manifest: Dict[str, Any] = json.load(f)
+
+        # Read-only maps: pages come from the shared page cache, not process memory
+        self.vectors = np.load(os.path.join(path, "vectors.npy"), mmap_mode="r")
+        self.records = RecordFile(path)
+
+        self.centroids: Optional[np.ndarray] = None
+        self.lists: Optional[np.ndarray] = None
+        if self.manifest.get("ivf_lists"):
+            self.centroids = np.load(os.path.join(path, "centroids.npy"))
+            self.lists = np.load(os.path.join(path, "lists.npy"))
+
+    def __len__(self) -> int:
+        return len(self.vectors)
+
+    @property
+    def model(self) -> str:
+        """Embedding model the vectors were made with; queries must match"""
+        return self.manifest.get("model", "")
+
+    def query(self, vector: Sequence[float], top_k: int) -> LocalQueryResult:
+        """The top_k rows most similar to vector (blocking; CPU-bound)"""
+        query = np.asarray(vector, dtype=np.float32)
+        norm = float(np.linalg.norm(query))
+        if norm:
+            query = query / norm
+
+        if self.centroids is None:
+            rows, scores = self._score_range(query, 0, len(self.vectors))
+        else:
+            probes = np.argsort(self.centroids @ query)[::-1][: self.nprobe]
+            parts = [
+                self._score_range(query, int(self.lists[i]), int(self.lists[i + 1]))
+                for i in probes
+            ]
+            rows = np.concatenate([part[0] for part in parts])
+            scores = np.concatenate([part[1] for part in parts])
+
+        top_k = min(top_k, len(scores))
+        if top_k <= 0:
+            return LocalQueryResult([])
+        best = np.argpartition(-scores, top_k - 1)[:top_k]
+        best = best[np.argsort(-scores[best])]
+        return LocalQueryResult([self.records.match(int(rows[i]), float(scores[i])) for i in best])
+
+    def close(self) -> None:
+        self.records.close()
+
+    def _score_range(self, query: np.ndarray, start: int, stop: int):
+        scores = np.empty(stop - start, dtype=np.float32)
+        for block in range(start, stop, _BLOCK_ROWS):
+            end = min(block + _BLOCK_ROWS, stop)
+            scores[block - start : end - start] = (
+                np.asarray(self.vectors[block:end], dtype=np.float32) @ query
+            )
+        return np.arange(start, stop), scores
+
+
+class RecordFile:
+    """Memory-mapped metadata.jsonl rows, read by row number"""
+
+    def __init__(self, path: str):
+        self.offsets = np.load(os.path.join(path, "offsets.npy"), mmap_mode="r")
+        self._file = open(os.path.join(path, "metadata.jsonl"), "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def match(self, row: int, score: float) -> LocalMatch:
+        record = json.loads(self._map[int(self.offsets[row]) : int(self.offsets[row + 1])])
+        return LocalMatch(id=record["id"], score=score, metadata=record["metadata"])
+
+    def close(self) -> None:
+        self._map.close()
+        self._file.close()
+
+
+def write_records(path: str, records: Sequence[Dict[str, Any]], order: Sequence[int]) -> None:
+    """Write metadata.jsonl and offsets.npy for RecordFile, rows in the given order"""
+    offsets = [0]
+    with open(os.path.join(path, "metadata.jsonl"), "wb") as f:
+        for i in order:
+            line = json.dumps(records[i], ensure_ascii=False).encode("utf-8") + b"\n"
+            f.write(line)
+            offsets.append(offsets[-1] + len(line))
+    np.save(os.path.join(path, "offsets.npy"), np.asarray(offsets, dtype=np.int64))
+
+
+def _kmeans(vectors: np.ndarray, lists: int, iterations: int = 10, seed: int = 0) -> np.ndarray:
+    """Spherical k-means centroids (unit length) for IVF lists"""
+    rng = np.random.default_rng(seed)
+    lists = min(lists, len(vectors))
+    sample = vectors[rng.choice(len(vectors), min(len(vectors), lists * 256), replace=False)]
+    centroids = sample[rng.choice(len(sample), lists, replace=False)].copy()
+    for _ in range(iterations):
+        assignment = np.argmax(sample @ centroids.T, axis=1)
+        for i in range(lists):
+            members = sample[assignment == i]
+            if len(members):
+                centroids[i] = members.sum(axis=0)
+        centroids /= np.linalg.norm(centroids, axis=1, keepdims=True) + 1e-12
+    return centroids
+
+
+def build_index(
+    path: str,
+    vectors: Sequence[Sequence[float]],
+    records: Sequence[Dict[str, Any]],
+    model: str,
+    dtype: str = "float32",
+    ivf_lists: int = 0,
+) -> Dict[str, Any]:
+    """
+    Write an index directory for LocalVectorIndex
+
+    Args:
+        path: Output directory (created if missing)
+        vectors: One embedding per record
+        records: {"id": ..., "metadata": {...}} per vector, with the metadata
+            fields search_knowledge_base returns (chunk_text, document_title, ...)
+        model: Embedding model/deployment the vectors came from
+        dtype: "float32", or "float16" for half the size at slightly lower precision
+        ivf_lists: Number of IVF clusters; 0 builds an exact index
+
+    Returns:
+        The manifest
+    """
+    if len(vectors) != len(records):
+        raise ValueError("Need exactly one record per vector")
+    matrix = np.asarray(vectors, dtype=np.float32)
+    matrix /= np.linalg.norm(matrix, axis=1, keepdims=True) + 1e-12
+    order = np.arange(len(matrix))
+
+    os.makedirs(path, exist_ok=True)
+    ivf_lists = min(ivf_lists, len(matrix))
+    if ivf_lists:
+        centroids = _kmeans(matrix, ivf_lists)
+        assignment = np.argmax(matrix @ centroids.T, axis=1)
+        order = np.argsort(assignment, kind="stable")
+        counts = np.bincount(assignment, minlength=ivf_lists)
+        np.save(os.path.join(path, "centroids.npy"), centroids)
+        np.save(os.path.join(path, "lists.npy"), np.concatenate([[0], np.cumsum(counts)]))
+
+    np.save(os.path.join(path, "vectors.npy"), matrix[order].astype(dtype))
+    write_records(path, records, order)
+
+    manifest = {
+        "count": len(matrix),
+        "dimension": int(matrix.shape[1]) if len(matrix) else 0,
+        "dtype": dtype,
+        "model": model,
+        "ivf_lists": ivf_lists,
+        "built_at": time.time(),
+    }
+    with open(os.path.join(path, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
@@ -4,8 +4,10 @@ Provides conversation context and short-term memory for multi-turn conversations
 """
 
 import asyncio
+import os
 import time
-from typing import Dict, List, Optional, Any
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Optional, Any
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta
 
@@ -29,6 +31,19 @@ class ConversationMessage:
         }
 
 
+@dataclass
+class MemoryTotals:
+    """Running totals over all sessions of a manager, kept current on every change"""
+
+    sessions: int = 0
+    messages: int = 0
+    messages_by_role: Dict[str, int] = field(default_factory=dict)
+
+    def add(self, role: str, count: int = 1) -> None:
+        self.messages += count
+        self.messages_by_role[role] = self.messages_by_role.get(role, 0) + count
+
+
 @dataclass
 class ConversationSession:
     """Represents a conversation session with memory"""
@@ -38,6 +53,9 @@ class ConversationSession:
     created_at: float = field(default_factory=time.time)
     last_activity: float = field(default_factory=time.time)
     metadata: Dict[str, Any] = field(default_factory=dict)
+    role_counts: Dict[str, int] = field(default_factory=dict)
+    # Totals of the owning manager, if any; updated along with role_counts
+    totals: Optional[MemoryTotals] = field(default=None, repr=False, compare=False)
 
     def add_message(
         self, role: str, content: str, metadata: Optional[Dict[str, Any]] = None
@@ -47,6 +65,9 @@ class ConversationSession:
             role=role, content=content, metadata=metadata or {}
         )
         self.messages.append(message)
+        self.role_counts[role] = self.role_counts.get(role, 0) + 1
+        if self.totals is not None:
+            self.totals.add(role)
         self.last_activity = time.time()
 
     def get_conversation_history(
@@ -65,8 +86,8 @@ class ConversationSession:
             return "No previous conversation history."
 
         total_messages = len(self.messages)
-        user_messages = [msg for msg in self.messages if msg.role == "user"]
-        assistant_messages = [msg for msg in self.messages if msg.role == "assistant"]
+        user_messages = self.role_counts.get("user", 0)
+        assistant_messages = self.role_counts.get("assistant", 0)
 
         duration = time.time() - self.created_at
         duration_str = (
@@ -75,7 +96,7 @@ class ConversationSession:
             else f"{int(duration)}s"
         )
 
-        return f"Conversation context: {total_messages} total messages ({len(user_messages)} from user, {len(assistant_messages)} responses), session duration: {duration_str}"
+        return f"Conversation context: {total_messages} total messages ({user_messages} from user, {assistant_messages} responses), session duration: {duration_str}"
 
     def is_expired(self, max_age_hours: float = 2.0) -> bool:
         """Check if session has expired based on last activity"""
@@ -83,22 +104,67 @@ class ConversationSession:
         return (time.time() - self.last_activity) > max_age_seconds
 
 
+# What to do when a message arrives while the session is still answering another
+CONCURRENCY_POLICIES = ("queue", "reject", "supersede")
+
+
+class SessionBusy(Exception):
+    """Raised when a session turn is rejected or replaced by a newer message"""
+
+    def __init__(self, session_id: str, reason: str):
+        super().__init__(
+            "Session is already answering a message"
+            if reason == "busy"
+            else "Superseded by a newer message in the same session"
+        )
+        self.session_id = session_id
+        self.reason = reason
+
+
+@dataclass
+class SessionTurns:
+    """Serializes the turns of one session; dropped when nobody holds or waits"""
+
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    holder: Optional[asyncio.Task] = None
+    inside: bool = False  # The holder is still inside its turn
+    superseded: Optional[asyncio.Task] = None
+    latest: int = 0  # Ticket of the newest turn to arrive
+    users: int = 0  # Holder plus waiters
+
+
 class ConversationMemoryManager:
     """
     Manages conversation sessions and provides memory functionality for the BSC Support Agent
     """
 
-    def __init__(self, max_sessions: int = 1000, session_timeout_hours: float = 2.0):
+    def __init__(
+        self,
+        max_sessions: int = 1000,
+        session_timeout_hours: float = 2.0,
+        concurrency_policy: str = "queue",
+    ):
         """
         Initialize the memory manager
 
         Args:
             max_sessions: Maximum number of sessions to keep in memory
             session_timeout_hours: Hours after which inactive sessions expire
+            concurrency_policy: For a message arriving while the session is busy,
+                "queue" (wait for the current turn), "reject" (raise SessionBusy)
+                or "supersede" (cancel the current turn)
         """
+        if concurrency_policy not in CONCURRENCY_POLICIES:
+            raise ValueError(f"concurrency_policy must be one of {CONCURRENCY_POLICIES}")
+
+        # Insertion order is creation order, so the first and last entries are
+        # the oldest and newest sessions
         self.sessions: Dict[str, ConversationSession] = {}
+        self.totals = MemoryTotals()
         self.max_sessions = max_sessions
         self.session_timeout_hours = session_timeout_hours
+        self.concurrency_policy = concurrency_policy
+        self._turns: Dict[str, SessionTurns] = {}
         self._cleanup_task: Optional[asyncio.Task] = None
 
         # Start cleanup task
@@ -113,16 +179,22 @@ class ConversationMemoryManager:
                 self.cleanup_expired_sessions()
 
         try:
-            loop = asyncio.get_event_loop()
+            loop = asyncio.get_running_loop()
             self._cleanup_task = loop.create_task(cleanup_loop())
         except RuntimeError:
-            # No event loop running yet, cleanup will be manual
+            # No event loop running yet (e.g. imported by the launcher before
+            # the server starts its loop); retried when sessions are created
             pass
 
     def get_or_create_session(self, session_id: str) -> ConversationSession:
         """Get existing session or create a new one"""
         if session_id not in self.sessions:
-            self.sessions[session_id] = ConversationSession(session_id=session_id)
+            if self._cleanup_task is None:
+                self._start_cleanup_task()
+            self.sessions[session_id] = ConversationSession(
+                session_id=session_id, totals=self.totals
+            )
+            self.totals.sessions += 1
 
             # Cleanup if we have too many sessions
             if len(self.sessions) > self.max_sessions:
@@ -137,7 +209,7 @@ class ConversationMemoryManager:
                         : len(self.sessions) - self.max_sessions + 1
                     ]
                     for session_id_to_remove, _ in sessions_to_remove:
-                        del self.sessions[session_id_to_remove]
+                        self._remove_session(session_id_to_remove)
 
         return self.sessions[session_id]
 
@@ -155,6 +227,68 @@ class ConversationMemoryManager:
         session.add_message("assistant", message, metadata)
         return session
 
+    @asynccontextmanager
+    async def session_turn(self, session_id: str) -> AsyncIterator[None]:
+        """
+        Hold the session for one question/answer turn.
+
+        Turns of the same session run one at a time, so each one sees the
+        previous answer in its history. Entries live only while a turn
+        holds or waits for them, independent of session expiry.
+
+        Raises:
+            SessionBusy: The turn was rejected, or superseded by a newer one
+        """
+        turns = self._turns.get(session_id)
+        if turns is None:
+            turns = self._turns[session_id] = SessionTurns()
+
+        if turns.lock.locked():
+            if self.concurrency_policy == "reject":
+                raise SessionBusy(session_id, "busy")
+            if (
+                self.concurrency_policy == "supersede"
+                and turns.inside
+                and turns.holder is not None
+                and turns.superseded is not turns.holder
+            ):
+                turns.superseded = turns.holder
+                turns.holder.cancel()
+
+        turns.latest += 1
+        ticket = turns.latest
+        turns.users += 1
+        try:
+            async with turns.lock:
+                if self.concurrency_policy == "supersede" and turns.latest != ticket:
+                    # A newer message arrived while this one was waiting
+                    raise SessionBusy(session_id, "superseded")
+
+                turns.holder = asyncio.current_task()
+                turns.inside = True
+                try:
+                    yield
+                except asyncio.CancelledError:
+                    if turns.superseded is not None and turns.superseded is turns.holder:
+                        # Our own cancellation, not a client disconnect
+                        turns.superseded = None
+                        turns.holder.uncancel()
+                        raise SessionBusy(session_id, "superseded")
+                    raise
+                finally:
+                    turns.inside = False
+                    if turns.superseded is not None and turns.superseded is turns.holder:
+                        # The turn ended normally although it was superseded (the
+                        # cancel was swallowed inside it): withdraw the request
+                        # so the task isn't left marked as cancelling
+                        turns.superseded = None
+                        turns.holder.uncancel()
+                    turns.holder = None
+        finally:
+            turns.users -= 1
+            if not turns.users:
+                del self._turns[session_id]
+
     def get_conversation_context(
         self, session_id: str, max_messages: Optional[int] = 10
     ) -> List[Dict[str, Any]]:
@@ -175,7 +309,7 @@ class ConversationMemoryManager:
     def clear_session(self, session_id: str) -> bool:
         """Clear a specific session"""
         if session_id in self.sessions:
-            del self.sessions[session_id]
+            self._remove_session(session_id)
             return True
         return False
 
@@ -188,27 +322,34 @@ class ConversationMemoryManager:
         ]
 
         for session_id in expired_sessions:
-            del self.sessions[session_id]
+            self._remove_session(session_id)
 
         return len(expired_sessions)
 
+    def _remove_session(self, session_id: str) -> None:
+        """Drop a session and take its messages out of the running totals"""
+        session = self.sessions.pop(session_id)
+        session.totals = None
+        self.totals.sessions -= 1
+        for role, count in session.role_counts.items():
+            self.totals.add(role, -count)
+
     def get_active_sessions_count(self) -> int:
         """Get count of active sessions"""
         return len(self.sessions)
 
     def get_session_stats(self) -> Dict[str, Any]:
-        """Get statistics about memory usage"""
-        total_sessions = len(self.sessions)
-        total_messages = sum(
-            len(session.messages) for session in self.sessions.values()
-        )
+        """Get statistics about memory usage (constant time, from running totals)"""
+        total_sessions = self.totals.sessions
+        total_messages = self.totals.messages
 
         if self.sessions:
+            now = time.time()
             avg_messages = total_messages / total_sessions
-            oldest_session = min(self.sessions.values(), key=lambda s: s.created_at)
-            newest_session = max(self.sessions.values(), key=lambda s: s.created_at)
-            oldest_age = time.time() - oldest_session.created_at
-            newest_age = time.time() - newest_session.created_at
+            oldest_session = self.sessions[next(iter(self.sessions))]
+            newest_session = self.sessions[next(reversed(self.sessions))]
+            oldest_age = now - oldest_session.created_at
+            newest_age = now - newest_session.created_at
         else:
             avg_messages = 0
             oldest_age = 0
@@ -217,16 +358,57 @@ class ConversationMemoryManager:
         return {
             "total_sessions": total_sessions,
             "total_messages": total_messages,
+            "user_messages": self.totals.messages_by_role.get("user", 0),
+            "assistant_messages": self.totals.messages_by_role.get("assistant", 0),
             "average_messages_per_session": round(avg_messages, 1),
             "oldest_session_age_seconds": round(oldest_age, 1),
             "newest_session_age_seconds": round(newest_age, 1),
             "max_sessions": self.max_sessions,
             "session_timeout_hours": self.session_timeout_hours,
+            "concurrency_policy": self.concurrency_policy,
+            "busy_sessions": len(self._turns),
         }
 
 
+def allows_split_across_workers() -> bool:
+    """Whether each worker process may keep its own, separate session memory"""
+    return os.getenv("SESSION_MEMORY_PER_WORKER", "false").lower() == "true"
+
+
+def check_worker_count(workers: int) -> Optional[str]:
+    """
+    Check that session memory survives running this many worker processes.
+
+    Sessions live in the memory of one process and there is no shared
+    backend yet, so with several workers a conversation's turns land on
+    workers that don't know its history.
+
+    Returns:
+        A warning to show at startup, or None when nothing is split
+
+    Raises:
+        RuntimeError: More than one worker, and SESSION_MEMORY_PER_WORKER
+            doesn't accept per-worker sessions
+    """
+    if workers <= 1:
+        return None
+    if not allows_split_across_workers():
+        raise RuntimeError(
+            f"Conversation memory is kept in-process and would be split across "
+            f"{workers} workers, so follow-up messages would lose their history. "
+            "Run one worker (WEB_CONCURRENCY=1) or set SESSION_MEMORY_PER_WORKER=true "
+            "to accept per-worker sessions."
+        )
+    return (
+        f"Conversation memory is per worker ({workers} workers): follow-up "
+        "messages only see their history when they reach the same worker"
+    )
+
+
 # Global memory manager instance
-memory_manager = ConversationMemoryManager()
+memory_manager = ConversationMemoryManager(
+    concurrency_policy=os.getenv("SESSION_CONCURRENCY_POLICY", "queue"),
+)
 
 
 def get_memory_manager() -> ConversationMemoryManager:
@@ -0,0 +1,199 @@
+"""
+Runtime metrics for the BSC Support Agent
+In-process counters, gauges and histograms shared by the agent pipeline and
+the API, rendered in the Prometheus text exposition format.
+"""
+
+import math
+from bisect import bisect_left
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+# Latency buckets in seconds, from fast in-process steps to slow LLM runs
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+# Label sets kept per metric; later ones are folded into "other" so a
+# misbehaving label value (e.g. a hallucinated tool name) can't grow memory
+MAX_LABEL_SETS = 100
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+class Counter:
+    """A monotonically increasing value"""
+
+    def __init__(self, name: str, description: str):
+        self.name = name
+        self.description = description
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        """Increase the counter"""
+        self.value += amount
+
+
+class Gauge:
+    """A value that can go up and down (queue depth, active runs)"""
+
+    def __init__(self, name: str, description: str):
+        self.name = name
+        self.description = description
+        self.value = 0.0
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+class Histogram:
+    """
+    Distribution of observed values in fixed buckets.
+
+    Memory is constant: one count per bucket plus the sum and count.
+    """
+
+    def __init__(self, name: str, description: str, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.description = description
+        self.buckets = tuple(sorted(buckets))
+        self.bucket_counts = [0] * (len(self.buckets) + 1)  # Last one is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        """Record one value"""
+        self.bucket_counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    @property
+    def value(self) -> float:
+        """Mean of the observed values (for snapshots)"""
+        return self.sum / self.count if self.count else 0.0
+
+
+Metric = Union[Counter, Gauge, Histogram]
+
+
+class _Family:
+    """All label sets of one metric name"""
+
+    def __init__(self, kind: str, description: str):
+        self.kind = kind
+        self.description = description
+        self.children: Dict[LabelKey, Metric] = {}
+
+
+class MetricsRegistry:
+    """
+    Holds every metric by name so any module can record without extra wiring
+
+    Lookups are a dict access; hot paths should still keep the returned
+    metric object rather than looking it up for every event.
+    """
+
+    def __init__(self):
+        self._families: Dict[str, _Family] = {}
+
+    def counter(
+        self, name: str, description: str = "", labels: Optional[Dict[str, str]] = None
+    ) -> Counter:
+        """Get or create a counter"""
+        return self._get(name, "counter", description, labels, Counter)
+
+    def gauge(
+        self, name: str, description: str = "", labels: Optional[Dict[str, str]] = None
+    ) -> Gauge:
+        """Get or create a gauge"""
+        return self._get(name, "gauge", description, labels, Gauge)
+
+    def histogram(
+        self,
+        name: str,
+        description: str = "",
+        labels: Optional[Dict[str, str]] = None,
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        """Get or create a histogram"""
+        return self._get(
+            name, "histogram", description, labels, lambda n, d: Histogram(n, d, buckets)
+        )
+
+    def snapshot(self) -> Dict[str, float]:
+        """Current value of every metric (histograms report their mean)"""
+        return {
+            name + _format_labels(key): metric.value
+            for name, family in self._families.items()
+            for key, metric in family.children.items()
+        }
+
+    def render_prometheus(self) -> str:
+        """Every metric in the Prometheus text exposition format (version 0.0.4)"""
+        lines: List[str] = []
+        for name, family in sorted(self._families.items()):
+            if family.description:
+                lines.append(f"# HELP {name} {_escape_help(family.description)}")
+            lines.append(f"# TYPE {name} {family.kind}")
+            for key, metric in family.children.items():
+                if isinstance(metric, Histogram):
+                    cumulative = 0
+                    bounds = [*map(_format_value, metric.buckets), "+Inf"]
+                    for bound, count in zip(bounds, metric.bucket_counts):
+                        cumulative += count
+                        labels = _format_labels(key + (("le", bound),))
+                        lines.append(f"{name}_bucket{labels} {cumulative}")
+                    labels = _format_labels(key)
+                    lines.append(f"{name}_sum{labels} {_format_value(metric.sum)}")
+                    lines.append(f"{name}_count{labels} {metric.count}")
+                else:
+                    lines.append(f"{name}{_format_labels(key)} {_format_value(metric.value)}")
+        return "\n".join(lines) + "\n"
+
+    def _get(self, name, kind, description, labels, factory) -> Metric:
+        family = self._families.get(name)
+        if family is None:
+            family = self._families[name] = _Family(kind, description)
+        elif family.kind != kind:
+            raise ValueError(f"Metric {name} is a {family.kind}, not a {kind}")
+
+        key: LabelKey = tuple(sorted(labels.items())) if labels else ()
+        metric = family.children.get(key)
+        if metric is None:
+            if len(family.children) >= MAX_LABEL_SETS:
+                key = tuple((label, "other") for label, _ in key)
+                metric = family.children.get(key)
+            if metric is None:
+                metric = family.children[key] = factory(name, description)
+        return metric
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if math.isnan(value):
+        return "NaN"
+    if value == int(value):
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(key: LabelKey) -> str:
+    if not key:
+        return ""
+    pairs = ",".join(f'{label}="{_escape_label(value)}"' for label, value in key)
+    return "{" + pairs + "}"
+
+
+def _escape_label(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _escape_help(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("\n", "\\n")
+
+
+# Global metrics registry instance
+metrics = MetricsRegistry()
+
+
+def get_metrics() -> MetricsRegistry:
+    """Get the global metrics registry"""
+    return metrics
@@ -0,0 +1,206 @@
+"""
+Context packing for knowledge base results
+Shrinks what search_knowledge_base hands back to the model: chunk text once
+instead of twice, chunks of one document merged in order, near-duplicate
+pages dropped, and the whole answer capped at a token budget. Fewer tool
+output tokens means the model starts its next response sooner and costs less.
+"""
+
+import math
+import os
+import re
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+try:
+    from .metrics import get_metrics
+except ImportError:
+    from metrics import get_metrics
+
+# Rough characters per token for English text; good enough for budgeting
+CHARS_PER_TOKEN = 4
+
+# A truncated document shorter than this isn't worth the model's attention
+_MIN_TRUNCATED_TOKENS = 60
+
+_TOKEN_BUCKETS = (250, 500, 1000, 1500, 2000, 3000, 4000, 6000, 8000, 12000)
+
+RankedMatch = Tuple[Any, float]
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count of text"""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def format_matches(ranked: Sequence[RankedMatch]) -> List[Dict[str, Any]]:
+    """One result per match, with the full metadata (the unpacked format)"""
+    formatted_results = []
+    for match, score in ranked:
+        chunk_content = match.metadata.get("chunk_text", "No content available")
+        formatted_results.append(
+            {
+                "content": chunk_content,
+                "source": match.metadata.get("document_title", "BYU-Idaho Knowledge Base"),
+                "score": score,
+                "metadata": {
+                    "chunk_text": chunk_content,
+                    "document_title": match.metadata.get("document_title", ""),
+                    "document_type": match.metadata.get("document_type", "knowledge_article"),
+                    "category": match.metadata.get("category", "Unknown Category"),
+                    "extracted_urls": match.metadata.get("extracted_urls", []),
+                },
+            }
+        )
+    return formatted_results
+
+
+class ContextPacker:
+    """
+    Turns ranked matches into tool output that fits a token budget.
+
+    Documents keep the rank of their best chunk. When the budget runs out
+    the last document that fits partly is truncated and the rest dropped.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        token_budget: int = 2500,
+        duplicate_threshold: float = 0.8,
+    ):
+        """
+        Initialize the packer
+
+        Args:
+            enabled: When False, results are returned one per match, unpacked
+            token_budget: Approximate tokens of tool output per search
+            duplicate_threshold: Word-trigram overlap (Jaccard) at which a
+                chunk counts as a copy of a better-ranked one
+        """
+        self.enabled = enabled
+        self.token_budget = token_budget
+        self.duplicate_threshold = duplicate_threshold
+
+        metrics = get_metrics()
+        description = "Estimated tokens of search_knowledge_base output per call"
+        self._raw_tokens = metrics.histogram(
+            "knowledge_base_tool_output_tokens", description, {"stage": "raw"}, _TOKEN_BUCKETS
+        )
+        self._packed_tokens = metrics.histogram(
+            "knowledge_base_tool_output_tokens", description, {"stage": "packed"}, _TOKEN_BUCKETS
+        )
+        self._duplicates = metrics.counter(
+            "knowledge_base_duplicate_chunks_total", "Near-duplicate chunks dropped by packing"
+        )
+
+    def pack(self, ranked: Sequence[RankedMatch]) -> List[Dict[str, Any]]:
+        """Tool output for ranked (match, score) pairs, best first"""
+        unpacked = format_matches(ranked)
+        self._raw_tokens.observe(_output_tokens(unpacked))
+        if not self.enabled:
+            return unpacked
+
+        # Group by document in rank order, skipping copies of earlier chunks
+        documents: Dict[str, List[Tuple[int, Any, float]]] = {}
+        kept: List[Set[Tuple[str, ...]]] = []
+        for rank, (match, score) in enumerate(ranked):
+            text = (match.metadata.get("chunk_text") or "").strip()
+            if not text:
+                continue
+            shingles = _shingles(text)
+            if any(_jaccard(shingles, other) >= self.duplicate_threshold for other in kept):
+                self._duplicates.inc()
+                continue
+            kept.append(shingles)
+            document = str(
+                match.metadata.get("document_id") or match.metadata.get("document_title") or match.id
+            )
+            documents.setdefault(document, []).append((rank, match, score))
+
+        results: List[Dict[str, Any]] = []
+        remaining = self.token_budget - 1  # The list's brackets
+        for chunks in documents.values():
+            result = _merge(chunks)
+            cost = _output_tokens(result) + 1  # Plus the separator
+            if cost > remaining:
+                room = remaining - (cost - estimate_tokens(result["content"])) - 1
+                if results and room < _MIN_TRUNCATED_TOKENS:
+                    break
+                # Always return something, even if the best document alone is too long
+                room = max(room, _MIN_TRUNCATED_TOKENS)
+                result["content"] = result["content"][: room * CHARS_PER_TOKEN - 2].rstrip() + " …"
+                results.append(result)
+                break
+            results.append(result)
+            remaining -= cost
+
+        self._packed_tokens.observe(_output_tokens(results))
+        return results
+
+
+def _merge(chunks: List[Tuple[int, Any, float]]) -> Dict[str, Any]:
+    """One result for a document's chunks: text in chunk order, best score"""
+    best = chunks[0][1].metadata
+    ordered = sorted(chunks, key=lambda chunk: (_chunk_number(chunk[1]), chunk[0]))
+    parts: List[str] = []
+    urls: List[Any] = []
+    previous: Optional[float] = None
+    for _, match, _ in ordered:
+        number = _chunk_number(match)
+        if parts:
+            # Adjacent chunks read on; a gap is marked so text doesn't run together
+            adjacent = number != math.inf and number == previous + 1
+            parts.append("\n\n" if adjacent else "\n\n[…]\n\n")
+        parts.append(match.metadata.get("chunk_text", "").strip())
+        previous = number
+        chunk_urls = match.metadata.get("extracted_urls") or []
+        for url in chunk_urls if isinstance(chunk_urls, list) else [chunk_urls]:
+            if url not in urls:
+                urls.append(url)
+
+    return {
+        "content": "".join(parts),
+        "source": best.get("document_title", "BYU-Idaho Knowledge Base"),
+        "score": max(score for _, _, score in chunks),
+        "metadata": {
+            "document_type": best.get("document_type", "knowledge_article"),
+            "category": best.get("category", "Unknown Category"),
+            "extracted_urls": urls,
+        },
+    }
+
+
+def _chunk_number(match: Any) -> float:
+    try:
+        return float(match.metadata.get("chunk_id"))
+    except (TypeError, ValueError):
+        return math.inf  # Unknown position: after the numbered chunks, in rank order
+
+
+def _shingles(text: str) -> Set[Tuple[str, ...]]:
+    words = re.findall(r"\w+", text.lower())
+    if len(words) < 3:
+        return {tuple(words)}
+    return {tuple(words[i : i + 3]) for i in range(len(words) - 2)}
+
+
+def _jaccard(a: Set[Tuple[str, ...]], b: Set[Tuple[str, ...]]) -> float:
+    return len(a & b) / len(a | b) if a or b else 1.0
+
+
+def _output_tokens(value: Any) -> int:
+    # What the model reads: the agents SDK sends a tool's return value as str()
+    return estimate_tokens(str(value))
+
+
+# Global context packer instance
+context_packer = ContextPacker(
+    enabled=os.getenv("KB_PACKING_ENABLED", "true").lower() == "true",
+    token_budget=int(os.getenv("KB_CONTEXT_TOKEN_BUDGET", "2500")),
+    duplicate_threshold=float(os.getenv("KB_DUPLICATE_THRESHOLD", "0.8")),
+)
+
+
+def get_context_packer() -> ContextPacker:
+    """Get the global context packer instance"""
+    return context_packer
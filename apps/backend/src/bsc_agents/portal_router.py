@@ -0,0 +1,202 @@
+"""
+Portal fast path for the BSC Support Agent
+Answers pure "where is the link" questions ("what's the link to Workday",
+"Canvas login", "where is iPlan") straight from the portal catalogue with
+a templated reply, skipping the agent run and its LLM round-trips.
+Anything less than a clear match falls through to the agent.
+"""
+
+import os
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+try:
+    from .metrics import get_metrics
+    from .portals import PortalCatalogue, PortalIndex, get_portal_index
+except ImportError:
+    from metrics import get_metrics
+    from portals import PortalCatalogue, PortalIndex, get_portal_index
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+# Words that ask for a location or link
+INTENT_WORDS = frozenset(
+    "link links url urls website site page portal login log logon sign signin where "
+    "find open access go address".split()
+)
+
+# Words that carry nothing beyond the request itself
+FILLER_WORDS = frozenset(
+    "a an the to for of on in at into is are s what whats how do does can could i im "
+    "me my you your please pls get give send show need want there it byui byu idaho up".split()
+)
+
+# Score of the best kind of match: a portal's name, id or alias versus a keyword
+NAME_MATCH = 1.0
+KEYWORD_MATCH = 0.5
+
+
+@dataclass
+class PortalRoute:
+    """A routing decision: the portal (when confident) and why"""
+
+    portal: Optional[Dict[str, Any]]
+    confidence: float
+    reason: str
+
+
+class PortalRouter:
+    """
+    Decides whether a message only asks where a portal is.
+
+    Confidence is the match score (1.0 for a name, id or alias, 0.5 for a
+    keyword) times the share of the message's words accounted for by that
+    name plus link words ("link", "login", "where") and filler. So "Canvas
+    login" scores 1.0, while "how do I drop a class in Canvas" does not
+    qualify. Messages naming two portals, without a link word, or longer
+    than max_words always fall through.
+    """
+
+    def __init__(
+        self,
+        portals: Optional[PortalIndex] = None,
+        enabled: bool = True,
+        min_confidence: float = 0.9,
+        max_words: int = 10,
+    ):
+        """
+        Initialize the router
+
+        Args:
+            portals: The portal index (default: the global one)
+            enabled: Whether the fast path is used at all
+            min_confidence: Confidence needed to answer without the agent
+            max_words: Longer messages always go to the agent
+        """
+        self.portals = portals or get_portal_index()
+        self.enabled = enabled
+        self.min_confidence = min_confidence
+        self.max_words = max_words
+        self.outcomes: Dict[str, int] = {}
+
+        metrics = get_metrics()
+        self._hit_counter = metrics.counter(
+            "portal_fast_path_total", "Portal fast path decisions", {"outcome": "hit"}
+        )
+        self._fallthrough_counter = metrics.counter(
+            "portal_fast_path_total", "Portal fast path decisions", {"outcome": "fallthrough"}
+        )
+        self._forms_for: Any = None
+        self._forms: List[Tuple[Tuple[str, ...], int, float]] = []
+
+    def route(self, message: str) -> PortalRoute:
+        """Match message against the catalogue; portal is set only when confident"""
+        try:
+            decision = self._decide(message)
+        except Exception as e:
+            # A missing or unreadable catalogue must not stop the agent from answering
+            print(f"⚠️  Portal fast path unavailable, using the agent: {e}")
+            decision = PortalRoute(None, 0.0, "error")
+        if decision.portal is not None:
+            self._hit_counter.inc()
+        else:
+            self._fallthrough_counter.inc()
+        self.outcomes[decision.reason] = self.outcomes.get(decision.reason, 0) + 1
+        return decision
+
+    def answer(self, portal: Dict[str, Any]) -> str:
+        """The templated reply for a routed portal"""
+        purpose = portal.get("purpose", "").rstrip(".")
+        reply = f"Here's the link to **{portal['name']}**: {portal['url']}"
+        if purpose:
+            reply += f"\n\n{purpose}."
+        return reply
+
+    def get_stats(self) -> Dict[str, Any]:
+        hits = self.outcomes.get("hit", 0)
+        total = sum(self.outcomes.values())
+        return {
+            "enabled": self.enabled,
+            "min_confidence": self.min_confidence,
+            "hits": hits,
+            "fallthroughs": total - hits,
+            "hit_rate": round(hits / total, 3) if total else 0.0,
+            "reasons": dict(self.outcomes),
+        }
+
+    def _decide(self, message: str) -> PortalRoute:
+        if not self.enabled:
+            return PortalRoute(None, 0.0, "disabled")
+        words = _WORD.findall(message.lower().replace("'", ""))
+        if not words or len(words) > self.max_words:
+            return PortalRoute(None, 0.0, "length")
+
+        catalogue, forms = self._catalogue_forms()
+        best: Dict[int, Tuple[float, Set[int]]] = {}
+        for form, position, score in forms:
+            for start in _occurrences(words, form):
+                covered = set(range(start, start + len(form)))
+                previous = best.get(position)
+                if previous is None or score > previous[0]:
+                    best[position] = (score, covered)
+                elif score == previous[0]:
+                    previous[1].update(covered)
+
+        named = [position for position, (score, _) in best.items() if score == NAME_MATCH]
+        if len(named) > 1:
+            return PortalRoute(None, 0.0, "ambiguous")
+        if not best:
+            return PortalRoute(None, 0.0, "no_match")
+        position = named[0] if named else max(best, key=lambda p: best[p][0])
+        score, covered = best[position]
+
+        if not any(word in INTENT_WORDS for word in words) and len(covered) < len(words):
+            return PortalRoute(None, 0.0, "no_link_intent")
+        explained = sum(
+            1 for i, word in enumerate(words)
+            if i in covered or word in INTENT_WORDS or word in FILLER_WORDS
+        )
+        confidence = round(score * explained / len(words), 3)
+        if confidence < self.min_confidence:
+            return PortalRoute(None, confidence, "low_confidence")
+        return PortalRoute(catalogue.results[position], confidence, "hit")
+
+    def _catalogue_forms(self) -> Tuple[PortalCatalogue, List[Tuple[Tuple[str, ...], int, float]]]:
+        """The catalogue, and (words, result position, score) for every way a portal is named"""
+        catalogue = self.portals.load()
+        if self._forms_for is not catalogue:  # Rebuilt after a catalogue reload
+            forms: Dict[Tuple[Tuple[str, ...], int], float] = {}
+            for key, position in catalogue.by_key.items():
+                # "Canvas (I-Learn)" is also called "Canvas" and "I-Learn"
+                names = [key] + [part for part in re.split(r"[()]", key) if part.strip()]
+                for name in names:
+                    form = tuple(_WORD.findall(name.replace("'", "")))
+                    if form:
+                        forms[(form, position)] = NAME_MATCH
+            for position, result in enumerate(catalogue.results):
+                for keyword in result.get("keywords", []):
+                    form = tuple(_WORD.findall(keyword.lower()))
+                    if form:
+                        forms.setdefault((form, position), KEYWORD_MATCH)
+            self._forms = [(form, position, score) for (form, position), score in forms.items()]
+            self._forms_for = catalogue
+        return catalogue, self._forms
+
+
+def _occurrences(words: List[str], form: Tuple[str, ...]) -> List[int]:
+    size = len(form)
+    return [i for i in range(len(words) - size + 1) if tuple(words[i : i + size]) == form]
+
+
+# Global portal router (PORTAL_FAST_PATH_* configure it)
+portal_router = PortalRouter(
+    enabled=os.getenv("PORTAL_FAST_PATH_ENABLED", "true").lower() == "true",
+    min_confidence=float(os.getenv("PORTAL_FAST_PATH_MIN_CONFIDENCE", "0.9")),
+    max_words=int(os.getenv("PORTAL_FAST_PATH_MAX_WORDS", "10")),
+)
+
+
+def get_portal_router() -> PortalRouter:
+    """Get the global portal router"""
+    return portal_router
@@ -0,0 +1,201 @@
+"""
+Portal catalogue index for the BSC Support Agent
+tools/portals.json compiled once into lookup structures with the tool's
+output dicts prebuilt, so lookup_portals_and_resources does no disk I/O and
+no copying. The file is recompiled when its mtime changes.
+"""
+
+import json
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Set
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+# Field separator in the search text; never part of a query
+_SEPARATOR = "\x00"
+
+
+@dataclass
+class PortalCatalogue:
+    """
+    One compile of the portal file.
+
+    - results: output dicts in file order, built once and shared (read-only)
+    - by_category: result positions per category
+    - by_key: lowercased id, name and aliases -> result position
+    - tokens: word -> result positions containing it (inverted index)
+    - search_text: per result, its searchable fields lowercased and joined
+    """
+
+    results: List[Dict[str, Any]] = field(default_factory=list)
+    by_category: Dict[str, List[int]] = field(default_factory=dict)
+    by_key: Dict[str, int] = field(default_factory=dict)
+    tokens: Dict[str, List[int]] = field(default_factory=dict)
+    search_text: List[str] = field(default_factory=list)
+    word_matches: Dict[str, Set[int]] = field(default_factory=dict)
+
+    def matching_word(self, needle: str) -> Set[int]:
+        """Positions of results with an indexed word containing needle (memoized)"""
+        matches = self.word_matches.get(needle)
+        if matches is None:
+            matches = set()
+            for word, positions in self.tokens.items():
+                if needle in word:
+                    matches.update(positions)
+            if len(self.word_matches) < 10000:
+                self.word_matches[needle] = matches
+        return matches
+
+
+class PortalIndex:
+    """
+    The portal file, compiled and recompiled when its mtime changes.
+
+    A query matches a portal when it is a substring of the name, purpose, a
+    keyword or an alias, case-insensitively (the original scan's rule).
+    """
+
+    def __init__(self, path: str, check_interval_seconds: float = 1.0):
+        """
+        Args:
+            path: Portal catalogue JSON file
+            check_interval_seconds: How often lookups may stat the file for changes
+        """
+        self.path = path
+        self.check_interval_seconds = check_interval_seconds
+        self.catalogue = PortalCatalogue()
+        self.reloads = 0
+        self._mtime: Optional[float] = None
+        self._failed_mtime: Optional[float] = None
+        self._missing = False
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def load(self) -> PortalCatalogue:
+        """
+        The current compile; recompiles first if the file is new or changed (blocking).
+
+        Once a compile has succeeded, a deleted or unreadable file leaves it
+        in service with a warning; a broken file is retried when it changes
+        again. Before that, errors are raised.
+        """
+        now = time.monotonic()
+        if self.reloads and now - self._checked_at < self.check_interval_seconds:
+            return self.catalogue
+        self._checked_at = now
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except OSError as e:
+            if not self.reloads:
+                raise
+            if not self._missing:
+                print(f"⚠️  Portal file {self.path} unavailable, keeping the loaded catalogue: {e}")
+            self._missing = True
+            return self.catalogue
+        self._missing = False
+        if mtime not in (self._mtime, self._failed_mtime):
+            with self._lock:
+                if mtime not in (self._mtime, self._failed_mtime):
+                    self._reload(mtime)
+        return self.catalogue
+
+    def _reload(self, mtime: float) -> None:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                catalogue = compile_portals(json.load(f))
+        except Exception as e:  # Unreadable, half-written or the wrong shape
+            if not self.reloads:
+                raise  # Nothing compiled yet to fall back on
+            self._failed_mtime = mtime
+            print(f"⚠️  Portal file {self.path} unreadable, keeping the loaded catalogue: {e}")
+            return
+        # One attribute swap: a concurrent lookup sees old or new
+        self.catalogue = catalogue
+        self._mtime = mtime
+        self.reloads += 1
+
+    def lookup(self, query: str = "", category: str = "") -> List[Dict[str, Any]]:
+        """Portals matching query (all if empty), optionally only in category, in file order"""
+        catalogue = self.load()
+        if category:
+            positions: Sequence[int] = catalogue.by_category.get(category, [])
+        else:
+            positions = range(len(catalogue.results))
+
+        needle = query.lower()
+        if needle:
+            if _WORD.fullmatch(needle):
+                # One word can only match inside one indexed word
+                candidates = catalogue.matching_word(needle)
+                positions = [i for i in positions if i in candidates]
+            else:
+                positions = [i for i in positions if needle in catalogue.search_text[i]]
+        return [catalogue.results[i] for i in positions]
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """The portal with this id, name or alias (any case), or None"""
+        catalogue = self.load()
+        position = catalogue.by_key.get(key.strip().lower())
+        return None if position is None else catalogue.results[position]
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "portals": len(self.catalogue.results),
+            "categories": len(self.catalogue.by_category),
+            "words": len(self.catalogue.tokens),
+            "reloads": self.reloads,
+        }
+
+
+def compile_portals(data: Dict[str, Any]) -> PortalCatalogue:
+    """Build the lookup structures for a parsed portals.json"""
+    catalogue = PortalCatalogue()
+    categories = data.get("portals", {}).get("categories", {})
+    for category_name, category_data in categories.items():
+        for portal in category_data.get("portals", []):
+            position = len(catalogue.results)
+            catalogue.results.append(
+                {
+                    "name": portal.get("name", ""),
+                    "url": portal.get("url", ""),
+                    "purpose": portal.get("purpose", ""),
+                    "category": category_name,
+                    "users": portal.get("users", []),
+                    "keywords": portal.get("keywords", []),
+                    "aliases": portal.get("aliases", []),
+                    "key_features": portal.get("key_features", []),
+                }
+            )
+            catalogue.by_category.setdefault(category_name, []).append(position)
+
+            for key in [portal.get("id", ""), portal.get("name", ""), *portal.get("aliases", [])]:
+                if key:
+                    catalogue.by_key.setdefault(key.strip().lower(), position)
+
+            fields = [
+                portal.get("name", ""),
+                portal.get("purpose", ""),
+                *portal.get("keywords", []),
+                *portal.get("aliases", []),
+            ]
+            text = _SEPARATOR.join(value.lower() for value in fields)
+            catalogue.search_text.append(text)
+            for word in set(_WORD.findall(text)):
+                catalogue.tokens.setdefault(word, []).append(position)
+    return catalogue
+
+
+# Global portal index (compiled on first lookup or at warm-up)
+portal_index = PortalIndex(
+    os.getenv("PORTALS_FILE")
+    or os.path.join(os.path.dirname(__file__), "tools", "portals.json")
+)
+
+
+def get_portal_index() -> PortalIndex:
+    """Get the global portal index"""
+    return portal_index
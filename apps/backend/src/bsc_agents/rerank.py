@@ -0,0 +1,136 @@
+"""
+Reranking of knowledge base candidates for the BSC Support Agent
+Retrieval over-fetches, then a cheap in-process scorer reorders the
+candidates and cuts the list where relevance falls off, so the model reads
+the few useful chunks instead of a fixed top 10.
+"""
+
+import os
+from typing import Any, List, Sequence, Set, Tuple
+
+try:
+    from .bm25 import tokenize
+    from .metrics import get_metrics
+except ImportError:
+    from bm25 import tokenize
+    from metrics import get_metrics
+
+RankedMatch = Tuple[Any, float]
+
+
+class Reranker:
+    """
+    Scores each candidate as a weighted sum of three signals in [0, 1]:
+
+    - vector: the retrieval score, rescaled so the best candidate is 1 and
+      the worst 0
+    - overlap: share of the query's terms found in the chunk text
+    - title: share of the query's terms found in the document title
+
+    Candidates whose retrieval score is below min_similarity are dropped
+    first, since the rescaled vector signal only says how they compare with
+    each other: when every candidate is off-topic, nothing comes back.
+    Results then stop at top_k, below min_score, or at the first drop of
+    more than knee_drop between neighbours (a "knee"), but never before
+    min_results.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        candidates: int = 30,
+        weights: Tuple[float, float, float] = (0.6, 0.25, 0.15),
+        min_score: float = 0.35,
+        min_similarity: float = 0.1,
+        knee_drop: float = 0.15,
+        min_results: int = 2,
+    ):
+        """
+        Initialize the reranker
+
+        Args:
+            enabled: When False, retrieval order and top_k are used unchanged
+            candidates: Matches to fetch before reranking
+            weights: Weights of the vector, overlap and title signals
+            min_score: Combined score below which results are cut
+            min_similarity: Retrieval score below which candidates are
+                dropped before scoring (vector similarity; fused hybrid
+                scores are rank-based and rarely fall below it)
+            knee_drop: Score drop between neighbours at which results are cut
+            min_results: Results always kept (if retrieved)
+        """
+        self.enabled = enabled
+        self.candidates = candidates
+        self.weights = weights
+        self.min_score = min_score
+        self.min_similarity = min_similarity
+        self.knee_drop = knee_drop
+        self.min_results = min_results
+
+        self._returned = get_metrics().histogram(
+            "knowledge_base_results_returned",
+            "Results left per search after reranking",
+            buckets=(0, 1, 2, 3, 4, 5, 6, 8, 10, 15, 20),
+        )
+
+    def fetch_count(self, top_k: int) -> int:
+        """How many candidates to retrieve for a search that wants top_k"""
+        return max(top_k, self.candidates) if self.enabled else top_k
+
+    def rerank(self, query: str, ranked: Sequence[RankedMatch], top_k: int) -> List[RankedMatch]:
+        """Reorder (match, score) candidates and cut them; scores become the combined score"""
+        if not self.enabled or not ranked:
+            return list(ranked[:top_k])
+
+        ranked = [(match, score) for match, score in ranked if score >= self.min_similarity]
+        if not ranked:
+            self._returned.observe(0)
+            return []
+
+        terms = set(tokenize(query))
+        scores = [score for _, score in ranked]
+        low, high = min(scores), max(scores)
+        vector_weight, overlap_weight, title_weight = self.weights
+
+        rescored = []
+        for match, score in ranked:
+            vector = (score - low) / (high - low) if high > low else 1.0
+            overlap = _coverage(terms, match.metadata.get("chunk_text", ""))
+            title = _coverage(terms, match.metadata.get("document_title", ""))
+            combined = vector_weight * vector + overlap_weight * overlap + title_weight * title
+            rescored.append((match, round(combined, 4)))
+        rescored.sort(key=lambda entry: entry[1], reverse=True)
+
+        kept = rescored[:1]
+        for match, score in rescored[1:top_k]:
+            if len(kept) >= self.min_results and (
+                score < self.min_score or kept[-1][1] - score > self.knee_drop
+            ):
+                break
+            kept.append((match, score))
+
+        self._returned.observe(len(kept))
+        return kept
+
+
+def _coverage(terms: Set[str], text: str) -> float:
+    if not terms:
+        return 0.0
+    return len(terms & set(tokenize(text))) / len(terms)
+
+
+# Global reranker instance (KB_RERANK_* tune it per deployment)
+reranker = Reranker(
+    enabled=os.getenv("KB_RERANK_ENABLED", "true").lower() == "true",
+    candidates=int(os.getenv("KB_RERANK_CANDIDATES", "30")),
+    weights=tuple(float(w) for w in os.getenv("KB_RERANK_WEIGHTS", "0.6,0.25,0.15").split(",")),  # type: ignore
+    min_score=float(os.getenv("KB_RERANK_MIN_SCORE", "0.35")),
+    min_similarity=float(os.getenv("KB_RERANK_MIN_SIMILARITY", "0.1")),
+    knee_drop=float(os.getenv("KB_RERANK_KNEE_DROP", "0.15")),
+    min_results=int(os.getenv("KB_RERANK_MIN_RESULTS", "2")),
+)
+
+
+def get_reranker() -> Reranker:
+    """Get the global reranker instance"""
+    return reranker
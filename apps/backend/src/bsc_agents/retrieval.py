@@ -0,0 +1,559 @@
+"""
+Knowledge base retrieval for the BSC Support Agent
+One long-lived Pinecone index handle per process. Its blocking queries run on
+a small dedicated thread pool so a slow round-trip never stalls the event
+loop (and with it every other stream on the replica). Formatted search
+results are cached until their TTL or the next knowledge base version.
+With KB_BACKEND=local the same interface searches a local memory-mapped
+index instead (see local_index.py). A BM25 keyword index (bm25.py) can run
+next to either, with the rankings merged by reciprocal rank fusion.
+"""
+
+import asyncio
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+try:
+    from .answer_cache import normalize_query
+    from .metrics import get_metrics
+except ImportError:
+    from answer_cache import normalize_query
+    from metrics import get_metrics
+
+
+class RetrievalClient:
+    """
+    Pinecone index access shared by every knowledge base search.
+
+    The index handle (and its HTTPS connection pool) is created on first use
+    and reused. At most pool_size queries run at once; later ones wait for a
+    thread, and every call gives up after timeout_seconds including that wait.
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        index_name: Optional[str] = None,
+        pool_size: int = 8,
+        timeout_seconds: float = 5.0,
+    ):
+        """
+        Initialize the retrieval client
+
+        Args:
+            api_key: Pinecone API key; defaults to PINECONE_API_KEY when used
+            index_name: Index to query; defaults to PINECONE_INDEX_NAME when used
+            pool_size: Queries (threads and HTTP connections) allowed at once
+            timeout_seconds: Longest a query may take, queueing included
+        """
+        self._api_key = api_key
+        self._index_name = index_name
+        self.pool_size = pool_size
+        self.timeout_seconds = timeout_seconds
+        self._index: Optional[Any] = None
+        self._index_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=pool_size, thread_name_prefix="pinecone"
+        )
+        self._timeouts = get_metrics().counter(
+            "knowledge_base_query_timeouts_total", "Pinecone queries that hit the timeout"
+        )
+
+    @property
+    def api_key(self) -> Optional[str]:
+        # Read late so a .env loaded after import still applies
+        return self._api_key or os.getenv("PINECONE_API_KEY")
+
+    @property
+    def index_name(self) -> str:
+        return self._index_name or os.getenv("PINECONE_INDEX_NAME", "bsc-supportagent-v1")
+
+    @property
+    def source(self) -> str:
+        """Names this index in a keyword index manifest (see KeywordSearchClient)"""
+        return f"pinecone:{self.index_name}"
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.api_key)
+
+    @property
+    def index(self) -> Any:
+        """The index handle, created on first use (blocking; call from the pool)"""
+        if self._index is None:
+            with self._index_lock:
+                if self._index is None:
+                    # Imported here: the SDK is only needed once the index is used
+                    from pinecone import Pinecone
+
+                    pc = Pinecone(
+                        api_key=self.api_key,
+                        timeout=self.timeout_seconds,
+                        connection_pool_maxsize=self.pool_size,
+                    )
+                    self._index = pc.Index(self.index_name)
+        return self._index
+
+    async def query(
+        self, vector: Any, top_k: int, namespace: str = "", **kwargs: Any
+    ) -> Any:
+        """
+        Query the index without blocking the event loop
+
+        Raises:
+            TimeoutError: The query (or its wait for a thread) took too long
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(
+            self._executor,
+            lambda: self.index.query(
+                vector=vector,
+                top_k=top_k,
+                namespace=namespace,
+                include_metadata=True,
+                **kwargs,
+            ),
+        )
+        try:
+            return await asyncio.wait_for(future, self.timeout_seconds)
+        except asyncio.TimeoutError:
+            self._timeouts.inc()
+            raise TimeoutError(
+                f"Pinecone query timed out after {self.timeout_seconds:g}s"
+            ) from None
+
+    def warm_up(self) -> bool:
+        """
+        Create the index handle and open its connection (blocking, run in a
+        thread). Returns False when Pinecone isn't configured.
+        """
+        if not self.configured:
+            return False
+        self.index.describe_index_stats()
+        return True
+
+    def get_stats(self) -> dict:
+        return {
+            "backend": "pinecone",
+            "configured": self.configured,
+            "connected": self._index is not None,
+            "pool_size": self.pool_size,
+            "timeout_seconds": self.timeout_seconds,
+        }
+
+
+class LocalRetrievalClient:
+    """
+    Knowledge base access through a local memory-mapped index
+    (KB_BACKEND=local), with the same interface as RetrievalClient.
+
+    The index holds one corpus, so namespaces are ignored. Searches are
+    vectorized NumPy and run in a worker thread (NumPy releases the GIL).
+    """
+
+    def __init__(self, path: str, nprobe: int = 8):
+        """
+        Args:
+            path: Index directory written by local_index.build_index()
+            nprobe: Clusters searched per query when the index has IVF lists
+        """
+        self.path = path
+        self.nprobe = nprobe
+        self._index: Optional[Any] = None
+        self._index_lock = threading.Lock()
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.path)
+
+    @property
+    def source(self) -> str:
+        """Names this index in a keyword index manifest (see KeywordSearchClient)"""
+        return "local"
+
+    @property
+    def index(self) -> Any:
+        """The opened index (blocking on first use)"""
+        if self._index is None:
+            with self._index_lock:
+                if self._index is None:
+                    # Imported here: NumPy is only needed for this backend
+                    try:
+                        from .local_index import LocalVectorIndex
+                    except ImportError:
+                        from local_index import LocalVectorIndex
+
+                    self._index = LocalVectorIndex(self.path, nprobe=self.nprobe)
+        return self._index
+
+    async def query(
+        self,
+        vector: Any,
+        top_k: int,
+        namespace: str = "",
+        filter: Optional[Dict[str, Any]] = None,
+    ) -> Any:
+        """Search the local index without blocking the event loop"""
+        if filter:
+            raise ValueError("The local knowledge base index doesn't support filters")
+        return await asyncio.to_thread(lambda: self.index.query(vector, top_k))
+
+    def warm_up(self) -> bool:
+        """
+        Open the index and read every vector once so the first searches don't
+        fault pages in (blocking). Returns False when no path is configured.
+        """
+        if not self.configured:
+            return False
+        index = self.index
+        deployment = os.getenv("AZURE_OPENAI_EMBEDDINGS_DEPLOYMENT", "text-embedding-3-large")
+        if index.model and index.model != deployment:
+            print(
+                f"⚠️  Local index was built with {index.model} but queries use {deployment}"
+            )
+        if len(index):
+            index.query([1.0] * index.manifest["dimension"], 1)
+        return True
+
+    def get_stats(self) -> dict:
+        stats: Dict[str, Any] = {
+            "backend": "local",
+            "configured": self.configured,
+            "opened": self._index is not None,
+        }
+        if self._index is not None:
+            stats.update(self._index.manifest, nprobe=self.nprobe)
+        return stats
+
+
+class KeywordSearchClient:
+    """
+    BM25 keyword search over the index at KB_BM25_INDEX_PATH, run next to
+    the vector search (hybrid retrieval). Like the local index it is
+    memory-mapped and searched in a worker thread.
+
+    Rankings are fused by record id, so the keyword index must hold the
+    vector index's own records: its manifest names the index it was built
+    from, and opening it against any other raises ValueError.
+    """
+
+    def __init__(self, path: str, vectors: Optional[Any] = None):
+        """
+        Args:
+            path: Index directory written by bm25.build_bm25_index(); empty disables
+            vectors: The retrieval client searched alongside (default: a local index)
+        """
+        self.path = path
+        self.vectors = vectors
+        self._index: Optional[Any] = None
+        self._index_lock = threading.Lock()
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.path)
+
+    @property
+    def source(self) -> str:
+        """The vector index the keyword index must have been built from"""
+        return self.vectors.source if self.vectors is not None else "local"
+
+    @property
+    def index(self) -> Any:
+        """The opened index (blocking on first use)"""
+        if self._index is None:
+            with self._index_lock:
+                if self._index is None:
+                    try:
+                        from .bm25 import BM25Index
+                    except ImportError:
+                        from bm25 import BM25Index
+
+                    index = BM25Index(self.path)
+                    # Indexes from before the manifest recorded a source were
+                    # always built from the local index's records
+                    built_from = index.manifest.get("source", "local")
+                    if built_from != self.source:
+                        index.close()
+                        raise ValueError(
+                            f"Keyword index at {self.path} was built from {built_from}, "
+                            f"not {self.source}; rebuild it with build_local_index.py"
+                        )
+                    self._index = index
+        return self._index
+
+    async def query(self, text: str, top_k: int) -> Any:
+        """Search the keyword index without blocking the event loop"""
+        return await asyncio.to_thread(lambda: self.index.query(text, top_k))
+
+    def warm_up(self) -> bool:
+        """Open the index (blocking). Returns False when no path is configured."""
+        if not self.configured:
+            return False
+        self.index.query("warm up", 1)
+        return True
+
+    def get_stats(self) -> dict:
+        stats: Dict[str, Any] = {"configured": self.configured, "opened": self._index is not None}
+        if self._index is not None:
+            stats.update(self._index.manifest)
+        return stats
+
+
+def match_key(match: Any) -> str:
+    """
+    The record a match points at: its id, which the keyword index shares with
+    the vector index it was built from (see KeywordSearchClient)
+    """
+    return str(match.id)
+
+
+def reciprocal_rank_fusion(
+    rankings: Sequence[Sequence[Any]], top_k: int, k: int = 60
+) -> List[Tuple[Any, float]]:
+    """
+    Merge ranked match lists: each chunk scores the sum of 1 / (k + rank)
+    over the lists it appears in. Raw scores (cosine, BM25) are never
+    compared, so the lists don't need a common scale.
+
+    Returns:
+        Up to top_k (match, score) pairs, best first. The match object is the
+        first one seen, so earlier rankings supply the metadata. Scores are
+        scaled so a chunk ranked first everywhere gets 1.0.
+    """
+    fused: Dict[str, List[Any]] = {}
+    for ranking in rankings:
+        for rank, match in enumerate(ranking, start=1):
+            entry = fused.setdefault(match_key(match), [match, 0.0])
+            entry[1] += 1.0 / (k + rank)
+    best = (len(rankings) or 1) / (k + 1)
+    ordered = sorted(fused.values(), key=lambda entry: entry[1], reverse=True)
+    return [(match, score / best) for match, score in ordered[:top_k]]
+
+
+class IndexVersion:
+    """
+    Token naming the current contents of the knowledge base.
+
+    Caches derived from the index register with on_change() and are dropped
+    when the token changes. With a path, the token lives in a file that the
+    ingestion job rewrites (or bump() writes), so every worker and replica
+    sharing the file sees the new version within check_interval_seconds.
+    """
+
+    def __init__(self, path: Optional[str] = None, check_interval_seconds: float = 1.0):
+        """
+        Args:
+            path: Optional file holding the token
+            check_interval_seconds: Minimum time between checks of the file
+        """
+        self.path = path
+        self.check_interval_seconds = check_interval_seconds
+        self.token = "initial"
+        self._mtime: Optional[float] = None
+        self._checked_at = 0.0
+        self._listeners: List[Callable[[], Any]] = []
+        self.current()
+
+    def on_change(self, listener: Callable[[], Any]) -> None:
+        """Call listener whenever the version changes"""
+        self._listeners.append(listener)
+
+    def current(self) -> str:
+        """The current token, re-reading the file when it has changed"""
+        now = time.monotonic()
+        if self.path and now - self._checked_at >= self.check_interval_seconds:
+            self._checked_at = now
+            try:
+                mtime = os.stat(self.path).st_mtime
+                if mtime != self._mtime:
+                    self._mtime = mtime
+                    with open(self.path, "r", encoding="utf-8") as f:
+                        self._set(f.read().strip() or self.token)
+            except OSError:
+                pass  # No file yet: keep the current token
+        return self.token
+
+    def bump(self, token: Optional[str] = None) -> str:
+        """Move to a new version (a fresh token unless one is given)"""
+        token = token or uuid.uuid4().hex[:12]
+        if self.path:
+            temporary = f"{self.path}.{os.getpid()}.tmp"
+            with open(temporary, "w", encoding="utf-8") as f:
+                f.write(token)
+            os.replace(temporary, self.path)  # Readers never see a partial token
+            self._mtime = os.stat(self.path).st_mtime
+        self._set(token)
+        return token
+
+    def _set(self, token: str) -> None:
+        if token != self.token:
+            self.token = token
+            for listener in self._listeners:
+                listener()
+
+
+ResultKey = Tuple[str, str, int, str, str]
+
+
+class ResultCache:
+    """
+    LRU cache of formatted knowledge base search results.
+
+    Keys are (embedding model, normalized query, top_k, namespace, filter), so
+    a hit skips both the query embedding and the Pinecone round-trip. Entries
+    expire after ttl_seconds and all go when the index version changes.
+    """
+
+    def __init__(
+        self,
+        index_version: IndexVersion,
+        enabled: bool = True,
+        ttl_seconds: float = 600.0,
+        max_entries: int = 2000,
+    ):
+        """
+        Initialize the result cache
+
+        Args:
+            index_version: Knowledge base version; a change clears the cache
+            enabled: Whether lookups and stores do anything
+            ttl_seconds: Seconds a result list is reused
+            max_entries: Result lists kept; least recently used go first
+        """
+        self.index_version = index_version
+        self.enabled = enabled
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[ResultKey, Tuple[List[Dict[str, Any]], float]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        index_version.on_change(self.clear)
+
+        metrics = get_metrics()
+        self._hit_counter = metrics.counter(
+            "knowledge_base_result_cache_hits_total",
+            "Knowledge base searches answered from the result cache",
+        )
+        self._miss_counter = metrics.counter(
+            "knowledge_base_result_cache_misses_total",
+            "Knowledge base searches that queried Pinecone",
+        )
+
+    @staticmethod
+    def key(
+        model: str,
+        query: str,
+        top_k: int,
+        namespace: str = "",
+        filter: Optional[Dict[str, Any]] = None,
+    ) -> ResultKey:
+        filter_key = json.dumps(filter, sort_keys=True) if filter else ""
+        return (model, normalize_query(query), top_k, namespace, filter_key)
+
+    def get(self, key: ResultKey) -> Optional[List[Dict[str, Any]]]:
+        """Cached results for key, or None (counted as a miss)"""
+        if not self.enabled:
+            return None
+        self.index_version.current()  # Clears the cache if the version moved
+
+        cached = self.entries.get(key)
+        if cached is not None:
+            results, stored_at = cached
+            if time.time() - stored_at <= self.ttl_seconds:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                self._hit_counter.inc()
+                return results
+            del self.entries[key]
+
+        self.misses += 1
+        self._miss_counter.inc()
+        return None
+
+    def put(self, key: ResultKey, results: List[Dict[str, Any]]) -> None:
+        if not self.enabled:
+            return
+        self.entries[key] = (results, time.time())
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def clear(self) -> int:
+        removed = len(self.entries)
+        self.entries.clear()
+        self.invalidations += 1
+        return removed
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get statistics about cache usage"""
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self.entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "ttl_seconds": self.ttl_seconds,
+            "index_version": self.index_version.token,
+            "invalidations": self.invalidations,
+        }
+
+
+# Global retrieval client instance: Pinecone, or a local index with KB_BACKEND=local
+retrieval_client: Union[RetrievalClient, LocalRetrievalClient]
+if os.getenv("KB_BACKEND", "pinecone").lower() == "local":
+    retrieval_client = LocalRetrievalClient(
+        path=os.getenv("KB_LOCAL_INDEX_PATH", ""),
+        nprobe=int(os.getenv("KB_LOCAL_NPROBE", "8")),
+    )
+else:
+    retrieval_client = RetrievalClient(
+        pool_size=int(os.getenv("PINECONE_POOL_SIZE", "8")),
+        timeout_seconds=float(os.getenv("PINECONE_QUERY_TIMEOUT_SECONDS", "5")),
+    )
+
+
+def get_retrieval_client() -> Union[RetrievalClient, LocalRetrievalClient]:
+    """Get the global retrieval client"""
+    return retrieval_client
+
+
+# Global keyword index for hybrid search (off unless KB_BM25_INDEX_PATH is set)
+keyword_client = KeywordSearchClient(
+    path=os.getenv("KB_BM25_INDEX_PATH", ""), vectors=retrieval_client
+)
+
+
+def get_keyword_client() -> KeywordSearchClient:
+    """Get the global keyword search client"""
+    return keyword_client
+
+
+# Global knowledge base version (shared through KB_INDEX_VERSION_FILE if set)
+index_version = IndexVersion(path=os.getenv("KB_INDEX_VERSION_FILE") or None)
+
+# Global search result cache instance
+result_cache = ResultCache(
+    index_version,
+    enabled=os.getenv("KB_RESULT_CACHE_ENABLED", "true").lower() == "true",
+    ttl_seconds=float(os.getenv("KB_RESULT_CACHE_TTL_SECONDS", "600")),
+    max_entries=int(os.getenv("KB_RESULT_CACHE_MAX_ENTRIES", "2000")),
+)
+
+
+def get_index_version() -> IndexVersion:
+    """Get the global knowledge base version"""
+    return index_version
+
+
+def get_result_cache() -> ResultCache:
+    """Get the global search result cache"""
+    return result_cache
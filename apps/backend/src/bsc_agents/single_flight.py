@@ -0,0 +1,116 @@
+"""
+Single-flight deduplication for the BSC Support Agent
+Identical first-turn questions asked while a run is in progress share that run.
+"""
+
+import asyncio
+from contextlib import aclosing
+from typing import Any, AsyncGenerator, AsyncIterator, Callable, Dict, List, Optional
+
+
+class Flight:
+    """
+    One agent run whose events are fanned out to every subscriber.
+
+    The run happens in its own task so it doesn't belong to any single
+    caller; it is cancelled once the last subscriber goes away.
+    """
+
+    def __init__(self, key: str, on_close: Callable[["Flight"], None]):
+        self.key = key
+        self.events: List[Dict[str, Any]] = []
+        self.subscribers = 0
+        self.finished = False
+        self.error: Optional[BaseException] = None
+        self.task: Optional[asyncio.Task] = None
+        self._on_close = on_close
+        self._changed = asyncio.Event()
+
+    def start(self, source: AsyncIterator[Dict[str, Any]]) -> None:
+        self.task = asyncio.ensure_future(self._pump(source))
+
+    async def _pump(self, source: AsyncIterator[Dict[str, Any]]) -> None:
+        try:
+            async with aclosing(source) as events:
+                async for event in events:
+                    self.events.append(event)
+                    self._notify()
+        except asyncio.CancelledError as e:
+            self.error = e
+            raise
+        except Exception as e:
+            # Delivered to every subscriber instead of failing the task
+            self.error = e
+        finally:
+            self.finished = True
+            self._on_close(self)
+            self._notify()
+
+    async def subscribe(self) -> AsyncGenerator[Dict[str, Any], None]:
+        """Yield every event of the run, from the first one, until it finishes"""
+        self.subscribers += 1
+        position = 0
+        try:
+            while True:
+                while position < len(self.events):
+                    position += 1
+                    yield self.events[position - 1]
+                if self.finished:
+                    if self.error is not None:
+                        raise self.error
+                    return
+                changed = self._changed
+                await changed.wait()
+        finally:
+            self.subscribers -= 1
+            if not self.subscribers and not self.finished and self.task is not None:
+                # Nobody is listening any more: stop paying for the run. Close
+                # the flight first so new callers start a fresh run.
+                self._on_close(self)
+                self.task.cancel()
+
+    def _notify(self) -> None:
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+
+class SingleFlight:
+    """In-progress runs keyed by normalized question"""
+
+    def __init__(self):
+        self.flights: Dict[str, Flight] = {}
+
+    def join(self, key: str) -> Optional[AsyncGenerator[Dict[str, Any], None]]:
+        """Subscribe to the run in progress for key, if there is one"""
+        flight = self.flights.get(key)
+        if flight is None:
+            return None
+        return flight.subscribe()
+
+    def lead(
+        self, key: str, source: AsyncIterator[Dict[str, Any]]
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        """Start a shared run for key from source and subscribe to it"""
+        flight = Flight(key, self._close)
+        self.flights[key] = flight
+        flight.start(source)
+        return flight.subscribe()
+
+    def _close(self, flight: Flight) -> None:
+        if self.flights.get(flight.key) is flight:
+            del self.flights[flight.key]
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight_runs": len(self.flights),
+            "subscribers": sum(f.subscribers for f in self.flights.values()),
+        }
+
+
+# Global single-flight registry instance
+single_flight = SingleFlight()
+
+
+def get_single_flight() -> SingleFlight:
+    """Get the global single-flight registry"""
+    return single_flight
@@ -0,0 +1,148 @@
+"""
+Per-request stage timing for the BSC Support Agent
+Collects a breakdown (queue wait, history, agent setup, model turns, tool
+calls, first token, total) for requests that ask for it, without threading
+a parameter through the agent and its tools.
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional
+
+
+@dataclass
+class Stage:
+    name: str
+    seconds: float
+    description: str = ""
+
+
+@dataclass
+class RequestTiming:
+    """Stages recorded for one request, in the order they finished"""
+
+    started: float = field(default_factory=time.perf_counter)
+    stages: List[Stage] = field(default_factory=list)
+    calls: Dict[str, int] = field(default_factory=dict)
+
+    def next_call(self, name: str) -> int:
+        """Number the next call of name in this request, from 1"""
+        self.calls[name] = self.calls.get(name, 0) + 1
+        return self.calls[name]
+
+    def add(self, name: str, seconds: float, description: str = "") -> None:
+        self.stages.append(Stage(name, seconds, description))
+
+    def mark(self, name: str, description: str = "") -> None:
+        """Record the time since the request started (e.g. first token)"""
+        if not any(stage.name == name for stage in self.stages):
+            self.add(name, time.perf_counter() - self.started, description)
+
+    def total_seconds(self) -> float:
+        return time.perf_counter() - self.started
+
+    def server_timing(self) -> str:
+        """The breakdown as a Server-Timing header value"""
+        entries = [
+            f'{stage.name};dur={stage.seconds * 1000:.1f}'
+            + (f';desc="{stage.description}"' if stage.description else "")
+            for stage in self.stages
+        ]
+        entries.append(f"total;dur={self.total_seconds() * 1000:.1f}")
+        return ", ".join(entries)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """The breakdown as JSON-friendly data (for the SSE timing event)"""
+        return {
+            "stages": [
+                {"name": s.name, "ms": round(s.seconds * 1000, 1)}
+                | ({"description": s.description} if s.description else {})
+                for s in self.stages
+            ],
+            "total_ms": round(self.total_seconds() * 1000, 1),
+        }
+
+
+# Timing of the current request, or None when it wasn't requested. Tasks
+# started during the request (agent runs, tool calls) inherit it.
+_current_timing: ContextVar[Optional[RequestTiming]] = ContextVar(
+    "request_timing", default=None
+)
+
+
+# "-<n>" while inside the n-th call of a tool (set in the tool's own task),
+# so the sub-stages of repeated calls stay apart
+_call_suffix: ContextVar[str] = ContextVar("timing_call_suffix", default="")
+
+
+def start_request_timing(enabled: bool = True) -> Optional[RequestTiming]:
+    """
+    Start collecting stage timings for the current request, or make sure
+    none are collected when the request didn't ask for them
+    """
+    timing = RequestTiming() if enabled else None
+    _current_timing.set(timing)
+    return timing
+
+
+def current_timing() -> Optional[RequestTiming]:
+    return _current_timing.get()
+
+
+def record(name: str, seconds: float, description: str = "") -> None:
+    """Record a stage measured by the caller, if timing is on"""
+    timing = _current_timing.get()
+    if timing is not None:
+        timing.add(name + _call_suffix.get(), seconds, description)
+
+
+@contextmanager
+def timed(name: str, description: str = "") -> Iterator[None]:
+    """Record the duration of the block as a stage, if timing is on"""
+    timing = _current_timing.get()
+    if timing is None:
+        yield
+        return
+    name += _call_suffix.get()
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timing.add(name, time.perf_counter() - started, description)
+
+
+@contextmanager
+def timed_call(kind: str) -> Iterator[None]:
+    """
+    Record the block as stage "<kind>-<n>" for the request's n-th call of
+    kind (e.g. "tool-search_knowledge_base-2"). Stages recorded inside get
+    the same "-<n>" suffix ("kb-embed-2"), if timing is on.
+    """
+    timing = _current_timing.get()
+    if timing is None:
+        yield
+        return
+    suffix = f"-{timing.next_call(kind)}"
+    token = _call_suffix.set(suffix)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        _call_suffix.reset(token)
+        timing.add(kind + suffix, time.perf_counter() - started)
+
+
+def record_call(kind: str, seconds: float) -> None:
+    """Record a call measured by the caller as stage "<kind>-<n>" (see timed_call)"""
+    timing = _current_timing.get()
+    if timing is not None:
+        timing.add(f"{kind}-{timing.next_call(kind)}", seconds)
+
+
+def mark(name: str, description: str = "") -> None:
+    """Record the time since the request started, if timing is on"""
+    timing = _current_timing.get()
+    if timing is not None:
+        timing.mark(name, description)
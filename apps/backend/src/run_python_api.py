@@ -2,8 +2,14 @@
 """
 Startup script for the Python BSC Support Agent API
 This script ensures proper environment loading and starts the FastAPI server
+
+Development mode (the default) runs one process with auto-reload. Production
+mode (--production or SERVER_MODE=production) turns the file watcher off,
+runs WEB_CONCURRENCY workers and uses uvloop/httptools when installed.
 """
 
+import importlib.util
+import math
 import os
 import sys
 from pathlib import Path
@@ -45,6 +51,104 @@ def check_environment():
     print("✅ Environment variables loaded successfully")
 
 
+def container_cpu_count() -> int:
+    """CPUs this process may use, honouring cgroup (container) CPU quotas"""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+
+    quota = None
+    try:
+        # cgroup v2: "<quota> <period>" or "max <period>"
+        limit, period = Path("/sys/fs/cgroup/cpu.max").read_text().split()
+        if limit != "max":
+            quota = int(limit) / int(period)
+    except (OSError, ValueError):
+        try:
+            # cgroup v1
+            limit = int(Path("/sys/fs/cgroup/cpu/cpu.cfs_quota_us").read_text())
+            period = int(Path("/sys/fs/cgroup/cpu/cpu.cfs_period_us").read_text())
+            if limit > 0 and period > 0:
+                quota = limit / period
+        except (OSError, ValueError):
+            pass
+
+    if quota is not None:
+        cpus = min(cpus, math.ceil(quota))
+    return max(cpus, 1)
+
+
+def production_mode() -> bool:
+    """Whether to start in production mode (--production or SERVER_MODE)"""
+    if "--production" in sys.argv[1:]:
+        return True
+    return os.getenv("SERVER_MODE", "development").lower() == "production"
+
+
+def server_options(production: bool) -> dict:
+    """
+    Keyword arguments for uvicorn.run()
+
+    Production sizing: WEB_CONCURRENCY workers if set, else one per CPU when
+    per-worker session memory is accepted, else one.
+
+    Raises:
+        RuntimeError: WEB_CONCURRENCY isn't a positive whole number, or the
+            workers would split session memory (see check_worker_count)
+    """
+    if not production:
+        return {"reload": True, "log_level": "info"}
+
+    from bsc_agents.memory import allows_split_across_workers, check_worker_count
+
+    concurrency = os.getenv("WEB_CONCURRENCY", "").strip()
+    if concurrency:
+        try:
+            workers = int(concurrency)
+        except ValueError:
+            workers = 0
+        if workers < 1:
+            raise RuntimeError(
+                f"WEB_CONCURRENCY must be a whole number of workers, 1 or more "
+                f"(got {concurrency!r}). Unset it to size workers automatically."
+            )
+    elif allows_split_across_workers():
+        workers = container_cpu_count()
+    else:
+        workers = 1
+
+    warning = check_worker_count(workers)  # Refuses an unsafe split
+    if warning:
+        print(f"⚠️  {warning}")
+
+    has_uvloop = importlib.util.find_spec("uvloop") is not None
+    has_httptools = importlib.util.find_spec("httptools") is not None
+    return {
+        "reload": False,
+        "workers": workers,
+        "loop": "uvloop" if has_uvloop else "asyncio",
+        "http": "httptools" if has_httptools else "h11",
+        # Longer than typical load balancer idle timeouts (60s), so the proxy
+        # closes idle connections first and never reuses one we just closed
+        "timeout_keep_alive": int(os.getenv("KEEP_ALIVE_SECONDS", "75")),
+        "backlog": int(os.getenv("SOCKET_BACKLOG", "2048")),
+        "access_log": os.getenv("ACCESS_LOG", "false").lower() == "true",
+        "log_level": "info",
+    }
+
+
+def describe_mode(options: dict) -> str:
+    """One line naming the active server mode, printed at startup"""
+    if options["reload"]:
+        return "🛠️  Development mode: 1 process, auto-reload on"
+    return (
+        f"🏭 Production mode: {options['workers']} worker(s), reload off, "
+        f"loop={options['loop']}, http={options['http']}, "
+        f"keep-alive={options['timeout_keep_alive']}s, backlog={options['backlog']}"
+    )
+
+
 def main():
     """Main function to start the API server"""
     print("BSC Support Agent - Python API Server")
@@ -77,12 +181,18 @@ def main():
     host = os.getenv("HOST", "0.0.0.0")
     port = int(os.getenv("PORT", 3001))
 
+    try:
+        options = server_options(production_mode())
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    print(describe_mode(options))
+
     uvicorn.run(
-        "api:app",  # Use import string instead of app object for reload support
+        "api:app",  # Import string, required for reload and workers
         host=host,
         port=port,
-        reload=True,
-        log_level="info",
+        **options,
     )
 
 
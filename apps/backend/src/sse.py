@@ -0,0 +1,324 @@
+"""
+Server-Sent Events encoding for the BSC Support Agent API
+Every streaming endpoint builds its frames here so the wire format lives in one place.
+"""
+
+import asyncio
+import json
+import time
+import uuid
+from collections import deque
+from typing import Any, AsyncGenerator, AsyncIterator, Callable, Deque, Dict, Optional, Tuple
+
+from fastapi.responses import StreamingResponse
+
+from bsc_agents.metrics import get_metrics
+
+try:
+    import orjson  # Installed alongside pinecone; much faster than json.dumps
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+
+# Event types understood by the frontend (see chatService.ts StreamChunk),
+# plus the opt-in "timing" breakdown sent before the final done event
+EVENT_TYPES = ("chunk", "tool", "done", "error", "timing")
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "Connection": "keep-alive",
+    "Access-Control-Allow-Origin": "*",
+    "Access-Control-Allow-Headers": "*",
+    # Tell nginx (configs/docker/nginx.conf) not to buffer the stream
+    "X-Accel-Buffering": "no",
+}
+
+# Pre-serialized JSON up to the content value, one per event type, so only
+# the content string and the timestamp are encoded per event
+_PAYLOAD_PREFIXES: Dict[str, bytes] = {
+    event_type: b'{"type":"%s","content":' % event_type.encode()
+    for event_type in EVENT_TYPES
+}
+
+
+_json_encoder = json.JSONEncoder(ensure_ascii=False)
+
+
+def _encode_string_fallback(value: Any) -> bytes:
+    return _json_encoder.encode(value).encode("utf-8")
+
+
+encode_json_string: Callable[[Any], bytes] = (
+    orjson.dumps if orjson is not None else _encode_string_fallback
+)
+
+
+def timestamp_ms() -> int:
+    """Monotonic millisecond timestamp (same clock as the event loop's time())"""
+    return int(time.monotonic() * 1000)
+
+
+class SSEEncoder:
+    """
+    Encodes chat stream events as ready-to-send SSE frames.
+
+    One encoder is created per stream; it owns the stream's event ID counter
+    so every frame with an ID is numbered consecutively. With an id_prefix
+    (the request ID) IDs are sent as "<prefix>:<n>".
+    """
+
+    def __init__(self, id_prefix: str = ""):
+        self.last_event_id = 0
+        self._id_prefix = f"{id_prefix}:".encode("utf-8") if id_prefix else b""
+
+    def event(self, event_type: str, content: Any, with_id: bool = True) -> bytes:
+        """
+        Build a `data:` frame for an event, optionally with the next `id:`
+
+        Args:
+            event_type: One of EVENT_TYPES
+            content: Text shown (or reported) by the frontend; any JSON value
+                for structured events such as "timing"
+            with_id: Whether to number the frame for Last-Event-ID tracking
+        """
+        payload = b"%b%b,\"timestamp\":%d}" % (
+            _PAYLOAD_PREFIXES[event_type],
+            encode_json_string(content),
+            timestamp_ms(),
+        )
+        if not with_id:
+            return b"data: %b\n\n" % payload
+
+        self.last_event_id += 1
+        return b"id: %b%d\ndata: %b\n\n" % (self._id_prefix, self.last_event_id, payload)
+
+    def comment(self, text: str = "keep-alive") -> bytes:
+        """Build a `:` comment frame; EventSource ignores it but proxies see traffic"""
+        return b": %b\n\n" % text.encode("utf-8")
+
+
+frames_sent = get_metrics().counter("sse_frames_sent_total", "SSE frames sent to clients")
+bytes_sent = get_metrics().counter("sse_bytes_sent_total", "SSE bytes sent to clients")
+
+
+async def _counted(frames: AsyncIterator[bytes]) -> AsyncGenerator[bytes, None]:
+    async for frame in frames:
+        frames_sent.inc()
+        bytes_sent.inc(len(frame))
+        yield frame
+
+
+def sse_response(frames: AsyncIterator[bytes]) -> StreamingResponse:
+    """Wrap an iterator of encoded frames in a streaming SSE response"""
+    return StreamingResponse(
+        _counted(frames),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
+    )
+
+
+class ReplayStream:
+    """
+    Buffered frames of one chat request, produced independently of any client.
+
+    The agent run writes frames here from its own task; each connection
+    (the original one and any reconnects) reads them through subscribe(), so
+    a client that drops can pick up where it left off without a new run.
+    If nobody is subscribed for reconnect_grace_seconds before the run
+    finishes, the producer task is cancelled so the run stops. The grace
+    period first starts at creation, so a client that goes away before its
+    response body is ever read also stops the run.
+    """
+
+    def __init__(
+        self,
+        session_id: str,
+        request_id: str,
+        max_events: int = 1000,
+        reconnect_grace_seconds: float = 10.0,
+    ):
+        self.session_id = session_id
+        self.request_id = request_id
+        self.max_events = max_events
+        self.reconnect_grace_seconds = reconnect_grace_seconds
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.producer: Optional[asyncio.Task] = None
+        self.subscribers = 0
+        self._abandon_timer: Optional[asyncio.TimerHandle] = None
+        # (event number or None for un-numbered frames, frame bytes)
+        self._entries: Deque[Tuple[Optional[int], bytes]] = deque()
+        self._dropped = 0  # Entries evicted from the front of the buffer
+        self._last_event_id = 0
+        self._changed = asyncio.Event()
+
+    @property
+    def finished(self) -> bool:
+        return self.finished_at is not None
+
+    def append(self, frame: bytes) -> None:
+        """Buffer a frame and wake subscribers"""
+        event_id = None
+        if frame.startswith(b"id:"):
+            # SSEEncoder numbers frames consecutively from 1
+            self._last_event_id += 1
+            event_id = self._last_event_id
+
+        self._entries.append((event_id, frame))
+        if len(self._entries) > self.max_events:
+            self._entries.popleft()
+            self._dropped += 1
+        self._notify()
+
+    def finish(self) -> None:
+        """Mark the stream complete; subscribers end after the last frame"""
+        self.finished_at = time.time()
+        self._cancel_abandon_timer()
+        self._notify()
+
+    async def record(self, frames: AsyncIterator[bytes]) -> None:
+        """Drain a frame iterator into the buffer (run as the producer task)"""
+        try:
+            async for frame in frames:
+                self.append(frame)
+        finally:
+            self.finish()
+
+    def can_resume(self, after_event_id: int) -> bool:
+        """Whether every frame after after_event_id is still buffered"""
+        if self._dropped == 0:
+            return True
+        oldest = next((eid for eid, _ in self._entries if eid is not None), None)
+        return oldest is not None and oldest <= after_event_id + 1
+
+    async def subscribe(self, after_event_id: int = 0) -> AsyncGenerator[bytes, None]:
+        """Yield buffered frames after after_event_id, then live frames until finished"""
+        position = self._dropped
+        if after_event_id:
+            # Skip past the acknowledged event
+            for index, (event_id, _) in enumerate(self._entries):
+                if event_id is not None and event_id > after_event_id:
+                    position = self._dropped + index
+                    break
+            else:
+                position = self._dropped + len(self._entries)
+
+        backlog_end = self._dropped + len(self._entries)
+        self.subscribers += 1
+        self._cancel_abandon_timer()
+        try:
+            while True:
+                position = max(position, self._dropped)
+                while position < self._dropped + len(self._entries):
+                    event_id, frame = self._entries[position - self._dropped]
+                    position += 1
+                    if position <= backlog_end and frame.startswith(b":"):
+                        continue  # Stale heartbeats are not worth replaying
+                    yield frame
+                if self.finished:
+                    return
+                changed = self._changed
+                await changed.wait()
+        finally:
+            # Runs when the client disconnects and the response is torn down
+            self.subscribers -= 1
+            if not self.subscribers and not self.finished:
+                self._schedule_abandon()
+
+    def _notify(self) -> None:
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def _schedule_abandon(self) -> None:
+        """Cancel the run unless a client reconnects within the grace period"""
+        self._cancel_abandon_timer()
+        loop = asyncio.get_running_loop()
+        self._abandon_timer = loop.call_later(self.reconnect_grace_seconds, self._abandon)
+
+    def _cancel_abandon_timer(self) -> None:
+        if self._abandon_timer is not None:
+            self._abandon_timer.cancel()
+            self._abandon_timer = None
+
+    def _abandon(self) -> None:
+        self._abandon_timer = None
+        if not self.subscribers and self.producer is not None and not self.producer.done():
+            self.producer.cancel()
+
+
+class ReplayRegistry:
+    """
+    In-memory replay buffers keyed by session and request ID, with a TTL.
+
+    Event IDs sent to clients have the form "<request_id>:<n>", so the
+    Last-Event-ID header of a reconnect identifies both the stream and the
+    position to resume from.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = 120.0,
+        max_events: int = 1000,
+        max_streams: int = 1000,
+        reconnect_grace_seconds: float = 10.0,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_events = max_events
+        self.max_streams = max_streams
+        self.reconnect_grace_seconds = reconnect_grace_seconds
+        self.streams: Dict[Tuple[str, str], ReplayStream] = {}
+
+    def create(self, session_id: str) -> ReplayStream:
+        """Register a new stream for a request (call from the event loop)"""
+        self.cleanup_expired()
+        if len(self.streams) >= self.max_streams:
+            # Evict the oldest finished stream; live ones are never dropped
+            finished = [s for s in self.streams.values() if s.finished]
+            if finished:
+                oldest = min(finished, key=lambda s: s.finished_at)
+                del self.streams[(oldest.session_id, oldest.request_id)]
+
+        stream = ReplayStream(
+            session_id,
+            uuid.uuid4().hex[:12],
+            self.max_events,
+            self.reconnect_grace_seconds,
+        )
+        self.streams[(session_id, stream.request_id)] = stream
+        # Until the first subscriber starts reading, nobody is listening
+        stream._schedule_abandon()
+        return stream
+
+    def resume(
+        self, session_id: str, last_event_id: Optional[str]
+    ) -> Optional[Tuple[ReplayStream, int]]:
+        """
+        Find the stream a Last-Event-ID refers to.
+
+        Returns (stream, event number to resume after), or None when the
+        header is missing, malformed, expired or too far behind the buffer.
+        """
+        if not last_event_id or ":" not in last_event_id:
+            return None
+        request_id, _, number = last_event_id.rpartition(":")
+        try:
+            after_event_id = int(number)
+        except ValueError:
+            return None
+
+        stream = self.streams.get((session_id, request_id))
+        if stream is None or not stream.can_resume(after_event_id):
+            return None
+        return stream, after_event_id
+
+    def cleanup_expired(self) -> int:
+        """Drop finished streams older than the TTL; returns how many were removed"""
+        cutoff = time.time() - self.ttl_seconds
+        expired = [
+            key
+            for key, stream in self.streams.items()
+            if stream.finished and stream.finished_at < cutoff
+        ]
+        for key in expired:
+            del self.streams[key]
+        return len(expired)
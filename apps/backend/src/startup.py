@@ -0,0 +1,182 @@
+"""
+Startup warm-up for the BSC Support Agent API
+Imports the agent and opens its connections in the background once the
+server is listening, so /api/health answers right away and /api/ready tells
+a load balancer when the first user will get a warm answer. Every phase is
+timed for the startup report.
+"""
+
+import asyncio
+import importlib
+import os
+import time
+from dataclasses import dataclass
+from types import ModuleType
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from bsc_agents.metrics import get_metrics
+from bsc_agents.retrieval import get_keyword_client, get_retrieval_client
+
+# Open the Azure OpenAI and Pinecone connections during warm-up (an embedding
+# request and an index stats call); off still imports the agent
+WARM_UP_CONNECTIONS = os.getenv("WARM_UP_CONNECTIONS", "true").lower() == "true"
+
+
+@dataclass
+class Phase:
+    name: str
+    seconds: float
+    error: Optional[str] = None
+    detail: str = ""
+
+    def to_dict(self) -> Dict[str, Any]:
+        result: Dict[str, Any] = {"name": self.name, "ms": round(self.seconds * 1000, 1)}
+        if self.error:
+            result["error"] = self.error
+        if self.detail:
+            result["detail"] = self.detail
+        return result
+
+
+class WarmUp:
+    """
+    Runs the startup phases and holds their report.
+
+    The agent module (and with it the agents SDK and OpenAI client) is
+    imported in a worker thread; requests that arrive earlier wait for that
+    import instead of blocking the event loop on it. A failed import is
+    reported (error) and tried again by the next caller.
+    """
+
+    def __init__(self, imports_seconds: float):
+        """
+        Args:
+            imports_seconds: Time the API module spent on its own imports
+        """
+        self.imports_seconds = imports_seconds
+        self.started = time.perf_counter()
+        self.phases: List[Phase] = []
+        self.ready = False
+        self.ready_seconds: Optional[float] = None
+        self.error: Optional[str] = None  # Why the last agent import failed
+        self._agent_import: Optional[asyncio.Task] = None
+        self._run: Optional[asyncio.Task] = None
+
+        metrics = get_metrics()
+        metrics.gauge(
+            "startup_imports_seconds", "Import time of the API module"
+        ).set(imports_seconds)
+        self._ready_gauge = metrics.gauge(
+            "startup_ready_seconds", "Time from server start until warm-up finished"
+        )
+
+    async def agent(self) -> ModuleType:
+        """bsc_agents.agent, imported on first call and shared afterwards"""
+        if self._agent_import is None:
+            self._agent_import = asyncio.create_task(
+                asyncio.to_thread(importlib.import_module, "bsc_agents.agent")
+            )
+        agent_import = self._agent_import
+        try:
+            # Shielded: a cancelled request mustn't cancel the import for everyone
+            agent = await asyncio.shield(agent_import)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # Not kept: the next caller imports again
+            if self._agent_import is agent_import:
+                self._agent_import = None
+                self.error = f"{type(e).__name__}: {e}"
+            raise
+        self.error = None
+        return agent
+
+    async def phase(self, name: str, work: Callable[[], Awaitable[Any]]) -> Phase:
+        """
+        Run and time one phase; failures are recorded, not raised. A string
+        result is kept as the phase detail.
+        """
+        started = time.perf_counter()
+        phase = Phase(name, 0.0)
+        try:
+            result = await work()
+            if isinstance(result, str):
+                phase.detail = result
+        except Exception as e:
+            phase.error = f"{type(e).__name__}: {e}"
+        phase.seconds = time.perf_counter() - started
+        self.phases.append(phase)
+        get_metrics().gauge(
+            "startup_phase_seconds", "Duration of each startup phase", {"phase": name}
+        ).set(phase.seconds)
+        return phase
+
+    async def run(self) -> None:
+        """Warm up in parallel: Pinecone alongside the agent import, then the rest"""
+
+        async def pinecone() -> Optional[str]:
+            connected = await asyncio.to_thread(get_retrieval_client().warm_up)
+            await asyncio.to_thread(get_keyword_client().warm_up)
+            return None if connected else "not configured"
+
+        async def agent_phases() -> bool:
+            if (await self.phase("import-agent", self.agent)).error:
+                return False
+            agent = await self.agent()
+            phases = [
+                self.phase("portals", lambda: asyncio.to_thread(agent.get_portal_index().load))
+            ]
+            if WARM_UP_CONNECTIONS:
+                phases.append(self.phase("embeddings", agent.warm_up_embeddings))
+            await asyncio.gather(*phases)
+            return True
+
+        if WARM_UP_CONNECTIONS:
+            imported, _ = await asyncio.gather(agent_phases(), self.phase("pinecone", pinecone))
+        else:
+            imported = await agent_phases()
+        if not imported:
+            # Nothing works without the agent; stay not-ready
+            failed = next(phase for phase in self.phases if phase.name == "import-agent")
+            print(f"❌ Startup failed: {failed.error}")
+            return
+
+        self.ready = True
+        self.ready_seconds = time.perf_counter() - self.started
+        self._ready_gauge.set(self.ready_seconds)
+        print(f"🚀 Ready in {self.ready_seconds * 1000:.0f} ms ({self.summary()})")
+
+    def start(self) -> asyncio.Task:
+        """Run the warm-up in the background (from the app lifespan)"""
+        self._run = asyncio.create_task(self.run())
+        return self._run
+
+    def stop(self) -> None:
+        """Cancel a warm-up still in progress (from the app lifespan)"""
+        if self._run is not None:
+            self._run.cancel()
+
+    def retry(self) -> None:
+        """Start the warm-up over if the last one ended without the agent"""
+        if self._run is not None and self._run.done() and not self.ready:
+            self.phases = []
+            self.start()
+
+    def summary(self) -> str:
+        parts = [f"imports {self.imports_seconds * 1000:.0f} ms"]
+        for phase in self.phases:
+            status = " failed" if phase.error else f" {phase.detail}" if phase.detail else ""
+            parts.append(f"{phase.name} {phase.seconds * 1000:.0f} ms{status}")
+        return ", ".join(parts)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """The startup report, as returned by /api/ready"""
+        return {
+            "ready": self.ready,
+            "error": self.error,
+            "imports_ms": round(self.imports_seconds * 1000, 1),
+            "ready_ms": (
+                round(self.ready_seconds * 1000, 1) if self.ready_seconds is not None else None
+            ),
+            "phases": [phase.to_dict() for phase in self.phases],
+        }
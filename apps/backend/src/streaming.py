@@ -0,0 +1,543 @@
+"""
+Streaming helpers for the BSC Support Agent API
+Turns raw model token deltas into word-safe segments for Server-Sent Events.
+"""
+
+import asyncio
+from typing import Any, AsyncGenerator, AsyncIterator, Callable, Dict, List, Optional
+
+
+# Boundary patterns, in the priority order the segmenter checks them
+SENTENCE_ENDINGS = (". ", "! ", "? ", ".\n", "!\n", "?\n", '."', '!"', '?"')
+PARAGRAPH_BREAK = "\n\n"
+PHRASE_ENDINGS = (", ", ": ", "; ", " - ", " — ")
+LINE_BREAK = "\n"
+
+_TRACKED_PATTERNS = SENTENCE_ENDINGS + (PARAGRAPH_BREAK,) + PHRASE_ENDINGS + (LINE_BREAK,)
+
+# Every tracked pattern ends in a space, newline or quote. Patterns completed
+# by a space are keyed by the character before it (" - " and " — " also need
+# a space before that), the others by the text before their last character
+_SPACE_ENDINGS = {p[-2]: p for p in SENTENCE_ENDINGS + PHRASE_ENDINGS if p.endswith(" ")}
+_SENTENCE_SET = frozenset(SENTENCE_ENDINGS)
+_NEWLINE_PATTERNS = {p[:-1]: p for p in _TRACKED_PATTERNS if p.endswith("\n") and len(p) > 1}
+_QUOTE_PATTERNS = {p[:-1]: p for p in _TRACKED_PATTERNS if p.endswith('"')}
+
+# Punctuation each pattern needs, to rule patterns out of a long delta cheaply
+_PATTERN_CHARS = {p: frozenset(p) - {" "} for p in _TRACKED_PATTERNS}
+_PATTERN_PUNCTUATION = frozenset().union(*_PATTERN_CHARS.values())
+
+# Buffer sizes at which a boundary rule starts to apply; from 150 characters
+# on, every delta flushes. _NEXT_THRESHOLD[size] is the first one above size.
+_SIZE_THRESHOLDS = (10, 26, 30, 50, 100, 150)
+_NEXT_THRESHOLD = [min(t for t in _SIZE_THRESHOLDS if t > size) for size in range(150)]
+
+# Characters of lookback needed for patterns and word spaces that straddle deltas
+_LOOKBACK = 3
+
+# Deltas longer than this are scanned with one rfind per pattern instead of
+# visiting every space, newline and quote they contain
+_BULK_SCAN_SIZE = 32
+
+
+def get_flush_content_and_remainder(buffer: str, new_content: str) -> tuple[str, str]:
+    """
+    Intelligent buffering that returns what to flush and what to keep.
+    Prevents word splitting while ensuring smooth streaming.
+
+    This is the original rescanning implementation. The API streams through
+    StreamSegmenter, which makes the same boundary choices incrementally; this
+    function is kept as the reference behaviour for tests and benchmarks.
+
+    Returns:
+        tuple: (content_to_flush, content_to_keep_in_buffer)
+    """
+    combined = buffer + new_content
+
+    # If content is very short, keep buffering
+    if len(combined) < 10:
+        return "", combined
+
+    # Priority 1: Always flush on sentence endings
+    sentence_endings = ['. ', '! ', '? ', '.\n', '!\n', '?\n', '.\"', '!\"', '?\"']
+    for ending in sentence_endings:
+        if ending in combined:
+            idx = combined.rfind(ending)
+            if idx > 0:
+                return combined[:idx + len(ending)], combined[idx + len(ending):]
+
+    # Priority 2: Flush at paragraph breaks
+    if '\n\n' in combined:
+        idx = combined.rfind('\n\n')
+        return combined[:idx + 2], combined[idx + 2:]
+
+    # Priority 3: Flush at punctuation that typically ends phrases
+    phrase_endings = [', ', ': ', '; ', ' - ', ' — ']
+    if len(combined) >= 30:
+        for ending in phrase_endings:
+            if ending in combined:
+                idx = combined.rfind(ending)
+                if idx > 15:  # Ensure we have substantial content before
+                    return combined[:idx + len(ending)], combined[idx + len(ending):]
+
+    # Priority 4: Flush at line breaks with substantial content
+    if '\n' in combined and len(combined) > 25:
+        idx = combined.rfind('\n')
+        if idx > 15:
+            return combined[:idx + 1], combined[idx + 1:]
+
+    # Priority 5: Smart word boundary detection when buffer gets long
+    if len(combined) >= 50:
+        # Look for the last complete word boundary
+        # A word boundary is a space that's not inside a hyphenated word or number
+        for i in range(len(combined) - 1, 20, -1):
+            if combined[i] == ' ':
+                # Check if this is a good place to break
+                # Don't break if we're in the middle of:
+                # - A number (e.g., "1 000" or "3.14 159")
+                # - A hyphenated word (e.g., "BYU-Idaho")
+                # - An apostrophe word (e.g., "Idaho's")
+
+                # Look ahead and behind to ensure we're at a real word boundary
+                before_space = combined[:i]
+                after_space = combined[i+1:] if i+1 < len(combined) else ""
+
+                # Don't split if the character before space is a digit and after is a digit
+                if (before_space and before_space[-1].isdigit() and
+                    after_space and after_space[0].isdigit()):
+                    continue
+
+                # Don't split if we're right after a hyphen or apostrophe
+                if before_space and before_space[-1] in "-'":
+                    continue
+
+                # Don't split if we're right before a hyphen or apostrophe
+                if after_space and len(after_space) > 1 and after_space[0] in "-'":
+                    continue
+
+                # This looks like a good word boundary
+                return combined[:i + 1], combined[i + 1:]
+
+    # Priority 6: For very long content, find any reasonable break point
+    if len(combined) >= 100:
+        # Try to find any space that's not breaking a word
+        last_good_space = -1
+        for i in range(len(combined) - 1, 30, -1):
+            if combined[i] == ' ':
+                # Basic check: not breaking a number or hyphenated word
+                if i > 0 and combined[i-1] not in "-'0123456789":
+                    last_good_space = i
+                    break
+
+        if last_good_space > 0:
+            return combined[:last_good_space + 1], combined[last_good_space + 1:]
+
+    # Priority 7: Emergency flush - buffer is too large
+    if len(combined) >= 150:
+        # As a last resort, find ANY space
+        last_space = combined.rfind(' ')
+        if last_space > 50:
+            return combined[:last_space + 1], combined[last_space + 1:]
+        else:
+            # No good break point found, flush most of it but keep some context
+            # Try to at least not break in the middle of a word
+            flush_point = 140
+            while flush_point < len(combined) and combined[flush_point].isalnum():
+                flush_point += 1
+            return combined[:flush_point], combined[flush_point:]
+
+    # Default: keep buffering
+    return "", combined
+
+
+def _word_space(before: str, after: str) -> bool:
+    """Whether a space between these characters is a word boundary (Priority 5 rules)"""
+    return not ((before.isdigit() and after.isdigit()) or before in "-'" or after in "-'")
+
+
+class StreamSegmenter:
+    """
+    Incremental replacement for get_flush_content_and_remainder.
+
+    Instead of rescanning the whole buffer on every delta, the segmenter keeps
+    the absolute stream position of the last occurrence of every boundary
+    pattern and only scans the characters each delta adds. Spaces only matter
+    once the buffer reaches 50 characters, so they are searched for then,
+    from the right, never covering the same text twice. A response costs
+    amortized O(1) per character while flushing exactly what the original
+    function would.
+    """
+
+    def __init__(self):
+        # Unflushed text is self._text[self._offset:] followed by self._parts;
+        # deltas are only joined when a cut reaches them, so neither appending
+        # nor cutting copies the remainder
+        self._text = ""
+        self._offset = 0
+        self._parts: List[str] = []
+        self._start = 0  # Absolute stream offset of the first unflushed character
+        self._end = 0  # Absolute stream offset just past the last character fed
+        self._tail = ""  # Last few characters of the stream, for straddling patterns
+        self._last: Dict[str, int] = dict.fromkeys(_TRACKED_PATTERNS, -1)
+        # Latest sentence/phrase ending of any kind, to skip the per-pattern
+        # checks when none is buffered
+        self._last_sentence = -1
+        self._last_phrase = -1
+        # Rightmost space passing the word-boundary (Priority 5) and loose
+        # (Priority 6) checks; spaces before the *_checked offsets have been
+        # searched already
+        self._last_word_space = -1
+        self._word_checked = 0
+        self._last_loose_space = -1
+        self._loose_checked = 0
+        # Size up to which the last "keep buffering" verdict holds for
+        # deltas that complete no pattern
+        self._quiet_below = 0
+
+    @property
+    def pending(self) -> str:
+        """Text received but not yet flushed"""
+        self._materialize(self._end - self._start)
+        return self._text[self._offset:]
+
+    def feed(self, delta: str) -> str:
+        """
+        Add a token delta and return the segment that is ready to flush.
+
+        Returns an empty string when the buffer should keep accumulating.
+        """
+        if len(delta) > _BULK_SCAN_SIZE:
+            self._parts.append(delta)
+            self._scan_bulk(delta)
+        elif delta:
+            self._parts.append(delta)
+            tail = self._tail
+            window = tail + delta
+            base = self._end - len(tail)  # Absolute offset of window[0]
+            self._end += len(delta)
+            self._tail = window[-_LOOKBACK:]
+            # Words and spaces complete no pattern, and then a "keep
+            # buffering" verdict holds until the next size threshold; from
+            # 50 characters on, a new space can also make a word boundary
+            if (
+                (window.replace(" ", "").isalnum() or not self._scan(delta, window, base, len(tail)))
+                and self._end - self._start < self._quiet_below
+                and (self._quiet_below <= 50 or " " not in window)
+            ):
+                return ""
+
+        start = self._start
+        size = self._end - start
+        cut = self._boundary(start, size) if size >= 10 else 0
+        if not cut:
+            self._quiet_below = _NEXT_THRESHOLD[size]
+            return ""
+
+        self._quiet_below = 0
+        self._materialize(cut)
+        segment = self._text[self._offset:self._offset + cut]
+        self._offset += cut
+        self._start += cut
+        return segment
+
+    def drain(self) -> str:
+        """Return everything still buffered and reset the buffer"""
+        remainder = self.pending
+        self._text = ""
+        self._offset = 0
+        self._start = self._end
+        self._quiet_below = 0
+        return remainder
+
+    def _materialize(self, length: int) -> None:
+        """Make sure the first length unflushed characters are in self._text"""
+        if self._parts and len(self._text) - self._offset < length:
+            self._text = self._text[self._offset:] + "".join(self._parts)
+            self._offset = 0
+            self._parts = []
+
+    def _scan(self, delta: str, window: str, base: int, new_from: int) -> bool:
+        """
+        Record the patterns completed by a short delta, given the window of
+        lookback plus delta. Returns whether there were any.
+        """
+        last = self._last
+        completed = False
+
+        # New occurrences always start after the previously recorded ones
+        idx = window.find(" ", new_from) if " " in delta else -1
+        while idx >= 0:
+            pattern = _SPACE_ENDINGS.get(window[idx - 1]) if idx else None
+            if pattern is not None:
+                if pattern in _SENTENCE_SET:
+                    last[pattern] = self._last_sentence = base + idx - 1
+                    completed = True
+                elif len(pattern) == 2 or window[idx - 2 : idx - 1] == " ":
+                    last[pattern] = self._last_phrase = base + idx - len(pattern) + 1
+                    completed = True
+            idx = window.find(" ", idx + 1)
+
+        if "\n" in delta:
+            self._scan_newlines(window, base, new_from)
+            completed = True
+        if '"' in delta:
+            self._scan_quotes(window, base, new_from)
+            completed = True
+        return completed
+
+    def _scan_newlines(self, window: str, base: int, new_from: int) -> None:
+        last = self._last
+        idx = window.find("\n", new_from)
+        while idx >= 0:
+            position = base + idx
+            last[LINE_BREAK] = position
+            pattern = _NEWLINE_PATTERNS.get(window[idx - 1]) if idx else None
+            if pattern:
+                last[pattern] = position - 1
+                if pattern != PARAGRAPH_BREAK and position - 1 > self._last_sentence:
+                    self._last_sentence = position - 1
+            idx = window.find("\n", idx + 1)
+
+    def _scan_quotes(self, window: str, base: int, new_from: int) -> None:
+        last = self._last
+        idx = window.find('"', new_from)
+        while idx >= 0:
+            pattern = _QUOTE_PATTERNS.get(window[idx - 1]) if idx else None
+            if pattern:
+                last[pattern] = base + idx - 1
+                if base + idx - 1 > self._last_sentence:
+                    self._last_sentence = base + idx - 1
+            idx = window.find('"', idx + 1)
+
+    def _scan_bulk(self, delta: str) -> None:
+        """Pattern trackers for a long delta, with one rfind per pattern that can occur"""
+        tail = self._tail
+        window = tail + delta
+        base = self._end - len(tail)
+        self._end += len(delta)
+        self._tail = window[-_LOOKBACK:]
+        self._quiet_below = 0
+
+        # Once a sentence ending past the flush point turns up, everything
+        # up to it is flushed by Priority 1 before any pattern later in
+        # _TRACKED_PATTERNS is consulted, so those are only searched after
+        # it. Until then, a pattern is only searched for if all its
+        # punctuation occurs, which skips most whole-delta searches.
+        last = self._last
+        lo = 0
+        present = None
+        for pattern in _TRACKED_PATTERNS:
+            if not lo and pattern is not SENTENCE_ENDINGS[0]:
+                if present is None:
+                    present = {char for char in _PATTERN_PUNCTUATION if char in window}
+                if not _PATTERN_CHARS[pattern] <= present:
+                    continue
+            idx = window.rfind(pattern, lo)
+            if idx >= 0 and base + idx > last[pattern]:
+                last[pattern] = base + idx
+                if not lo and pattern in _SENTENCE_SET and base + idx > self._start:
+                    lo = idx
+        for ending in SENTENCE_ENDINGS:
+            if last[ending] > self._last_sentence:
+                self._last_sentence = last[ending]
+        for ending in PHRASE_ENDINGS:
+            if last[ending] > self._last_phrase:
+                self._last_phrase = last[ending]
+
+    def _boundary(self, start: int, size: int) -> int:
+        """Return how many buffered characters to flush (0 to keep buffering)"""
+        # Priority 1: sentence endings (pattern order wins over position)
+        if self._last_sentence > start:
+            for ending in SENTENCE_ENDINGS:
+                if self._last[ending] > start:
+                    return self._last[ending] - start + len(ending)
+
+        # Priority 2: paragraph breaks
+        if self._last[PARAGRAPH_BREAK] >= start:
+            return self._last[PARAGRAPH_BREAK] - start + len(PARAGRAPH_BREAK)
+
+        # Priority 3: phrase-ending punctuation with substantial content before
+        if size >= 30 and self._last_phrase - start > 15:
+            for ending in PHRASE_ENDINGS:
+                if self._last[ending] - start > 15:
+                    return self._last[ending] - start + len(ending)
+
+        # Priority 4: line breaks
+        if size > 25 and self._last[LINE_BREAK] - start > 15:
+            return self._last[LINE_BREAK] - start + 1
+
+        if size < 50:
+            return 0
+        self._materialize(size)
+        text = self._text
+        offset = self._offset
+
+        # Priority 5: word boundary that doesn't split numbers or hyphenations
+        cut = self._word_boundary(text, offset, start, size)
+        if cut:
+            return cut
+
+        # Priority 6: any space not directly after a hyphen, apostrophe or digit
+        if size >= 100:
+            position = self._loose_space(text, offset, start, size)
+            if position > 30:
+                return position + 1
+
+        # Priority 7: emergency flush
+        if size >= 150:
+            position = text.rfind(" ", offset, offset + size) - offset
+            if position > 50:
+                return position + 1
+            flush_point = 140
+            while flush_point < size and text[offset + flush_point].isalnum():
+                flush_point += 1
+            return flush_point
+
+        return 0
+
+    def _word_boundary(self, text: str, offset: int, start: int, size: int) -> int:
+        """Priority 5 check; the last two positions depend on the buffer end"""
+        # With at least 50 characters buffered, the tail is all unflushed text
+        before_last, last_char = self._tail[-2], self._tail[-1]
+
+        # Trailing space: nothing after it yet
+        if last_char == " " and before_last not in "-'":
+            return size
+
+        # One character after the space: only the digit check applies
+        if before_last == " ":
+            before = self._tail[-3]
+            if before not in "-'" and not (before.isdigit() and last_char.isdigit()):
+                return size - 1
+
+        # Other spaces have two characters after them, so their verdict is
+        # final; only those not searched before need a look, from the right.
+        # Spaces at index 20 or below never qualify, now or after later cuts.
+        lo = offset + max(self._word_checked - start, 21)
+        idx = text.rfind(" ", lo, offset + size - 2)
+        while idx >= 0:
+            if _word_space(text[idx - 1], text[idx + 1]):
+                self._last_word_space = start + idx - offset
+                break
+            idx = text.rfind(" ", lo, idx)
+        self._word_checked = start + size - 2
+
+        position = self._last_word_space - start
+        if position > 20:
+            return position + 1
+        return 0
+
+    def _loose_space(self, text: str, offset: int, start: int, size: int) -> int:
+        """Buffer index of the rightmost Priority 6 space"""
+        lo = offset + max(self._loose_checked - start, 31)
+        idx = text.rfind(" ", lo, offset + size)
+        while idx >= 0:
+            if text[idx - 1] not in "-'0123456789":
+                self._last_loose_space = start + idx - offset
+                break
+            idx = text.rfind(" ", lo, idx)
+        self._loose_checked = start + size
+        return self._last_loose_space - start
+
+
+class ChunkCoalescer:
+    """
+    Merges segmenter output into fewer, larger SSE chunks.
+
+    A segment is held until either max_delay seconds have passed since the
+    oldest held segment arrived or max_bytes of UTF-8 text are waiting,
+    whichever comes first. A max_delay of 0 disables coalescing.
+    """
+
+    def __init__(self, max_delay: float = 0.04, max_bytes: int = 512):
+        self.max_delay = max_delay
+        self.max_bytes = max_bytes
+        self._segments: List[str] = []
+        self._size = 0
+        self._first_at = 0.0
+
+    @property
+    def deadline(self) -> Optional[float]:
+        """Monotonic time by which held text must be sent, or None if empty"""
+        if not self._segments:
+            return None
+        return self._first_at + self.max_delay
+
+    def add(self, segment: str, now: float) -> str:
+        """Hold a segment; returns coalesced text when the window closes"""
+        if not self._segments:
+            self._first_at = now
+        self._segments.append(segment)
+        self._size += len(segment.encode("utf-8"))
+
+        if self._size >= self.max_bytes or now - self._first_at >= self.max_delay:
+            return self.drain()
+        return ""
+
+    def due(self, now: float) -> str:
+        """Return held text if its time window has closed"""
+        if self._segments and now - self._first_at >= self.max_delay:
+            return self.drain()
+        return ""
+
+    def drain(self) -> str:
+        """Return all held text immediately"""
+        text = "".join(self._segments)
+        self._segments = []
+        self._size = 0
+        return text
+
+
+# Yielded by iterate_with_timeouts when no item arrived before the timeout
+TICK = object()
+
+_END = object()
+
+
+class _Failure:
+    """Carries an exception from the pump task to the consumer"""
+
+    def __init__(self, error: Exception):
+        self.error = error
+
+
+async def iterate_with_timeouts(
+    source: AsyncIterator[Any], next_timeout: Callable[[], Optional[float]]
+) -> AsyncGenerator[Any, None]:
+    """
+    Iterate source, yielding TICK whenever next_timeout() seconds pass idle.
+
+    The source runs in its own task and hands items over through a queue, so
+    a timeout never cancels (or moves between tasks) a pending source step.
+    The task is cancelled when this generator is closed.
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+
+    async def pump():
+        try:
+            async for item in source:
+                queue.put_nowait(item)
+        except Exception as e:
+            queue.put_nowait(_Failure(e))
+        finally:
+            queue.put_nowait(_END)
+
+    task = asyncio.create_task(pump())
+    try:
+        while True:
+            try:
+                item = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                try:
+                    item = await asyncio.wait_for(queue.get(), next_timeout())
+                except asyncio.TimeoutError:
+                    yield TICK
+                    continue
+
+            if item is _END:
+                break
+            if isinstance(item, _Failure):
+                raise item.error
+            yield item
+    finally:
+        task.cancel()
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Tests for admission control and priority queueing of agent runs.
+"""
+
+import asyncio
+import os
+import sys
+
+# Add src directory to path to import bsc_agents modules
+src_dir = os.path.join(os.path.dirname(__file__), "..", "src")
+sys.path.insert(0, src_dir)
+
+from bsc_agents.admission import AdmissionController, AdmissionRejected, Priority
+
+
+async def run(controller, priority, order, name):
+    admitted_at = await controller.acquire(priority)
+    order.append(name)
+    await asyncio.sleep(0)
+    controller.release(admitted_at)
+
+
+def test_waiters_are_admitted_by_priority():
+    async def scenario():
+        controller = AdmissionController(max_concurrent=1, max_queue=10)
+        held = await controller.acquire(Priority.INTERACTIVE)
+        order = []
+        tasks = [
+            asyncio.create_task(run(controller, Priority.BATCH, order, "batch")),
+            asyncio.create_task(run(controller, Priority.NON_STREAMING, order, "chat")),
+            asyncio.create_task(run(controller, Priority.INTERACTIVE, order, "stream")),
+        ]
+        await asyncio.sleep(0)
+        assert controller.queued == 3
+
+        controller.release(held)
+        await asyncio.gather(*tasks)
+        assert order == ["stream", "chat", "batch"]
+        assert controller.active == 0 and controller.queued == 0
+
+    asyncio.run(scenario())
+
+
+def test_full_queue_rejects_or_displaces_lower_priority():
+    async def scenario():
+        controller = AdmissionController(max_concurrent=1, max_queue=1)
+        await controller.acquire(Priority.INTERACTIVE)
+        batch = asyncio.create_task(controller.acquire(Priority.BATCH))
+        await asyncio.sleep(0)
+
+        # A live chat displaces the queued batch run
+        stream = asyncio.create_task(controller.acquire(Priority.INTERACTIVE))
+        await asyncio.sleep(0)
+        try:
+            await batch
+            assert False, "batch should have been displaced"
+        except AdmissionRejected as e:
+            assert e.retry_after >= 1
+
+        # Nothing lower to displace: rejected immediately
+        try:
+            await controller.acquire(Priority.NON_STREAMING)
+            assert False, "queue is full"
+        except AdmissionRejected:
+            pass
+        assert controller.queued == 1
+        stream.cancel()
+
+    asyncio.run(scenario())
+
+
+def test_waiting_too_long_is_rejected():
+    async def scenario():
+        controller = AdmissionController(max_concurrent=1, queue_timeout_seconds=0.01)
+        await controller.acquire(Priority.INTERACTIVE)
+        try:
+            await controller.acquire(Priority.INTERACTIVE)
+            assert False, "should time out"
+        except AdmissionRejected as e:
+            assert e.reason == "timeout"
+        assert controller.queued == 0
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_waiter_does_not_leak_a_slot():
+    async def scenario():
+        controller = AdmissionController(max_concurrent=1)
+        held = await controller.acquire(Priority.INTERACTIVE)
+        waiter = asyncio.create_task(controller.acquire(Priority.INTERACTIVE))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        assert controller.queued == 0
+
+        controller.release(held)
+        assert controller.active == 0
+
+    asyncio.run(scenario())
+
+
+def test_release_after_a_waiter_timed_out():
+    async def scenario():
+        controller = AdmissionController(max_concurrent=1, max_queue=10)
+        held = await controller.acquire(Priority.INTERACTIVE)
+        late = asyncio.create_task(controller.acquire(Priority.INTERACTIVE, timeout=0.01))
+        await asyncio.sleep(0)
+        timed_out = controller._waiters[0]
+        next_in_line = asyncio.create_task(controller.acquire(Priority.BATCH, timeout=None))
+        await asyncio.sleep(0)
+
+        # Release in the gap between the timeout cancelling the wait and
+        # acquire() handling it
+        while not timed_out.future.done():
+            await asyncio.sleep(0.001)
+        assert not late.done()
+        controller.release(held)
+
+        try:
+            await late
+            assert False, "should time out"
+        except AdmissionRejected as e:
+            assert e.reason == "timeout"
+        controller.release(await next_in_line)  # The slot went to the live waiter
+        assert controller.active == 0 and controller.queued == 0
+        assert controller._waiters == []
+
+    asyncio.run(scenario())
+
+
+def test_timed_out_waiter_leaves_the_queue():
+    async def scenario():
+        controller = AdmissionController(max_concurrent=1, queue_timeout_seconds=0.01)
+        await controller.acquire(Priority.INTERACTIVE)
+        for _ in range(3):
+            try:
+                await controller.acquire(Priority.INTERACTIVE)
+            except AdmissionRejected:
+                pass
+        assert controller._waiters == [] and controller.queued == 0
+
+    asyncio.run(scenario())
+
+
+if __name__ == "__main__":
+    test_waiters_are_admitted_by_priority()
+    test_full_queue_rejects_or_displaces_lower_priority()
+    test_waiting_too_long_is_rejected()
+    test_cancelled_waiter_does_not_leak_a_slot()
+    test_release_after_a_waiter_timed_out()
+    test_timed_out_waiter_leaves_the_queue()
+    print("✅ Admission control tests passed")
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Tests for what each agent run sends to the model, with the model stubbed out:
+a fixed system prompt, history as messages, and prompt-cache usage metrics.
+"""
+
+import asyncio
+import os
+import sys
+
+# Add src directory to path to import bsc_agents modules
+src_dir = os.path.join(os.path.dirname(__file__), "..", "src")
+sys.path.insert(0, src_dir)
+
+# The agent module builds its OpenAI client on import; no request is ever sent
+os.environ.setdefault("AZURE_OPENAI_API_KEY", "test-key")
+os.environ.setdefault("AZURE_OPENAI_ENDPOINT", "https://example.openai.azure.com")
+
+from agents.models.interface import Model
+from openai.types.responses import (
+    Response,
+    ResponseCompletedEvent,
+    ResponseOutputMessage,
+    ResponseOutputText,
+    ResponseUsage,
+)
+from openai.types.responses.response_usage import InputTokensDetails, OutputTokensDetails
+
+from bsc_agents import agent
+
+
+class StubModel(Model):
+    """Records each request and answers it with a fixed, usage-reporting response"""
+
+    def __init__(self, cached_tokens: int):
+        self.cached_tokens = cached_tokens
+        self.requests = []
+
+    async def get_response(self, *args, **kwargs):
+        raise NotImplementedError("runs are streamed")
+
+    def stream_response(self, system_instructions, input, *args, **kwargs):
+        self.requests.append((system_instructions, input))
+        response = Response(
+            id="resp_stub",
+            created_at=0,
+            model="stub",
+            object="response",
+            parallel_tool_calls=False,
+            tool_choice="auto",
+            tools=[],
+            output=[
+                ResponseOutputMessage(
+                    id="msg_stub",
+                    type="message",
+                    role="assistant",
+                    status="completed",
+                    content=[ResponseOutputText(type="output_text", text="ok", annotations=[])],
+                )
+            ],
+            usage=ResponseUsage(
+                input_tokens=2000,
+                output_tokens=5,
+                total_tokens=2005,
+                input_tokens_details=InputTokensDetails(
+                    cached_tokens=self.cached_tokens, cache_write_tokens=0
+                ),
+                output_tokens_details=OutputTokensDetails(reasoning_tokens=0),
+            ),
+        )
+
+        async def events():
+            yield ResponseCompletedEvent(
+                type="response.completed", response=response, sequence_number=0
+            )
+
+        return events()
+
+
+def run_with_stub(model, turns):
+    """Run the agent once per (history, message) with model swapped in"""
+    deployment = os.getenv("AZURE_OPENAI_DEPLOYMENT", "gpt-5")
+    original = agent.get_agent(deployment)
+    agent._agents[deployment] = original.clone(model=model)
+    usages = []
+
+    async def scenario():
+        for history, message in turns:
+            usage = {}
+            async for _ in agent.run_agent_events(message, history, usage):
+                pass
+            usages.append(usage)
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        agent._agents[deployment] = original
+    return usages
+
+
+def test_history_is_sent_as_messages_after_a_fixed_prompt():
+    first_turn = [
+        {"role": "user", "content": "When is the FAFSA deadline?", "timestamp": 1.0},
+        {"role": "assistant", "content": "June 30.", "metadata": {"sources": []}},
+    ]
+    second_turn = first_turn + [
+        {"role": "system", "content": "Session resumed"},
+        {"role": "user", "content": "And for summer?"},
+        {"role": "assistant", "content": "The same date."},
+    ]
+    model = StubModel(cached_tokens=0)
+    run_with_stub(
+        model,
+        [([], "Hi"), (first_turn, "Which form?"), (second_turn, "Thanks!")],
+    )
+
+    instructions = [request[0] for request in model.requests]
+    assert instructions == [agent.system_message] * 3
+
+    inputs = [request[1] for request in model.requests]
+    assert inputs[0] == [{"role": "user", "content": "Hi"}]
+    assert inputs[1] == [
+        {"role": "user", "content": "When is the FAFSA deadline?"},
+        {"role": "assistant", "content": "June 30."},
+        {"role": "user", "content": "Which form?"},
+    ]
+    # Only user/assistant turns are sent, in order, and each request starts
+    # with the previous one's messages so the provider can reuse its prefix
+    assert inputs[2] == [
+        {"role": "user", "content": "When is the FAFSA deadline?"},
+        {"role": "assistant", "content": "June 30."},
+        {"role": "user", "content": "And for summer?"},
+        {"role": "assistant", "content": "The same date."},
+        {"role": "user", "content": "Thanks!"},
+    ]
+
+
+def test_cached_prompt_tokens_are_counted():
+    before = agent.metrics.snapshot()
+    usages = run_with_stub(StubModel(cached_tokens=1536), [([], "Hi"), ([], "Hello")])
+    after = agent.metrics.snapshot()
+
+    assert usages == [
+        {
+            "requests": 1,
+            "input_tokens": 2000,
+            "output_tokens": 5,
+            "total_tokens": 2005,
+            "cached_tokens": 1536,
+        }
+    ] * 2
+    cached = "agent_cached_input_tokens_total"
+    assert after[cached] - before.get(cached, 0) == 2 * 1536
+    sent = "agent_input_tokens_total"
+    assert after[sent] - before.get(sent, 0) == 2 * 2000
+
+
+if __name__ == "__main__":
+    test_history_is_sent_as_messages_after_a_fixed_prompt()
+    test_cached_prompt_tokens_are_counted()
+    print("✅ Agent input tests passed")
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Tests for the semantic answer cache used for first-turn questions.
+"""
+
+import os
+import sys
+
+# Add src directory to path to import bsc_agents modules
+src_dir = os.path.join(os.path.dirname(__file__), "..", "src")
+sys.path.insert(0, src_dir)
+
+from bsc_agents.answer_cache import AnswerCache
+
+FAFSA = [1.0, 0.0, 0.0]
+FAFSA_REPHRASED = [0.98, 0.2, 0.0]  # cosine ~0.98
+CANVAS = [0.0, 1.0, 0.0]
+
+
+def answer(text):
+    return [
+        {"type": "tool_start", "tool": "search_knowledge_base", "message": "Searching..."},
+        {"type": "chunk", "content": text},
+        {"type": "complete", "final_output": "Response complete"},
+    ]
+
+
+def test_exact_and_similar_questions_hit():
+    cache = AnswerCache(enabled=True, similarity_threshold=0.95)
+    cache.put("When is the FAFSA deadline?", FAFSA, answer("March 1."), 4.0)
+
+    entry, score = cache.get("  when is the FAFSA   deadline? ")
+    assert score == 1.0 and entry.answer == "March 1."
+
+    entry, score = cache.get("FAFSA due date?", FAFSA_REPHRASED)
+    assert entry.answer == "March 1." and score > 0.95
+
+    assert cache.get("How do I log into Canvas?", CANVAS) is None
+    assert cache.get("FAFSA due date?") is None  # No embedding, no semantic lookup
+
+
+def test_stats_report_hit_rate_and_latency_saved():
+    cache = AnswerCache(enabled=True)
+    entry = cache.put("q", FAFSA, answer("a"), generation_seconds=5.0)
+    cache.record_hit(entry, replay_seconds=0.5)
+    cache.record_miss()
+
+    stats = cache.get_stats()
+    assert stats["hits"] == 1 and stats["misses"] == 1
+    assert stats["hit_rate"] == 0.5
+    assert stats["latency_saved_seconds"] == 4.5
+
+
+def test_lru_eviction_respects_byte_budget():
+    cache = AnswerCache(enabled=True, max_bytes=3500)
+    cache.put("a", FAFSA, answer("x" * 1000), 1.0)
+    cache.put("b", CANVAS, answer("y" * 1000), 1.0)
+    cache.get("a")  # a is now the most recently used
+    cache.put("c", [0.0, 0.0, 1.0], answer("z" * 1000), 1.0)
+
+    assert list(cache.entries) == ["a", "c"]
+    assert cache.total_bytes == sum(e.size_bytes for e in cache.entries.values())
+    assert cache.total_bytes <= cache.max_bytes
+    assert cache.put("huge", FAFSA, answer("w" * 5000), 1.0) is None
+
+
+def test_expired_answers_and_invalidation():
+    cache = AnswerCache(enabled=True, ttl_seconds=60)
+    entry = cache.put("q", FAFSA, answer("a"), 1.0)
+    entry.created_at -= 61
+    assert cache.get("q", FAFSA) is None
+    assert cache.total_bytes == 0
+
+    cache.put("q", FAFSA, answer("a"), 1.0)
+    assert cache.invalidate() == 1
+    assert cache.get("q") is None
+    assert cache.get_stats()["invalidations"] == 1
+
+
+def test_similarity_lookup_survives_evictions():
+    # Entries removed from the middle free rows that later answers reuse
+    cache = AnswerCache(enabled=True, max_bytes=16 * 1024)
+    for i in range(60):
+        embedding = [0.0] * 60
+        embedding[i] = 1.0
+        cache.put(f"q{i}", embedding, answer(f"a{i}"), 1.0)
+        if i % 3 == 0:
+            cache.get(f"q{i // 2}")  # Keep some older answers in use
+
+    assert 1 < len(cache.entries) < 60
+    for entry in list(cache.entries.values()):
+        hit, score = cache.get("rephrased", entry.embedding)
+        assert hit is entry and score > 0.99
+    assert cache.get("unrelated", [1.0] + [0.0] * 58 + [1.0]) is None
+
+
+if __name__ == "__main__":
+    test_exact_and_similar_questions_hit()
+    test_stats_report_hit_rate_and_latency_saved()
+    test_lru_eviction_respects_byte_budget()
+    test_expired_answers_and_invalidation()
+    test_similarity_lookup_survives_evictions()
+    print("✅ Answer cache tests passed")
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Tests for batch answering (/api/chat/batch) with the agent run stubbed out.
+"""
+
+import asyncio
+import json
+import os
+import sys
+from contextlib import aclosing
+
+# Add src directory to path to import the API modules
+src_dir = os.path.join(os.path.dirname(__file__), "..", "src")
+sys.path.insert(0, src_dir)
+
+# The agent module builds its OpenAI client on import; no request is ever sent
+os.environ.setdefault("AZURE_OPENAI_API_KEY", "test-key")
+os.environ.setdefault("AZURE_OPENAI_ENDPOINT", "https://example.openai.azure.com")
+
+import httpx
+
+import api
+from bsc_agents import agent
+
+
+class StubRuns:
+    """
+    Stands in for agent.run_agent_events. Each message says how long its run
+    takes ("slow:0.03"); "fail" raises. Tracks how many runs overlap.
+    """
+
+    def __init__(self):
+        self.active = 0
+        self.peak = 0
+        self.started = []
+        self.cancelled = []
+
+    async def __call__(self, message, conversation_history, usage=None):
+        self.started.append(message)
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(float(message.split(":")[1]))
+            if message.startswith("fail"):
+                raise RuntimeError("model unavailable")
+            if usage is not None:
+                usage["output_tokens"] = 3
+            yield {"type": "tool_start", "tool": "knowledge_base_search"}
+            yield {"type": "chunk", "content": f"answer to {message}"}
+        except asyncio.CancelledError:
+            self.cancelled.append(message)
+            raise
+        finally:
+            self.active -= 1
+
+
+def with_stub_runs(scenario):
+    """Run a scenario against stubbed agent runs and fresh batch slots"""
+    stub = StubRuns()
+    original_run, original_slots = agent.run_agent_events, agent.batch_slots
+
+    async def run():
+        agent.batch_slots = asyncio.Semaphore(agent.BATCH_MAX_CONCURRENCY)
+        await scenario(stub)
+
+    agent.run_agent_events = stub
+    try:
+        asyncio.run(run())
+    finally:
+        agent.run_agent_events, agent.batch_slots = original_run, original_slots
+    return stub
+
+
+async def collect(messages, concurrency=None):
+    async with aclosing(agent.stream_batch_for_api(messages, concurrency)) as results:
+        return [result async for result in results]
+
+
+def test_run_batch_item_reports_answer_and_error():
+    async def scenario(stub):
+        ok = await agent.run_batch_item(3, "slow:0")
+        assert ok["index"] == 3 and ok["success"]
+        assert ok["response"] == "answer to slow:0"
+        assert ok["sources"] == ["knowledge_base_search"]
+        assert ok["usage"] == {"output_tokens": 3}
+
+        failed = await agent.run_batch_item(4, "fail:0")
+        assert failed["index"] == 4 and not failed["success"]
+        assert "model unavailable" in failed["error"]
+
+    with_stub_runs(scenario)
+
+
+def test_results_arrive_in_completion_order():
+    messages = ["slow:0.06", "slow:0.0", "slow:0.03", "slow:0.01"]
+
+    async def scenario(stub):
+        results = await collect(messages)
+        assert [result["index"] for result in results] == [1, 3, 2, 0]
+        for result in results:
+            assert result["message"] == messages[result["index"]]
+            assert result["response"] == f"answer to {result['message']}"
+
+    with_stub_runs(scenario)
+
+
+def test_concurrency_is_capped():
+    async def scenario(stub):
+        # Asking for more than the global cap still runs at most that many
+        results = await collect(["slow:0.01"] * 12, concurrency=100)
+        assert len(results) == 12
+        assert stub.peak == agent.BATCH_MAX_CONCURRENCY
+
+        stub.peak = 0
+        await collect(["slow:0.01"] * 6, concurrency=2)
+        assert stub.peak == 2
+
+    with_stub_runs(scenario)
+
+
+def test_failing_item_does_not_stop_the_batch():
+    messages = ["slow:0.01", "fail:0", "slow:0.02"]
+
+    async def scenario(stub):
+        results = {result["index"]: result for result in await collect(messages)}
+        assert sorted(results) == [0, 1, 2]
+        assert not results[1]["success"] and "model unavailable" in results[1]["error"]
+        assert results[0]["success"] and results[2]["success"]
+
+    with_stub_runs(scenario)
+
+
+def test_disconnect_cancels_remaining_runs():
+    messages = ["slow:0"] + ["slow:10"] * 5
+
+    async def scenario(stub):
+        async with aclosing(agent.stream_batch_for_api(messages, 3)) as results:
+            first = await results.__anext__()
+        assert first["index"] == 0
+        # Closing the stream cancels the running items and the queued ones
+        # never start
+        await asyncio.sleep(0.01)
+        assert len(stub.cancelled) == 2 and stub.active == 0
+        assert len(stub.started) == 3
+        assert agent.get_admission_controller().active == 0
+
+    with_stub_runs(scenario)
+
+
+def test_batch_endpoint_streams_ndjson_lines():
+    messages = ["slow:0.04", "fail:0", "slow:0.01"]
+
+    async def scenario(stub):
+        transport = httpx.ASGITransport(app=api.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.post("/api/chat/batch", json={"messages": messages})
+            assert response.status_code == 200
+            assert response.headers["content-type"].startswith("application/x-ndjson")
+            lines = [json.loads(line) for line in response.text.splitlines()]
+            assert [line["index"] for line in lines] == [1, 2, 0]
+            assert [line["success"] for line in lines] == [False, True, True]
+
+            response = await client.post("/api/chat/batch", json={"messages": []})
+            assert response.status_code == 400
+
+    with_stub_runs(scenario)
+
+
+if __name__ == "__main__":
+    test_run_batch_item_reports_answer_and_error()
+    test_results_arrive_in_completion_order()
+    test_concurrency_is_capped()
+    test_failing_item_does_not_stop_the_batch()
+    test_disconnect_cancels_remaining_runs()
+    test_batch_endpoint_streams_ndjson_lines()
+    print("✅ Batch tests passed")
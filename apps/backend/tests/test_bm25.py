@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Tests for the BM25 keyword index and reciprocal rank fusion (hybrid search).
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+from types import SimpleNamespace
+
+# Add src directory to path to import bsc_agents modules
+src_dir = os.path.join(os.path.dirname(__file__), "..", "src")
+sys.path.insert(0, src_dir)
+
+from bsc_agents.bm25 import BM25Index, build_bm25_index, tokenize
+from bsc_agents.retrieval import KeywordSearchClient, RetrievalClient, reciprocal_rank_fusion
+
+CHUNKS = [
+    ("Financial Aid", "The Financial Aid Office is in the Kimball Building, room 196."),
+    ("I-Learn", "Log in to I-Learn to see your courses and grades."),
+    ("Employment", "New student employees submit a W-4 and an I-9 form to payroll."),
+    ("Housing", "Approved housing is listed on the housing portal for each semester."),
+    ("Advising", "Academic advising helps you plan your courses and graduation."),
+]
+
+
+def records():
+    return [
+        {
+            "id": f"doc-{i}#0",
+            "metadata": {"chunk_text": text, "document_title": title, "document_id": f"doc-{i}", "chunk_id": 0},
+        }
+        for i, (title, text) in enumerate(CHUNKS)
+    ]
+
+
+def match(document_id, chunk_id=0):
+    return SimpleNamespace(id=f"{document_id}#{chunk_id}", score=0.5,
+                           metadata={"document_id": document_id, "chunk_id": chunk_id})
+
+
+def test_compound_terms_match_every_spelling():
+    assert {"i-learn", "ilearn", "learn"} <= set(tokenize("I-Learn"))
+    assert "w4" in tokenize("W-4 form") and "the" not in tokenize("the form")
+
+
+def test_exact_names_and_form_numbers_rank_first():
+    with tempfile.TemporaryDirectory() as directory:
+        manifest = build_bm25_index(directory, records())
+        index = BM25Index(directory)
+        assert manifest["count"] == len(index) == 5
+
+        assert index.query("Where is the Kimball Building?", 3).matches[0].id == "doc-0#0"
+        assert index.query("ilearn login", 3).matches[0].id == "doc-1#0"
+        top = index.query("w4 form", 3).matches[0]
+        assert top.id == "doc-2#0" and top.metadata["document_title"] == "Employment"
+        assert index.query("zzz unknown", 3).matches == []
+        index.close()
+
+
+def test_rank_fusion_rewards_agreement():
+    dense = [match("a"), match("b"), match("c")]
+    keyword = [match("c"), match("d")]
+    fused = reciprocal_rank_fusion([dense, keyword], top_k=3)
+
+    assert [m.metadata["document_id"] for m, _ in fused] == ["c", "a", "b"]  # b ties d, ranked first
+    assert fused[0][0] is dense[2]  # Metadata from the first ranking
+    assert reciprocal_rank_fusion([dense, dense], top_k=1)[0][1] == 1.0
+
+
+def test_keyword_client_searches_in_a_thread():
+    with tempfile.TemporaryDirectory() as directory:
+        build_bm25_index(directory, records())
+        client = KeywordSearchClient(directory)
+        assert client.warm_up()
+
+        result = asyncio.run(client.query("housing portal", 2))
+        assert result.matches[0].id == "doc-3#0"
+        assert client.get_stats()["terms"] > 0
+        client.index.close()
+
+    assert not KeywordSearchClient("").configured
+
+
+def test_keyword_index_must_come_from_the_vector_index():
+    pinecone = RetrievalClient(index_name="bsc-kb")
+    with tempfile.TemporaryDirectory() as directory:
+        build_bm25_index(directory, records())
+        try:
+            KeywordSearchClient(directory, vectors=pinecone).warm_up()
+            raise AssertionError("a spreadsheet-built index should be refused for Pinecone")
+        except ValueError as e:
+            assert "built from local, not pinecone:bsc-kb" in str(e)
+
+    with tempfile.TemporaryDirectory() as directory:
+        build_bm25_index(directory, records(), source="pinecone:bsc-kb")
+        client = KeywordSearchClient(directory, vectors=pinecone)
+        assert client.warm_up() and client.get_stats()["source"] == "pinecone:bsc-kb"
+        client.index.close()
+        try:
+            KeywordSearchClient(directory).warm_up()
+            raise AssertionError("a Pinecone export should be refused for the local index")
+        except ValueError:
+            pass
+
+
+if __name__ == "__main__":
+    test_compound_terms_match_every_spelling()
+    test_exact_names_and_form_numbers_rank_first()
+    test_rank_fusion_rewards_agreement()
+    test_keyword_client_searches_in_a_thread()
+    test_keyword_index_must_come_from_the_vector_index()
+    print("✅ BM25 tests passed")
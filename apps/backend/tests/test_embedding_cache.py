@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Tests for the query embedding cache (memory LRU, TTL and SQLite tier).
+"""
+
+import os
+import sys
+import tempfile
+from array import array
+
+# Add src directory to path to import bsc_agents modules
+src_dir = os.path.join(os.path.dirname(__file__), "..", "src")
+sys.path.insert(0, src_dir)
+
+from bsc_agents.embedding_cache import EmbeddingCache
+
+
+def test_hit_by_normalized_text_and_model():
+    cache = EmbeddingCache()
+    stored = cache.put("text-embedding-3-large", "When is FAFSA due?", [0.5, 0.25])
+
+    assert isinstance(stored, array) and stored.typecode == "f"
+    assert cache.get("text-embedding-3-large", "  when is fafsa   due? ") == stored
+    assert cache.get("text-embedding-3-large@256", "When is FAFSA due?") is None
+
+    stats = cache.get_stats()
+    assert stats["memory_hits"] == 1 and stats["misses"] == 1
+    assert stats["hit_rate"] == 0.5
+
+
+def test_byte_budget_evicts_least_recently_used():
+    cache = EmbeddingCache(max_bytes=3 * (200 + 1 + 4 * 100))
+    for name in "abc":
+        cache.put("model", name, [1.0] * 100)
+    cache.get("model", "a")  # a is now the most recently used
+    cache.put("model", "d", [1.0] * 100)
+
+    assert cache.get("model", "b") is None
+    assert cache.get("model", "a") is not None
+    assert len(cache.entries) == 3
+
+
+def test_expired_entries_are_recomputed():
+    cache = EmbeddingCache(ttl_seconds=-1)
+    cache.put("model", "question", [1.0])
+    assert cache.get("model", "question") is None
+    assert not cache.entries
+
+
+def test_persistent_tier_survives_restart():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "embeddings.sqlite")
+        EmbeddingCache(path=path).put("model", "question", [0.125, -2.0])
+
+        restarted = EmbeddingCache(path=path)
+        assert restarted.get("model", "question") == array("f", [0.125, -2.0])
+        assert restarted.get("model", "question") is not None
+        assert restarted.get_stats()["disk_hits"] == 1
+        assert restarted.get_stats()["memory_hits"] == 1
+
+
+def test_disabled_cache_never_hits():
+    cache = EmbeddingCache(enabled=False)
+    cache.put("model", "question", [1.0])
+    assert cache.get("model", "question") is None
+
+
+if __name__ == "__main__":
+    test_hit_by_normalized_text_and_model()
+    test_byte_budget_evicts_least_recently_used()
+    test_expired_entries_are_recomputed()
+    test_persistent_tier_survives_restart()
+    test_disabled_cache_never_hits()
+    print("✅ Embedding cache tests passed")
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Tests for the local memory-mapped vector index (KB_BACKEND=local).
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+# Add src directory to path to import bsc_agents modules
+src_dir = os.path.join(os.path.dirname(__file__), "..", "src")
+sys.path.insert(0, src_dir)
+
+from bsc_agents.local_index import LocalVectorIndex, build_index
+from bsc_agents.retrieval import LocalRetrievalClient
+
+
+def records(count):
+    return [
+        {"id": f"doc-{i}#0", "metadata": {"chunk_text": f"chunk {i}", "document_title": f"Doc {i}"}}
+        for i in range(count)
+    ]
+
+
+def test_exact_search_finds_nearest_with_metadata():
+    vectors = np.random.default_rng(1).normal(size=(500, 32))
+    with tempfile.TemporaryDirectory() as directory:
+        build_index(directory, vectors, records(500), model="text-embedding-3-large")
+        index = LocalVectorIndex(directory)
+
+        result = index.query(vectors[42] * 3.0, top_k=5)
+        assert [match.id for match in result.matches][0] == "doc-42#0"
+        assert abs(result.matches[0].score - 1.0) < 1e-5
+        assert result.matches[0].metadata == {"chunk_text": "chunk 42", "document_title": "Doc 42"}
+        scores = [match.score for match in result.matches]
+        assert scores == sorted(scores, reverse=True)
+        assert index.model == "text-embedding-3-large"
+        index.close()
+
+
+def test_float16_index_ranks_the_same():
+    vectors = np.random.default_rng(2).normal(size=(300, 64))
+    with tempfile.TemporaryDirectory() as directory:
+        build_index(directory, vectors, records(300), model="model", dtype="float16")
+        index = LocalVectorIndex(directory)
+        assert index.vectors.dtype == np.float16
+        assert index.query(vectors[7], top_k=1).matches[0].id == "doc-7#0"
+        index.close()
+
+
+def test_ivf_index_finds_neighbours_in_probed_clusters():
+    rng = np.random.default_rng(3)
+    centers = rng.normal(size=(16, 32))
+    vectors = np.repeat(centers, 100, axis=0) + rng.normal(scale=0.05, size=(1600, 32))
+    with tempfile.TemporaryDirectory() as directory:
+        manifest = build_index(directory, vectors, records(1600), model="model", ivf_lists=16)
+        index = LocalVectorIndex(directory, nprobe=2)
+        assert manifest["ivf_lists"] == 16 and len(index) == 1600
+
+        found = sum(
+            index.query(vectors[i], top_k=1).matches[0].id == f"doc-{i}#0"
+            for i in range(0, 1600, 40)
+        )
+        assert found == 40
+        index.close()
+
+
+def test_client_queries_without_blocking_the_loop():
+    vectors = np.random.default_rng(4).normal(size=(100, 16))
+    with tempfile.TemporaryDirectory() as directory:
+        build_index(directory, vectors, records(100), model="model")
+        client = LocalRetrievalClient(directory)
+        assert client.configured and client.warm_up()
+
+        result = asyncio.run(client.query(vector=vectors[3].tolist(), top_k=3, namespace="ignored"))
+        assert result.matches[0].id == "doc-3#0" and len(result.matches) == 3
+        assert client.get_stats()["count"] == 100
+        client.index.close()
+
+    assert not LocalRetrievalClient("").configured
+
+
+if __name__ == "__main__":
+    test_exact_search_finds_nearest_with_metadata()
+    test_float16_index_ranks_the_same()
+    test_ivf_index_finds_neighbours_in_probed_clusters()
+    test_client_queries_without_blocking_the_loop()
+    print("✅ Local index tests passed")
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Consistency tests for the memory manager's running totals: after any mix of
+adds, evictions, clears and expiry they must match a full recount.
+"""
+
+import os
+import random
+import sys
+import time
+
+# Add src directory to path to import bsc_agents modules
+src_dir = os.path.join(os.path.dirname(__file__), "..", "src")
+sys.path.insert(0, src_dir)
+
+from bsc_agents.memory import ConversationMemoryManager
+
+
+def recount(manager: ConversationMemoryManager) -> dict:
+    """The stats computed the slow way, by scanning every session"""
+    sessions = list(manager.sessions.values())
+    messages = [message for session in sessions for message in session.messages]
+    return {
+        "total_sessions": len(sessions),
+        "total_messages": len(messages),
+        "user_messages": sum(m.role == "user" for m in messages),
+        "assistant_messages": sum(m.role == "assistant" for m in messages),
+        "oldest": min((s.created_at for s in sessions), default=None),
+        "newest": max((s.created_at for s in sessions), default=None),
+    }
+
+
+def assert_consistent(manager: ConversationMemoryManager) -> None:
+    stats = manager.get_session_stats()
+    expected = recount(manager)
+    for key in ("total_sessions", "total_messages", "user_messages", "assistant_messages"):
+        assert stats[key] == expected[key], (key, stats[key], expected[key])
+
+    if manager.sessions:
+        now = time.time()
+        assert abs(stats["oldest_session_age_seconds"] - (now - expected["oldest"])) < 0.2
+        assert abs(stats["newest_session_age_seconds"] - (now - expected["newest"])) < 0.2
+
+
+def test_totals_match_recount_after_random_operations():
+    rng = random.Random(13)
+    manager = ConversationMemoryManager(max_sessions=20)
+    session_ids = [f"session_{i}" for i in range(40)]
+
+    for _ in range(2000):
+        session_id = rng.choice(session_ids)
+        action = rng.random()
+        if action < 0.45:
+            manager.add_user_message(session_id, "question")
+        elif action < 0.85:
+            manager.add_assistant_message(session_id, "answer")
+        elif action < 0.95:
+            manager.clear_session(session_id)
+        else:
+            # Expire a random session and let the sweep remove it
+            if manager.sessions:
+                victim = rng.choice(list(manager.sessions.values()))
+                victim.last_activity -= manager.session_timeout_hours * 3600 + 1
+                manager.cleanup_expired_sessions()
+        assert_consistent(manager)
+
+    assert len(manager.sessions) <= manager.max_sessions
+
+
+def test_removed_session_no_longer_counts():
+    manager = ConversationMemoryManager()
+    session = manager.add_user_message("gone", "hello")
+    manager.clear_session("gone")
+
+    # A caller still holding the old session must not change the totals
+    session.add_message("assistant", "late answer")
+    assert manager.get_session_stats()["total_messages"] == 0
+    assert_consistent(manager)
+
+
+if __name__ == "__main__":
+    test_totals_match_recount_after_random_operations()
+    test_removed_session_no_longer_counts()
+    print("✅ Memory stats tests passed")
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Tests for the in-process metrics registry and its Prometheus text output.
+"""
+
+import os
+import sys
+
+# Add src directory to path to import bsc_agents modules
+src_dir = os.path.join(os.path.dirname(__file__), "..", "src")
+sys.path.insert(0, src_dir)
+
+from bsc_agents.metrics import MAX_LABEL_SETS, MetricsRegistry
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = MetricsRegistry()
+    latency = registry.histogram("stage_seconds", "Stage latency", buckets=(0.1, 1))
+    for value in (0.05, 0.1, 0.5, 3):
+        latency.observe(value)
+
+    lines = registry.render_prometheus().splitlines()
+    assert lines[:2] == ["# HELP stage_seconds Stage latency", "# TYPE stage_seconds histogram"]
+    assert 'stage_seconds_bucket{le="0.1"} 2' in lines  # le is inclusive
+    assert 'stage_seconds_bucket{le="1"} 3' in lines
+    assert 'stage_seconds_bucket{le="+Inf"} 4' in lines
+    assert "stage_seconds_sum 3.65" in lines
+    assert "stage_seconds_count 4" in lines
+
+
+def test_labelled_counters_share_one_family():
+    registry = MetricsRegistry()
+    registry.counter("tool_calls_total", "Tool calls", {"tool": "search_knowledge_base"}).inc()
+    registry.counter("tool_calls_total", "Tool calls", {"tool": "search_knowledge_base"}).inc()
+    registry.counter("tool_calls_total", "Tool calls", {"tool": 'odd "name"'}).inc()
+
+    text = registry.render_prometheus()
+    assert text.count("# TYPE tool_calls_total counter") == 1
+    assert 'tool_calls_total{tool="search_knowledge_base"} 2' in text
+    assert 'tool_calls_total{tool="odd \\"name\\""} 1' in text
+
+
+def test_label_sets_are_bounded():
+    registry = MetricsRegistry()
+    for i in range(MAX_LABEL_SETS + 50):
+        registry.counter("tool_calls_total", labels={"tool": f"tool_{i}"}).inc()
+
+    snapshot = registry.snapshot()
+    assert len(snapshot) == MAX_LABEL_SETS + 1
+    assert snapshot['tool_calls_total{tool="other"}'] == 50
+
+
+def test_metric_kind_cannot_change():
+    registry = MetricsRegistry()
+    registry.counter("runs_total")
+    try:
+        registry.histogram("runs_total")
+        assert False, "a counter can't be reused as a histogram"
+    except ValueError:
+        pass
+
+
+if __name__ == "__main__":
+    test_histogram_buckets_are_cumulative()
+    test_labelled_counters_share_one_family()
+    test_label_sets_are_bounded()
+    test_metric_kind_cannot_change()
+    print("✅ Metrics tests passed")
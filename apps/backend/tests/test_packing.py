@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Tests for packing knowledge base results into a token budget.
+"""
+
+import os
+import sys
+from types import SimpleNamespace
+
+# Add src directory to path to import bsc_agents modules
+src_dir = os.path.join(os.path.dirname(__file__), "..", "src")
+sys.path.insert(0, src_dir)
+
+from bsc_agents.packing import ContextPacker, estimate_tokens, format_matches
+
+
+def match(document, chunk_id, text, urls=None):
+    return SimpleNamespace(
+        id=f"{document}#{chunk_id}",
+        metadata={
+            "chunk_text": text,
+            "document_title": document.title(),
+            "document_id": document,
+            "chunk_id": chunk_id,
+            "category": "Financial Aid",
+            "extracted_urls": urls or [],
+        },
+    )
+
+
+def test_chunks_of_a_document_are_merged_in_order():
+    ranked = [
+        (match("aid", 2, "Second part.", ["https://byui.edu/b"]), 0.9),
+        (match("housing", 0, "Housing text."), 0.8),
+        (match("aid", 1, "First part.", ["https://byui.edu/a"]), 0.7),
+        (match("aid", 5, "Much later part."), 0.6),
+    ]
+    results = ContextPacker().pack(ranked)
+
+    assert [result["source"] for result in results] == ["Aid", "Housing"]
+    assert results[0]["content"] == "First part.\n\nSecond part.\n\n[…]\n\nMuch later part."
+    assert results[0]["score"] == 0.9
+    assert results[0]["metadata"]["extracted_urls"] == ["https://byui.edu/a", "https://byui.edu/b"]
+    assert "chunk_text" not in results[0]["metadata"]
+
+
+def test_near_duplicates_are_dropped():
+    text = "Submit the FAFSA by March 1 to be considered for the priority deadline and state aid."
+    ranked = [
+        (match("aid", 0, text), 0.9),
+        (match("aid-copy", 0, text + " Thanks!"), 0.8),
+        (match("other", 0, "Completely different text about parking permits on campus."), 0.7),
+    ]
+    assert [result["source"] for result in ContextPacker().pack(ranked)] == ["Aid", "Other"]
+
+
+def test_output_fits_the_token_budget():
+    ranked = [
+        (match(f"doc{i}", 0, " ".join(f"word{i}x{j}" for j in range(300))), 1.0 - i / 10)
+        for i in range(10)
+    ]
+    raw_tokens = estimate_tokens(str(format_matches(ranked)))
+    results = ContextPacker(token_budget=1000).pack(ranked)
+
+    packed_tokens = estimate_tokens(str(results))
+    assert packed_tokens <= 1000 < raw_tokens / 4
+    assert results[-1]["content"].endswith(" …")
+    assert results[0]["source"] == "Doc0"
+
+
+def test_best_document_is_kept_even_over_budget():
+    results = ContextPacker(token_budget=10).pack([(match("aid", 0, "word " * 500), 0.9)])
+    assert len(results) == 1 and results[0]["content"].endswith(" …")
+
+
+def test_disabled_packer_returns_one_result_per_match():
+    ranked = [(match("aid", 0, "Text."), 0.9), (match("aid", 1, "More."), 0.8)]
+    results = ContextPacker(enabled=False).pack(ranked)
+    assert len(results) == 2 and results[0]["metadata"]["chunk_text"] == "Text."
+
+
+if __name__ == "__main__":
+    test_chunks_of_a_document_are_merged_in_order()
+    test_near_duplicates_are_dropped()
+    test_output_fits_the_token_budget()
+    test_best_document_is_kept_even_over_budget()
+    test_disabled_packer_returns_one_result_per_match()
+    print("✅ Packing tests passed")
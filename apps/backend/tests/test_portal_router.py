@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Tests for the portal fast path that answers link questions without the agent.
+"""
+
+import json
+import os
+import sys
+import tempfile
+
+# Add src directory to path to import bsc_agents modules
+src_dir = os.path.join(os.path.dirname(__file__), "..", "src")
+sys.path.insert(0, src_dir)
+
+from bsc_agents.portal_router import PortalRouter
+from bsc_agents.portals import PortalIndex
+
+
+def routed(router, message):
+    decision = router.route(message)
+    return decision.portal["name"] if decision.portal else None
+
+
+def test_link_questions_are_answered_from_the_catalogue():
+    router = PortalRouter()
+    assert routed(router, "What's the link to Workday?") == "Workday"
+    assert routed(router, "where is iPlan") == "Graduation Planner (iPlan)"
+    assert routed(router, "Canvas login") == "Canvas (I-Learn)"
+    assert routed(router, "How do I log in to I-Learn?") == "Canvas (I-Learn)"
+
+    answer = router.answer(router.route("Canvas login").portal)
+    assert "https://byui.instructure.com/" in answer and "**Canvas (I-Learn)**" in answer
+
+
+def test_anything_else_falls_through():
+    router = PortalRouter()
+    for message, reason in [
+        ("How do I submit homework in Canvas?", "no_link_intent"),
+        ("Is Workday down today?", "no_link_intent"),
+        ("Regent login", "ambiguous"),  # Financial aid and tuition both go by Regent
+        ("link to my grades", "low_confidence"),  # Only a keyword
+        ("Where is the Kimball Building?", "no_match"),
+        ("Where can I find the link to Canvas so I can check my grades and email my teacher?", "length"),
+    ]:
+        decision = router.route(message)
+        assert decision.portal is None and decision.reason == reason, message
+
+    stats = router.get_stats()
+    assert stats["hits"] == 0 and stats["fallthroughs"] == 6
+    assert not PortalRouter(enabled=False).route("Canvas login").portal
+
+
+def test_threshold_is_configurable_and_catalogue_changes_apply():
+    catalogue = {"portals": {"categories": {"general": {"portals": [
+        {"id": "alpha", "name": "Alpha Portal", "url": "https://alpha.example", "purpose": "Alpha things"}
+    ]}}}}
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "portals.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(catalogue, f)
+        portals = PortalIndex(path, check_interval_seconds=0)
+
+        assert routed(PortalRouter(portals), "alpha portal link") == "Alpha Portal"
+        assert routed(PortalRouter(portals), "alpha portal link for payroll") is None
+        assert routed(PortalRouter(portals, min_confidence=0.7), "alpha portal link for payroll") == "Alpha Portal"
+
+        catalogue["portals"]["categories"]["general"]["portals"][0]["aliases"] = ["Beta"]
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(catalogue, f)
+        os.utime(path, (1, 1))
+        assert routed(PortalRouter(portals), "beta login") == "Alpha Portal"
+
+
+def test_unreadable_catalogue_falls_through():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "portals.json")
+        router = PortalRouter(PortalIndex(path, check_interval_seconds=0))
+        decision = router.route("Canvas login")  # Missing file
+        assert decision.portal is None and decision.reason == "error"
+
+        with open(path, "w", encoding="utf-8") as f:
+            f.write('{"portals": {"categ')  # Half-written file
+        decision = router.route("Canvas login")
+        assert decision.portal is None and decision.reason == "error"
+        assert router.get_stats()["reasons"] == {"error": 2}
+
+
+if __name__ == "__main__":
+    test_link_questions_are_answered_from_the_catalogue()
+    test_anything_else_falls_through()
+    test_threshold_is_configurable_and_catalogue_changes_apply()
+    test_unreadable_catalogue_falls_through()
+    print("✅ Portal router tests passed")
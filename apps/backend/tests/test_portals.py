@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Tests for the compiled portal index behind lookup_portals_and_resources.
+"""
+
+import json
+import os
+import sys
+import tempfile
+
+# Add src directory to path to import bsc_agents modules
+src_dir = os.path.join(os.path.dirname(__file__), "..", "src")
+sys.path.insert(0, src_dir)
+
+from bsc_agents.portals import PortalIndex, get_portal_index
+
+
+def scan(data, query="", category=""):
+    """The original lookup: a substring scan over every portal"""
+    names = []
+    for cat_name, cat_data in data["portals"]["categories"].items():
+        if category and cat_name != category:
+            continue
+        for portal in cat_data.get("portals", []):
+            q = query.lower()
+            if not q or (
+                q in portal.get("name", "").lower()
+                or q in portal.get("purpose", "").lower()
+                or any(q in k.lower() for k in portal.get("keywords", []))
+                or any(q in a.lower() for a in portal.get("aliases", []))
+            ):
+                names.append(portal["name"])
+    return names
+
+
+def test_lookup_matches_the_original_scan():
+    index = get_portal_index()
+    with open(index.path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    queries = ["", "canvas", "I-Learn", "learn", "EMAIL", "grades", "e", "zzz", "student records", "LMS"]
+    for query in queries:
+        for category in ("", "academic", "student_services", "missing"):
+            found = [portal["name"] for portal in index.lookup(query, category)]
+            assert found == scan(data, query, category), (query, category)
+
+
+def test_results_are_prebuilt_with_category():
+    index = get_portal_index()
+    first = index.lookup("canvas")[0]
+    assert first is index.lookup("canvas")[0]  # Shared, not copied per call
+    assert first["category"] == "academic" and first["url"].startswith("https://")
+    assert index.get("CANVAS") is first and index.get("Canvas (I-Learn)") is first
+    assert index.get("no such portal") is None
+
+
+def test_file_is_recompiled_when_it_changes():
+    catalogue = {"portals": {"categories": {"general": {"portals": [{"id": "a", "name": "Alpha"}]}}}}
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "portals.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(catalogue, f)
+        index = PortalIndex(path, check_interval_seconds=0)
+        assert [p["name"] for p in index.lookup()] == ["Alpha"]
+        index.lookup()
+        assert index.reloads == 1  # Unchanged file: not read again
+
+        catalogue["portals"]["categories"]["general"]["portals"].append({"id": "b", "name": "Beta"})
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(catalogue, f)
+        os.utime(path, (1, 1))  # A different mtime even on coarse clocks
+        assert [p["name"] for p in index.lookup("beta")] == ["Beta"]
+        assert index.reloads == 2
+
+
+def test_broken_file_keeps_the_loaded_catalogue():
+    catalogue = {"portals": {"categories": {"general": {"portals": [{"id": "a", "name": "Alpha"}]}}}}
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "portals.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(catalogue, f)
+        index = PortalIndex(path, check_interval_seconds=0)
+        assert [p["name"] for p in index.lookup()] == ["Alpha"]
+
+        with open(path, "w", encoding="utf-8") as f:
+            f.write('{"portals": {"categ')  # Half-written
+        os.utime(path, (1, 1))
+        assert [p["name"] for p in index.lookup()] == ["Alpha"]
+        assert index.reloads == 1
+
+        os.remove(path)
+        assert [p["name"] for p in index.lookup()] == ["Alpha"]
+
+        # Fixed file: picked up on its next change
+        catalogue["portals"]["categories"]["general"]["portals"][0]["name"] = "Alpha 2"
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(catalogue, f)
+        os.utime(path, (2, 2))
+        assert [p["name"] for p in index.lookup()] == ["Alpha 2"]
+        assert index.reloads == 2
+
+
+def test_unreadable_file_raises_before_first_load():
+    with tempfile.TemporaryDirectory() as directory:
+        index = PortalIndex(os.path.join(directory, "portals.json"))
+        try:
+            index.lookup("canvas")
+        except FileNotFoundError:
+            pass
+        else:
+            raise AssertionError("a missing catalogue should raise until one has loaded")
+
+
+if __name__ == "__main__":
+    test_lookup_matches_the_original_scan()
+    test_results_are_prebuilt_with_category()
+    test_file_is_recompiled_when_it_changes()
+    test_broken_file_keeps_the_loaded_catalogue()
+    test_unreadable_file_raises_before_first_load()
+    print("✅ Portal index tests passed")
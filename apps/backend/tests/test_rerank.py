@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Tests for reranking and cutting knowledge base candidates.
+"""
+
+import os
+import sys
+from types import SimpleNamespace
+
+# Add src directory to path to import bsc_agents modules
+src_dir = os.path.join(os.path.dirname(__file__), "..", "src")
+sys.path.insert(0, src_dir)
+
+from bsc_agents.rerank import Reranker
+
+
+def candidate(name, score, text, title="Other"):
+    return SimpleNamespace(id=name, metadata={"chunk_text": text, "document_title": title}), score
+
+
+def test_term_and_title_matches_move_up():
+    ranked = [
+        candidate("general", 0.80, "Students can find many resources on campus."),
+        candidate("parking", 0.78, "Buy a parking permit online before the semester.", "Parking FAQ"),
+        candidate("food", 0.60, "The dining halls serve breakfast daily."),
+    ]
+    results = Reranker(min_results=1).rerank("parking permit", ranked, 10)
+    assert results[0][0].id == "parking"
+
+
+def test_results_are_cut_at_the_knee():
+    ranked = [candidate(f"good{i}", 0.85 - i / 100, "fafsa deadline march") for i in range(3)]
+    ranked += [candidate(f"weak{i}", 0.40 - i / 100, "unrelated text") for i in range(7)]
+    results = Reranker().rerank("FAFSA deadline", ranked, 10)
+
+    assert [match.id for match, _ in results] == ["good0", "good1", "good2"]
+    scores = [score for _, score in results]
+    assert scores == sorted(scores, reverse=True)
+
+
+def test_min_results_and_top_k_bound_the_cut():
+    ranked = [candidate("a", 0.9, "alpha"), candidate("b", 0.1, "beta")]
+    assert len(Reranker(min_results=2).rerank("alpha", ranked, 10)) == 2
+    assert len(Reranker(min_results=1).rerank("alpha", ranked, 10)) == 1
+
+    ranked = [candidate(str(i), 0.9, "same text") for i in range(10)]
+    assert len(Reranker().rerank("same text", ranked, 4)) == 4
+
+
+def test_disabled_reranker_keeps_retrieval_order():
+    reranker = Reranker(enabled=False, candidates=30)
+    ranked = [candidate(str(i), 0.9 - i / 10, "text") for i in range(5)]
+    assert reranker.fetch_count(3) == 3
+    assert reranker.rerank("query", ranked, 3) == ranked[:3]
+    assert Reranker(candidates=30).fetch_count(10) == 30
+
+
+def test_irrelevant_candidates_return_nothing():
+    # Rescaling alone would turn the best of these into a perfect score
+    ranked = [candidate(f"off{i}", 0.08 - i / 100, "dining hall menu") for i in range(5)]
+    assert Reranker().rerank("FAFSA deadline", ranked, 10) == []
+
+    ranked.insert(0, candidate("fafsa", 0.62, "The FAFSA deadline is March 1."))
+    results = Reranker().rerank("FAFSA deadline", ranked, 10)
+    assert [match.id for match, _ in results] == ["fafsa"]
+
+
+if __name__ == "__main__":
+    test_term_and_title_matches_move_up()
+    test_results_are_cut_at_the_knee()
+    test_min_results_and_top_k_bound_the_cut()
+    test_disabled_reranker_keeps_retrieval_order()
+    test_irrelevant_candidates_return_nothing()
+    print("✅ Rerank tests passed")
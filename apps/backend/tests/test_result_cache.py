@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Tests for the knowledge base result cache and the index version token.
+"""
+
+import os
+import sys
+import tempfile
+
+# Add src directory to path to import bsc_agents modules
+src_dir = os.path.join(os.path.dirname(__file__), "..", "src")
+sys.path.insert(0, src_dir)
+
+from bsc_agents.retrieval import IndexVersion, ResultCache
+
+RESULTS = [{"content": "FAFSA is due March 1", "source": "Financial Aid", "score": 0.9}]
+
+
+def test_hit_needs_same_query_top_k_namespace_and_filter():
+    cache = ResultCache(IndexVersion())
+    cache.put(cache.key("model", "When is FAFSA due?", 10, "aid"), RESULTS)
+
+    assert cache.get(cache.key("model", "when is fafsa  due?", 10, "aid")) == RESULTS
+    assert cache.get(cache.key("model", "When is FAFSA due?", 5, "aid")) is None
+    assert cache.get(cache.key("model", "When is FAFSA due?", 10, "")) is None
+    assert cache.get(cache.key("model", "When is FAFSA due?", 10, "aid", {"year": 2025})) is None
+    assert cache.get_stats()["hit_rate"] == 0.25
+
+
+def test_entries_expire_and_are_bounded():
+    cache = ResultCache(IndexVersion(), ttl_seconds=-1)
+    cache.put(cache.key("model", "q", 10), RESULTS)
+    assert cache.get(cache.key("model", "q", 10)) is None
+
+    cache = ResultCache(IndexVersion(), max_entries=2)
+    for query in ("a", "b", "c"):
+        cache.put(cache.key("model", query, 10), RESULTS)
+    assert cache.get(cache.key("model", "a", 10)) is None
+    assert len(cache.entries) == 2
+
+
+def test_new_index_version_clears_derived_caches():
+    version = IndexVersion()
+    cache = ResultCache(version)
+    cleared = []
+    version.on_change(lambda: cleared.append(version.token))
+    cache.put(cache.key("model", "q", 10), RESULTS)
+
+    token = version.bump()
+    assert cleared == [token]
+    assert cache.get(cache.key("model", "q", 10)) is None
+
+    version.bump(token)  # Same version again: nothing to drop
+    assert cleared == [token]
+
+
+def test_version_file_is_shared_between_workers():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "kb-version")
+        ingestion = IndexVersion(path)
+        worker = IndexVersion(path, check_interval_seconds=0)
+        cache = ResultCache(worker)
+        cache.put(cache.key("model", "q", 10), RESULTS)
+
+        ingestion.bump("2025-06-01")
+        assert cache.get(cache.key("model", "q", 10)) is None
+        assert worker.token == "2025-06-01"
+        assert IndexVersion(path).token == "2025-06-01"  # A restarted worker too
+
+
+if __name__ == "__main__":
+    test_hit_needs_same_query_top_k_namespace_and_filter()
+    test_entries_expire_and_are_bounded()
+    test_new_index_version_clears_derived_caches()
+    test_version_file_is_shared_between_workers()
+    print("✅ Result cache tests passed")
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Tests for the retrieval client: Pinecone queries must not block the event
+loop, are bounded by the pool size and give up after the timeout.
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+# Add src directory to path to import bsc_agents modules
+src_dir = os.path.join(os.path.dirname(__file__), "..", "src")
+sys.path.insert(0, src_dir)
+
+from bsc_agents.retrieval import RetrievalClient
+
+
+class SlowIndex:
+    """Stands in for a Pinecone index whose query is a blocking round-trip"""
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.calls = 0
+
+    def query(self, **kwargs):
+        self.calls += 1
+        time.sleep(self.seconds)
+        return {"top_k": kwargs["top_k"]}
+
+
+def make_client(seconds: float, pool_size: int = 2, timeout_seconds: float = 5.0):
+    client = RetrievalClient(
+        api_key="test", pool_size=pool_size, timeout_seconds=timeout_seconds
+    )
+    client._index = SlowIndex(seconds)  # Skip creating a real Pinecone client
+    return client
+
+
+def test_queries_do_not_block_the_loop():
+    async def scenario():
+        client = make_client(0.2, pool_size=2)
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        ticking = asyncio.create_task(ticker())
+        started = time.perf_counter()
+        results = await asyncio.gather(
+            client.query([0.1], top_k=3), client.query([0.2], top_k=4)
+        )
+        elapsed = time.perf_counter() - started
+        ticking.cancel()
+
+        assert results == [{"top_k": 3}, {"top_k": 4}]
+        assert elapsed < 0.35  # Both ran at once on the pool
+        assert ticks >= 10  # The loop kept running during the round-trips
+
+    asyncio.run(scenario())
+
+
+def test_pool_size_bounds_concurrent_queries():
+    async def scenario():
+        client = make_client(0.1, pool_size=1)
+        started = time.perf_counter()
+        await asyncio.gather(*(client.query([0.1], top_k=1) for _ in range(3)))
+        assert time.perf_counter() - started >= 0.3
+
+    asyncio.run(scenario())
+
+
+def test_slow_query_times_out():
+    async def scenario():
+        client = make_client(0.5, timeout_seconds=0.1)
+        started = time.perf_counter()
+        try:
+            await client.query([0.1], top_k=1)
+            assert False, "the query should have timed out"
+        except TimeoutError as e:
+            assert "timed out" in str(e)
+        assert time.perf_counter() - started < 0.3
+
+    asyncio.run(scenario())
+
+
+if __name__ == "__main__":
+    test_queries_do_not_block_the_loop()
+    test_pool_size_bounds_concurrent_queries()
+    test_slow_query_times_out()
+    print("✅ Retrieval client tests passed")
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Tests for the server launch options in run_python_api.py.
+"""
+
+import os
+import sys
+
+# Add src directory to path to import the API modules
+src_dir = os.path.join(os.path.dirname(__file__), "..", "src")
+sys.path.insert(0, src_dir)
+
+from run_python_api import server_options
+
+
+def with_env(**values):
+    """Set environment variables for one call; None unsets"""
+    saved = {name: os.environ.get(name) for name in values}
+    for name, value in values.items():
+        if value is None:
+            os.environ.pop(name, None)
+        else:
+            os.environ[name] = value
+    return saved
+
+
+def restore(saved):
+    with_env(**saved)
+
+
+def test_web_concurrency_sets_the_worker_count():
+    saved = with_env(WEB_CONCURRENCY=" 3 ", SESSION_MEMORY_PER_WORKER="true")
+    try:
+        assert server_options(production=True)["workers"] == 3
+    finally:
+        restore(saved)
+
+
+def test_invalid_web_concurrency_is_refused():
+    for value in ("0", "-2", "four", "1.5"):
+        saved = with_env(WEB_CONCURRENCY=value, SESSION_MEMORY_PER_WORKER="true")
+        try:
+            server_options(production=True)
+            raise AssertionError(f"WEB_CONCURRENCY={value} should be refused")
+        except RuntimeError as e:
+            assert "WEB_CONCURRENCY must be a whole number" in str(e) and repr(value) in str(e)
+        finally:
+            restore(saved)
+
+
+def test_development_mode_ignores_web_concurrency():
+    saved = with_env(WEB_CONCURRENCY="bad")
+    try:
+        assert server_options(production=False) == {"reload": True, "log_level": "info"}
+    finally:
+        restore(saved)
+
+
+if __name__ == "__main__":
+    test_web_concurrency_sets_the_worker_count()
+    test_invalid_web_concurrency_is_refused()
+    test_development_mode_ignores_web_concurrency()
+    print("✅ Server option tests passed")
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Tests for single-flight sharing of identical in-progress agent runs.
+"""
+
+import asyncio
+import os
+import sys
+
+# Add src directory to path to import bsc_agents modules
+src_dir = os.path.join(os.path.dirname(__file__), "..", "src")
+sys.path.insert(0, src_dir)
+
+from bsc_agents.single_flight import SingleFlight
+
+
+class FakeRun:
+    """Stands in for run_agent_events and records how it ended"""
+
+    def __init__(self, chunks, fail=False):
+        self.chunks = chunks
+        self.fail = fail
+        self.cancelled = False
+
+    async def events(self):
+        try:
+            for chunk in self.chunks:
+                await asyncio.sleep(0.01)
+                yield {"type": "chunk", "content": chunk}
+            if self.fail:
+                raise RuntimeError("model unavailable")
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+
+
+async def collect(events):
+    return [event["content"] async for event in events]
+
+
+def test_identical_questions_share_one_run():
+    async def scenario():
+        flights = SingleFlight()
+        key = "when does registration open?"
+        run = FakeRun(["Registration ", "opens ", "Nov 1."])
+        assert flights.join(key) is None
+
+        leader = asyncio.create_task(collect(flights.lead(key, run.events())))
+        await asyncio.sleep(0.015)  # Late joiners still get the whole answer
+        followers = [flights.join(key) for _ in range(3)]
+        results = await asyncio.gather(leader, *[collect(f) for f in followers])
+
+        assert all(r == ["Registration ", "opens ", "Nov 1."] for r in results)
+        assert flights.join(key) is None
+
+    asyncio.run(scenario())
+
+
+def test_run_is_cancelled_when_every_subscriber_leaves():
+    async def scenario():
+        flights = SingleFlight()
+        run = FakeRun(["a"] * 100)
+        leader = flights.lead("q", run.events())
+        follower = flights.join("q")
+        await leader.__anext__()
+        await follower.__anext__()
+
+        await leader.aclose()
+        await asyncio.sleep(0.02)
+        assert not run.cancelled  # The follower is still listening
+
+        await follower.aclose()
+        assert flights.join("q") is None  # New callers start a fresh run
+        await asyncio.sleep(0.02)
+        assert run.cancelled
+
+    asyncio.run(scenario())
+
+
+def test_errors_reach_every_subscriber():
+    async def scenario():
+        flights = SingleFlight()
+        leader = flights.lead("q", FakeRun(["partial"], fail=True).events())
+        follower = flights.join("q")
+        results = await asyncio.gather(
+            collect(leader), collect(follower), return_exceptions=True
+        )
+        assert all(isinstance(r, RuntimeError) for r in results)
+
+    asyncio.run(scenario())
+
+
+if __name__ == "__main__":
+    test_identical_questions_share_one_run()
+    test_run_is_cancelled_when_every_subscriber_leaves()
+    test_errors_reach_every_subscriber()
+    print("✅ Single-flight tests passed")
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Tests for the shared SSE encoding layer and replay buffers used by the streaming endpoints.
+"""
+
+import asyncio
+import json
+import os
+import sys
+
+# Add src directory to path to import the API modules
+src_dir = os.path.join(os.path.dirname(__file__), "..", "src")
+sys.path.insert(0, src_dir)
+
+from sse import ReplayRegistry, SSEEncoder, sse_response
+
+
+def parse_frame(frame: bytes) -> dict:
+    """Split an SSE frame into its id (if any) and decoded JSON data"""
+    assert frame.endswith(b"\n\n")
+    fields = dict(
+        line.split(": ", 1) for line in frame.decode("utf-8").strip("\n").split("\n")
+    )
+    return {"id": fields.get("id"), "data": json.loads(fields["data"])}
+
+
+def test_event_frames_match_frontend_format():
+    encoder = SSEEncoder()
+    frame = parse_frame(encoder.event("chunk", 'Say "hi" 👋\nto BYU-Idaho'))
+
+    assert frame["id"] == "1"
+    assert frame["data"]["type"] == "chunk"
+    assert frame["data"]["content"] == 'Say "hi" 👋\nto BYU-Idaho'
+    assert isinstance(frame["data"]["timestamp"], int)
+
+
+def test_event_ids_are_consecutive_and_optional():
+    encoder = SSEEncoder()
+    ids = [parse_frame(encoder.event("tool", "Searching..."))["id"] for _ in range(3)]
+    final = parse_frame(encoder.event("done", "Stream completed", with_id=False))
+
+    assert ids == ["1", "2", "3"]
+    assert final["id"] is None
+    assert encoder.last_event_id == 3
+
+
+def test_prefixed_ids_carry_the_request_id():
+    encoder = SSEEncoder(id_prefix="abc123")
+    assert parse_frame(encoder.event("chunk", "Hi"))["id"] == "abc123:1"
+
+
+async def produce(frames):
+    for frame in frames:
+        await asyncio.sleep(0)
+        yield frame
+
+
+async def collect(subscription):
+    return [frame async for frame in subscription]
+
+
+def test_reconnect_resumes_after_last_event_id():
+    async def scenario():
+        registry = ReplayRegistry()
+        stream = registry.create("session-1")
+        encoder = SSEEncoder(id_prefix=stream.request_id)
+        frames = [
+            encoder.event("chunk", "Hello. "),
+            encoder.comment(),
+            encoder.event("chunk", "More. "),
+            encoder.event("done", "Response complete"),
+        ]
+        original = asyncio.create_task(collect(stream.subscribe()))
+        await stream.record(produce(frames))
+        assert await original == frames
+
+        resumed = registry.resume("session-1", f"{stream.request_id}:1")
+        assert resumed is not None
+        replay_stream, after_event_id = resumed
+        # The stale heartbeat in the backlog is skipped
+        assert await collect(replay_stream.subscribe(after_event_id)) == frames[2:]
+
+        assert registry.resume("other-session", f"{stream.request_id}:1") is None
+        assert registry.resume("session-1", "not-an-id") is None
+
+    asyncio.run(scenario())
+
+
+def test_resume_refused_when_events_were_evicted():
+    async def scenario():
+        registry = ReplayRegistry(max_events=2)
+        stream = registry.create("s")
+        encoder = SSEEncoder(id_prefix=stream.request_id)
+        await stream.record(produce([encoder.event("chunk", str(i)) for i in range(4)]))
+
+        assert registry.resume("s", f"{stream.request_id}:1") is None
+        assert registry.resume("s", f"{stream.request_id}:2") is not None
+
+    asyncio.run(scenario())
+
+
+def test_finished_streams_expire():
+    async def scenario():
+        registry = ReplayRegistry(ttl_seconds=0)
+        stream = registry.create("s")
+        await stream.record(produce([]))
+        stream.finished_at -= 1
+        assert registry.cleanup_expired() == 1
+        assert registry.resume("s", f"{stream.request_id}:0") is None
+
+    asyncio.run(scenario())
+
+
+def test_abandoned_run_is_cancelled_after_grace_period():
+    async def scenario():
+        registry = ReplayRegistry(reconnect_grace_seconds=0.05)
+        stream = registry.create("s")
+        stream.producer = asyncio.create_task(stream.record(produce_forever()))
+
+        subscription = stream.subscribe()
+        await subscription.__anext__()
+        await subscription.aclose()  # Client disconnects
+        assert stream.subscribers == 0
+
+        # A reconnect inside the grace period keeps the run alive
+        await asyncio.sleep(0.02)
+        reconnected = stream.subscribe()
+        await reconnected.__anext__()
+        await asyncio.sleep(0.1)
+        assert not stream.producer.done()
+
+        await reconnected.aclose()
+        await asyncio.sleep(0.1)
+        assert stream.producer.cancelled()
+        assert stream.finished
+
+    asyncio.run(scenario())
+
+
+def test_run_is_cancelled_when_the_body_is_never_read():
+    async def scenario():
+        registry = ReplayRegistry(reconnect_grace_seconds=0.05)
+        stream = registry.create("s")
+        stream.producer = asyncio.create_task(stream.record(produce_forever()))
+
+        # The client disconnects before the response body is iterated
+        response = sse_response(stream.subscribe())
+        del response
+        await asyncio.sleep(0.1)
+        assert stream.producer.cancelled()
+        assert stream.subscribers == 0 and stream.finished
+
+    asyncio.run(scenario())
+
+
+def test_first_subscriber_keeps_the_run_alive():
+    async def scenario():
+        registry = ReplayRegistry(reconnect_grace_seconds=0.05)
+        stream = registry.create("s")
+        stream.producer = asyncio.create_task(stream.record(produce_forever()))
+
+        subscription = stream.subscribe()
+        await subscription.__anext__()
+        await asyncio.sleep(0.1)
+        assert not stream.producer.done()
+        await subscription.aclose()
+        stream.producer.cancel()
+
+    asyncio.run(scenario())
+
+
+async def produce_forever():
+    encoder = SSEEncoder()
+    while True:
+        await asyncio.sleep(0.005)
+        yield encoder.event("chunk", "...")
+
+
+if __name__ == "__main__":
+    test_event_frames_match_frontend_format()
+    test_event_ids_are_consecutive_and_optional()
+    test_prefixed_ids_carry_the_request_id()
+    test_reconnect_resumes_after_last_event_id()
+    test_resume_refused_when_events_were_evicted()
+    test_finished_streams_expire()
+    test_abandoned_run_is_cancelled_after_grace_period()
+    test_run_is_cancelled_when_the_body_is_never_read()
+    test_first_subscriber_keeps_the_run_alive()
+    print("✅ SSE encoder tests passed")
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Tests for the startup warm-up: a failed agent import is reported and retried.
+"""
+
+import asyncio
+import os
+import sys
+from types import SimpleNamespace
+
+# Add src directory to path to import the API modules
+src_dir = os.path.join(os.path.dirname(__file__), "..", "src")
+sys.path.insert(0, src_dir)
+
+import startup
+from startup import WarmUp
+
+
+async def no_warm_up():
+    return None
+
+
+class FlakyImport:
+    """Stands in for importlib: the first `failures` imports raise"""
+
+    def __init__(self, failures):
+        self.failures = failures
+        self.imports = 0
+
+    def import_module(self, name):
+        self.imports += 1
+        if self.imports <= self.failures:
+            raise ImportError("No module named 'agents'")
+        return SimpleNamespace(
+            get_portal_index=lambda: SimpleNamespace(load=lambda: None),
+            warm_up_embeddings=no_warm_up,
+        )
+
+
+def with_flaky_import(scenario, failures):
+    flaky = FlakyImport(failures)
+    original = startup.importlib, startup.WARM_UP_CONNECTIONS
+    startup.importlib, startup.WARM_UP_CONNECTIONS = flaky, False
+    try:
+        asyncio.run(scenario(flaky))
+    finally:
+        startup.importlib, startup.WARM_UP_CONNECTIONS = original
+
+
+def test_failed_import_is_retried_by_the_next_caller():
+    async def scenario(flaky):
+        warm_up = WarmUp(imports_seconds=0.0)
+        try:
+            await warm_up.agent()
+            raise AssertionError("the first import should fail")
+        except ImportError:
+            pass
+        assert warm_up.error == "ImportError: No module named 'agents'"
+
+        agent = await warm_up.agent()
+        assert agent is await warm_up.agent()
+        assert flaky.imports == 2 and warm_up.error is None
+
+    with_flaky_import(scenario, failures=1)
+
+
+def test_failed_warm_up_reports_and_starts_over():
+    async def scenario(flaky):
+        warm_up = WarmUp(imports_seconds=0.0)
+        await warm_up.start()
+        report = warm_up.to_dict()
+        assert not report["ready"] and "No module named" in report["error"]
+        assert report["phases"][0]["name"] == "import-agent"
+
+        warm_up.retry()  # From the next readiness probe
+        await warm_up._run
+        report = warm_up.to_dict()
+        assert report["ready"] and report["error"] is None
+        assert [phase["name"] for phase in report["phases"]] == ["import-agent", "portals"]
+
+    with_flaky_import(scenario, failures=1)
+
+
+if __name__ == "__main__":
+    test_failed_import_is_retried_by_the_next_caller()
+    test_failed_warm_up_reports_and_starts_over()
+    print("✅ Startup tests passed")
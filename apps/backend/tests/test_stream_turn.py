@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Tests for which answers take an admission slot, with the agent run stubbed out.
+"""
+
+import asyncio
+import os
+import sys
+
+# Add src directory to path to import bsc_agents modules
+src_dir = os.path.join(os.path.dirname(__file__), "..", "src")
+sys.path.insert(0, src_dir)
+
+# The agent module builds its OpenAI client on import; no request is ever sent
+os.environ.setdefault("AZURE_OPENAI_API_KEY", "test-key")
+os.environ.setdefault("AZURE_OPENAI_ENDPOINT", "https://example.openai.azure.com")
+
+from bsc_agents import agent
+from bsc_agents.admission import AdmissionController, AdmissionRejected, Priority
+from bsc_agents.answer_cache import AnswerCache
+from bsc_agents.single_flight import SingleFlight
+
+
+async def no_embedding(message):
+    return None
+
+
+class StubRun:
+    """Stands in for agent.run_agent_events; notes how busy admission was"""
+
+    def __init__(self, controller):
+        self.controller = controller
+        self.runs = 0
+        self.queued_during_runs = 0
+
+    async def __call__(self, message, conversation_history, usage=None):
+        self.runs += 1
+        await asyncio.sleep(0.02)
+        self.queued_during_runs = max(self.queued_during_runs, self.controller.queued)
+        yield {"type": "chunk", "content": f"Answer to {message}."}
+        yield {"type": "complete", "final_output": "Response complete"}
+
+
+def with_stubs(scenario, **controller_options):
+    """Run a scenario with a fresh admission controller, caches and stub run"""
+    controller = AdmissionController(**controller_options)
+    cache = AnswerCache(enabled=True)
+    stub = StubRun(controller)
+    patched = {
+        "get_admission_controller": lambda: controller,
+        "get_answer_cache": lambda: cache,
+        "get_single_flight": lambda flight=SingleFlight(): flight,
+        "run_agent_events": stub,
+        "embed_for_answer_cache": no_embedding,
+    }
+    original = {name: getattr(agent, name) for name in patched}
+    for name, value in patched.items():
+        setattr(agent, name, value)
+    try:
+        asyncio.run(scenario(controller, cache, stub))
+    finally:
+        for name, value in original.items():
+            setattr(agent, name, value)
+
+
+async def answer(message, session_id=None, priority=Priority.INTERACTIVE):
+    events = [event async for event in agent.stream_message_for_api(message, session_id, priority)]
+    return "".join(event["content"] for event in events if event["type"] == "chunk")
+
+
+def test_followers_share_the_leaders_slot():
+    async def scenario(controller, cache, stub):
+        # Only the leader needs the one slot; followers don't queue for it
+        answers = await asyncio.gather(*(answer("How do I pay tuition?") for _ in range(4)))
+        assert answers == ["Answer to How do I pay tuition?."] * 4
+        assert stub.runs == 1 and stub.queued_during_runs == 0
+        assert controller.active == 0
+
+    with_stubs(scenario, max_concurrent=1, max_queue=0)
+
+
+def test_cache_hits_skip_admission_at_capacity():
+    async def scenario(controller, cache, stub):
+        cache.put("When is the FAFSA deadline?", [1.0, 0.0], [
+            {"type": "chunk", "content": "March 1."},
+            {"type": "complete", "final_output": "Response complete"},
+        ], 4.0)
+        held = await controller.acquire(Priority.INTERACTIVE)
+
+        assert await answer("when is the FAFSA deadline?") == "March 1."
+        try:
+            await answer("Where is the testing center?")
+            raise AssertionError("a new run should have been rejected")
+        except AdmissionRejected:
+            pass
+        assert stub.runs == 0
+        controller.release(held)
+
+    with_stubs(scenario, max_concurrent=1, max_queue=0)
+
+
+def test_portal_links_skip_the_session_wait_and_admission():
+    async def scenario(controller, cache, stub):
+        memory = agent.get_memory_manager()
+        session_id = "test_portal_fast_path"
+        held = await controller.acquire(Priority.INTERACTIVE)
+        turn_open = asyncio.Event()
+        finish_turn = asyncio.Event()
+
+        async def busy_turn():
+            async with memory.session_turn(session_id):
+                memory.add_user_message(session_id, "A long question")
+                turn_open.set()
+                await finish_turn.wait()
+                memory.add_assistant_message(session_id, "A long answer")
+
+        other = asyncio.create_task(busy_turn())
+        await turn_open.wait()
+
+        # Answered at once although the session and every slot are busy
+        events = agent.stream_message_for_api("Canvas link", session_id)
+        chunk = await asyncio.wait_for(events.__anext__(), 1.0)
+        done = await asyncio.wait_for(events.__anext__(), 1.0)
+        reply = chunk["content"]
+        assert "Canvas" in reply and done["type"] == "complete"
+        assert stub.runs == 0
+
+        # Its history entry waits for the turn in progress
+        finish_turn.set()
+        assert [event async for event in events] == []
+        await other
+        contents = [m["content"] for m in memory.get_conversation_context(session_id)]
+        assert contents == ["A long question", "A long answer", "Canvas link", reply]
+        controller.release(held)
+        memory.clear_session(session_id)
+
+    with_stubs(scenario, max_concurrent=1, max_queue=0)
+
+
+if __name__ == "__main__":
+    test_followers_share_the_leaders_slot()
+    test_cache_hits_skip_admission_at_capacity()
+    test_portal_links_skip_the_session_wait_and_admission()
+    print("✅ Stream turn admission tests passed")
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Tests for the SSE streaming helpers.
+The segmenter test feeds random token streams to both the StreamSegmenter and
+the original get_flush_content_and_remainder and checks every flush decision matches.
+"""
+
+import asyncio
+import os
+import random
+import sys
+
+# Add src directory to path to import the API modules
+src_dir = os.path.join(os.path.dirname(__file__), "..", "src")
+sys.path.insert(0, src_dir)
+
+from streaming import (
+    TICK,
+    ChunkCoalescer,
+    StreamSegmenter,
+    get_flush_content_and_remainder,
+    iterate_with_timeouts,
+)
+
+
+# Fragments chosen to hit every boundary rule, including the tricky ones
+FRAGMENTS = [
+    "BYU-Idaho", "Idaho's", "student", "financial", "aid", "FAFSA", "I-Learn",
+    "1", "000", "3.14", "159", "2025", "-", "'", "'s", ".", "!", "?", ",",
+    ":", ";", " - ", " — ", "\n", "\n\n", '"', " ", " ", " ", " ", "  ",
+    "https://www.byui.edu/financial-aid", "supercalifragilisticexpialidocious",
+    "x" * 60, "Registration", "opens", "Kimball", "Building", "(208)", "496-1411",
+]
+
+
+def random_response(rng: random.Random, length: int) -> str:
+    """Build a synthetic response from boundary-heavy fragments"""
+    parts = []
+    total = 0
+    while total < length:
+        fragment = rng.choice(FRAGMENTS)
+        if rng.random() < 0.6:
+            fragment += " "
+        parts.append(fragment)
+        total += len(fragment)
+    return "".join(parts)
+
+
+def random_deltas(rng: random.Random, text: str) -> list:
+    """Split text into token-like deltas, with the occasional large one"""
+    deltas = []
+    i = 0
+    while i < len(text):
+        size = rng.randint(200, 400) if rng.random() < 0.02 else rng.randint(1, 8)
+        deltas.append(text[i:i + size])
+        i += size
+    return deltas
+
+
+def run_legacy(deltas: list) -> list:
+    """Flush decisions made by the original rescanning function"""
+    buffer = ""
+    flushes = []
+    for delta in deltas:
+        flush, buffer = get_flush_content_and_remainder(buffer, delta)
+        flushes.append((flush, buffer))
+    return flushes
+
+
+def run_segmenter(deltas: list) -> list:
+    """Flush decisions made by the incremental segmenter"""
+    segmenter = StreamSegmenter()
+    flushes = []
+    for delta in deltas:
+        flush = segmenter.feed(delta)
+        flushes.append((flush, segmenter.pending))
+    return flushes
+
+
+def test_segmenter_matches_legacy_on_random_streams():
+    rng = random.Random(1234)
+    for _ in range(400):
+        text = random_response(rng, rng.randint(50, 3000))
+        deltas = random_deltas(rng, text)
+        assert run_segmenter(deltas) == run_legacy(deltas)
+
+
+def test_segmenter_matches_legacy_on_prose():
+    text = (
+        "Hi there! 👋 The FAFSA priority deadline for BYU-Idaho is March 1. "
+        "You can submit it at https://studentaid.gov; make sure you list "
+        "school code 003614 - that's Idaho's code.\n\nNeed help? Visit the "
+        "Financial Aid Office in 196 Kimball Building, or call 208-496-1411."
+    ) * 20
+    for size in (1, 2, 3, 5, 8, 13):
+        deltas = [text[i:i + size] for i in range(0, len(text), size)]
+        assert run_segmenter(deltas) == run_legacy(deltas)
+
+
+def test_segmenter_matches_legacy_without_boundaries():
+    # Long unbroken runs force the emergency flush paths
+    text = ("a" * 170 + " " + "1" * 90 + " 2" + "-b" * 80 + " ") * 5
+    for size in (1, 4, 7, 160):
+        deltas = [text[i:i + size] for i in range(0, len(text), size)]
+        assert run_segmenter(deltas) == run_legacy(deltas)
+
+
+def test_drain_returns_pending_text():
+    segmenter = StreamSegmenter()
+    assert segmenter.feed("Hello") == ""
+    assert segmenter.pending == "Hello"
+    assert segmenter.drain() == "Hello"
+    assert segmenter.pending == ""
+    # Trackers must not leak positions from before the drain
+    assert segmenter.feed("world, again") == ""
+    assert segmenter.feed(" and more. ") == "world, again and more. "
+
+
+def test_coalescer_flushes_on_size_or_age():
+    coalescer = ChunkCoalescer(max_delay=0.04, max_bytes=16)
+    assert coalescer.add("Hello there, ", now=0.0) == ""
+    assert coalescer.deadline == 0.04
+    assert coalescer.due(now=0.01) == ""
+    assert coalescer.due(now=0.05) == "Hello there, "
+    assert coalescer.deadline is None
+
+    assert coalescer.add("student! ", now=1.0) == ""
+    assert coalescer.add("The FAFSA ", now=1.01) == "student! The FAFSA "
+
+
+def test_coalescer_disabled_with_zero_delay():
+    coalescer = ChunkCoalescer(max_delay=0, max_bytes=512)
+    assert coalescer.add("Hi. ", now=0.0) == "Hi. "
+
+
+def test_iterate_with_timeouts_ticks_while_source_is_idle():
+    async def slow_source():
+        yield "first"
+        await asyncio.sleep(0.05)
+        yield "second"
+
+    async def collect():
+        events = iterate_with_timeouts(slow_source(), lambda: 0.01)
+        return [item async for item in events]
+
+    items = asyncio.run(collect())
+    assert items[0] == "first" and items[-1] == "second"
+    assert TICK in items
+
+
+if __name__ == "__main__":
+    print("🧪 Testing SSE streaming helpers")
+    test_segmenter_matches_legacy_on_random_streams()
+    test_segmenter_matches_legacy_on_prose()
+    test_segmenter_matches_legacy_without_boundaries()
+    test_drain_returns_pending_text()
+    test_coalescer_flushes_on_size_or_age()
+    test_coalescer_disabled_with_zero_delay()
+    test_iterate_with_timeouts_ticks_while_source_is_idle()
+    print("✅ Streaming helper tests passed")
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Tests for per-request stage timing (Server-Timing header and SSE timing event).
+"""
+
+import asyncio
+import json
+import os
+import sys
+
+# Add src directory to path to import bsc_agents modules
+src_dir = os.path.join(os.path.dirname(__file__), "..", "src")
+sys.path.insert(0, src_dir)
+
+# The agent module builds its OpenAI client on import; no request is ever sent
+os.environ.setdefault("AZURE_OPENAI_API_KEY", "test-key")
+os.environ.setdefault("AZURE_OPENAI_ENDPOINT", "https://example.openai.azure.com")
+
+import api
+from bsc_agents import agent
+from bsc_agents.timing import (
+    current_timing,
+    mark,
+    record,
+    record_call,
+    start_request_timing,
+    timed,
+    timed_call,
+)
+from sse import SSEEncoder
+
+
+async def tool_call():
+    """Stands in for a tool the agent SDK runs in its own task"""
+    with timed("kb-embed"):
+        await asyncio.sleep(0.01)
+    record("kb-query", 0.02)
+
+
+def test_stages_recorded_in_child_tasks():
+    async def scenario():
+        timing = start_request_timing()
+        with timed("history"):
+            pass
+        await asyncio.create_task(tool_call())
+        mark("first-token")
+        mark("first-token")  # Only the first mark counts
+
+        names = [stage.name for stage in timing.stages]
+        assert names == ["history", "kb-embed", "kb-query", "first-token"]
+
+        header = timing.server_timing()
+        assert header.startswith("history;dur=")
+        assert "kb-query;dur=20.0" in header
+        assert header.split(", ")[-1].startswith("total;dur=")
+
+    asyncio.run(scenario())
+
+
+def test_repeated_calls_are_numbered():
+    async def search(delay):
+        with timed_call("tool-search_knowledge_base"):
+            await asyncio.sleep(delay)
+            await tool_call()
+
+    async def scenario():
+        timing = start_request_timing()
+        record_call("model-turn", 0.5)
+        # The SDK runs parallel tool calls in their own tasks
+        await asyncio.gather(search(0.02), search(0))
+        record_call("model-turn", 0.25)
+        record("history", 0.001)
+
+        names = [stage.name for stage in timing.stages]
+        assert names[0] == "model-turn-1" and names[-2:] == ["model-turn-2", "history"]
+        for number in ("1", "2"):
+            call = [name for name in names if name.endswith(f"-{number}")]
+            assert set(call) >= {f"tool-search_knowledge_base-{number}", f"kb-embed-{number}", f"kb-query-{number}"}
+        assert names.index("tool-search_knowledge_base-2") < names.index("tool-search_knowledge_base-1")
+
+    asyncio.run(scenario())
+
+
+def test_nothing_recorded_unless_requested():
+    async def scenario():
+        start_request_timing(False)
+        with timed("history"):
+            pass
+        record("queue", 1.0)
+        mark("first-token")
+        assert current_timing() is None
+
+    asyncio.run(scenario())
+
+
+def test_timing_event_carries_structured_content():
+    async def scenario():
+        timing = start_request_timing()
+        record("queue", 0.0125, "admission")
+        frame = SSEEncoder().event("timing", timing.to_dict())
+        data = json.loads(frame.decode("utf-8").split("data: ", 1)[1])
+
+        assert data["type"] == "timing"
+        assert data["content"]["stages"] == [
+            {"name": "queue", "ms": 12.5, "description": "admission"}
+        ]
+        assert data["content"]["total_ms"] >= 0
+
+    asyncio.run(scenario())
+
+
+def test_timing_event_comes_before_the_first_done():
+    async def answer(message, session_id=None):
+        record("history", 0.001)
+        yield {"type": "chunk", "content": "Hello there. "}
+        yield {"type": "complete", "final_output": "Response complete"}
+
+    async def scenario():
+        start_request_timing()
+        frames = [frame async for frame in api.chat_event_stream("Hi", None, SSEEncoder())]
+        events = [json.loads(frame.decode("utf-8").split("data: ", 1)[1]) for frame in frames]
+
+        assert [event["type"] for event in events] == ["chunk", "timing", "done", "done"]
+        assert events[1]["content"]["stages"][0]["name"] == "history"
+
+    original = agent.stream_message_for_api
+    agent.stream_message_for_api = answer
+    try:
+        asyncio.run(scenario())
+    finally:
+        agent.stream_message_for_api = original
+
+
+if __name__ == "__main__":
+    test_stages_recorded_in_child_tasks()
+    test_repeated_calls_are_numbered()
+    test_nothing_recorded_unless_requested()
+    test_timing_event_carries_structured_content()
+    test_timing_event_comes_before_the_first_done()
+    print("✅ Timing tests passed")
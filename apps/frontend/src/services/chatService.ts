@@ -45,6 +45,9 @@ const API_BASE_URL = (() => {
   return import.meta.env.VITE_API_URL || "http://localhost:3001";
 })();
 
+// How many times a dropped stream may reconnect before giving up
+const MAX_STREAM_RECONNECTS = 3;
+
 /**
  * Send a message to the BSC Agent API (non-streaming)
  */
@@ -135,7 +138,26 @@ export function sendMessageStream(
   // Note: We rely on the generic onmessage handler above for all event types
   // since our backend sends structured data with type information
 
+  // The browser reconnects on its own and sends Last-Event-ID, which the
+  // backend uses to resume the same answer from its replay buffer
+  let reconnectAttempts = 0;
+
+  eventSource.onopen = () => {
+    reconnectAttempts = 0;
+  };
+
   eventSource.onerror = (error) => {
+    if (
+      eventSource.readyState === EventSource.CONNECTING &&
+      reconnectAttempts < MAX_STREAM_RECONNECTS
+    ) {
+      reconnectAttempts += 1;
+      console.warn(
+        `EventSource reconnecting (attempt ${reconnectAttempts}/${MAX_STREAM_RECONNECTS})`
+      );
+      return;
+    }
+
     console.error("EventSource failed:", error);
     console.error("EventSource readyState:", eventSource.readyState);
     console.error("EventSource URL:", eventSource.url);